@@ -2,11 +2,9 @@ import asyncio
 from typing import Annotated
 import re
 import os
-import requests
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
 from livekit import agents, rtc, api
-from livekit.agents import JobContext, WorkerOptions, cli, tokenize, tts
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli, tts
 from livekit.agents.llm import (
     ChatContext,
     ChatMessage,
@@ -14,11 +12,37 @@ from livekit.agents.llm import (
 )
 from livekit.agents.voice_assistant import VoiceAssistant
 from livekit.plugins import deepgram, openai, silero
+from assistant.http_client import RequestError, get_http_client
+from assistant.context_window import ContextWindow
+from assistant.follow_up import FollowUpScheduler, start_webhook_listener
+from assistant.frame_sampler import FrameSampler
+from assistant.appointment_slots import AppointmentSlotCache
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
+from tts.chunker import LatencyAwareChunker
+from tts.phrase_cache import CachedTTS, prewarm_phrases
 
 load_dotenv(dotenv_path=".env.local")
 
+GREETING = "Hello! I'm Daela, your dental assistant at Knolabs Dental Agency. Can I know if you are the patient or you're representing the patient?"
+HANDOFF_MESSAGE = "Human assistance is coming. Please wait while I'm trying to connect you. I'll be here if you need me, just say my name."
+
+
+def prewarm(proc: JobProcess):
+    # Fixed lines are synthesized once per machine and replayed from the phrase cache
+    prewarm_phrases(lambda: openai.TTS(voice="alloy"), "alloy", [GREETING, HANDOFF_MESSAGE])
+
+
+# What the caller hears about their booking, from a tool call or a follow-up
+BOOKED_STATUS = "You have successfully booked a dental appointment."
+NOT_BOOKED_STATUS = "You haven't booked a dental appointment yet. Would you like assistance in scheduling one?"
+
+
 class DentalAssistantFunction(agents.llm.FunctionContext):
 
+    def __init__(self):
+        super().__init__()
+        self.slots = AppointmentSlotCache()
+
     @agents.llm.ai_callable(
         description=(
             "Called when asked to evaluate dental issues using vision capabilities,"
@@ -71,12 +95,11 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
         }
 
         try:
-            response = requests.post(api_url, json=data, headers=headers)
-            response.raise_for_status()
-            contact = response.json()['contact']
+            result = await get_http_client().post(api_url, endpoint="CRM_CONTACT_ENDPOINT", json=data, headers=headers)
+            contact = result['contact']
             contact_id = contact['id']
             return f"Customer data is saved with Customer Reference ID: {contact_id}. Please save this reference for later."
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error creating contact in CRM: {e}")
             return "There was an error creating your contact in our system. Please try again later."
 
@@ -106,10 +129,9 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
             webhook_url = os.getenv('WEBHOOK_URL')
             headers = {'Content-Type': 'application/json'}
             data = {'email': email, 'name': name}
-            response = requests.post(webhook_url, json=data, headers=headers)
-            response.raise_for_status()
+            await get_http_client().post(webhook_url, endpoint="WEBHOOK_URL", json=data, headers=headers)
             return f"Dental appointment booking link sent to {email}. Please check your email."
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error booking appointment: {e}")
             return "There was an error booking your dental appointment. Please try again later."
 
@@ -147,10 +169,9 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
             }
         }
         try:
-            response = requests.put(api_url, json=data, headers=headers)
-            response.raise_for_status()
+            await get_http_client().put(api_url, endpoint="CRM_CONTACT_ENDPOINT", json=data, headers=headers)
             return "I've now reported your problem to our system. Please note you've a right to erasure all your data kept with us securely as part of your rights ensured by GDPR. "
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error updating contact information in CRM: {e}")
             return "There was an error updating your information in our system. Please try again later."
 
@@ -166,42 +187,16 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
             ),
         ],
     ):
-        api_token = os.getenv('API_TOKEN')
-        calendar_id = os.getenv('CALENDAR_ID')
-        api_url = f"{os.getenv('APPOINTMENT_SLOTS_ENDPOINT')}"
-
-        current_time = datetime.now()
-        if urgency == "emergency":
-            start_date = current_time
-            end_date = current_time + timedelta(hours=24)
-        else:
-            start_date = current_time + timedelta(days=3)
-            end_date = start_date + timedelta(days=7)
-
-        params = {
-            'calendarId': calendar_id,
-            'startDate': int(start_date.timestamp() * 1000),
-            'endDate': int(end_date.timestamp() * 1000),
-            'timezone': 'Europe/London'
-        }
-
-        headers = {
-            'Authorization': f'Bearer {api_token}',
-            'Content-Type': 'application/json'
-        }
-
         try:
-            response = requests.get(api_url, params=params, headers=headers)
-            response.raise_for_status()
-            slots = response.json()
-            
+            # Prefetched at session start, so this is normally answered from memory
+            slots = await self.slots.get(urgency)
             if slots:
-                first_date = list(slots.keys())[0]
-                first_slot = slots[first_date]['slots'][0]
-                return f"The first available slot is {first_slot}"
+                if len(slots) == 1:
+                    return f"The first available slot is {slots[0]}"
+                return f"The first available slot is {slots[0]}. Other available slots: {', '.join(slots[1:])}"
             else:
                 return "No Slot Found"
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error finding appointment slots: {e}")
             return None
 
@@ -242,11 +237,10 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
         }
 
         try:
-            response = requests.post(api_url, json=data, headers=headers)
-            response.raise_for_status()
-            appointment = response.json()
+            appointment = await get_http_client().post(api_url, endpoint="BOOK_APPOINTMENT_ENDPOINT", json=data, headers=headers)
+            self.slots.invalidate()
             return "call_human_agent"
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error booking emergency appointment: {e}")
             return "There was an error booking your emergency appointment. Please try again later."
 
@@ -264,15 +258,12 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
                 'Authorization': f'Bearer {api_token}',
                 'Content-Type': 'application/json'
             }
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()
-
-            data = response.json()
+            data = await get_http_client().get(api_url, endpoint="CRM_CONTACT_LOOKUP_ENDPOINT", headers=headers) or {}
             for contact in data.get('contacts', []):
                 if 'livekit_appointment_booked' in contact.get('tags', []):
-                    return "You have successfully booked a dental appointment."
-            return "You haven't booked a dental appointment yet. Would you like assistance in scheduling one?"
-        except requests.RequestException as e:
+                    return BOOKED_STATUS
+            return NOT_BOOKED_STATUS
+        except RequestError as e:
             print(f"Error during API request: {e}")
             return "Error checking the dental appointment status."
 
@@ -294,22 +285,9 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
         else:
             return "Your dental issue doesn't appear to be immediately urgent, but it's still important to schedule an appointment soon for a proper evaluation."
         
-async def get_video_track(room: rtc.Room):
-    video_track = asyncio.Future[rtc.RemoteVideoTrack]()
-
-    for _, participant in room.remote_participants.items():
-        for _, track_publication in participant.track_publications.items():
-            if track_publication.track is not None and isinstance(
-                track_publication.track, rtc.RemoteVideoTrack
-            ):
-                video_track.set_result(track_publication.track)
-                print(f"Using video track {track_publication.track.sid}")
-                break
-
-    return await video_track
-
 async def entrypoint(ctx: JobContext):
     await ctx.connect()
+    report_job_load(ctx)
     print(f"Connected to room: {ctx.room.name}")
 
     chat_context = ChatContext(
@@ -337,20 +315,36 @@ async def entrypoint(ctx: JobContext):
 
     gpt = openai.LLM(model="gpt-4o-mini")
     openai_tts = tts.StreamAdapter(
-        tts=openai.TTS(voice="alloy"),
-        sentence_tokenizer=tokenize.basic.SentenceTokenizer(),
+        tts=CachedTTS(openai.TTS(voice="alloy"), voice="alloy"),
+        sentence_tokenizer=LatencyAwareChunker(),
     )
 
-    latest_image: rtc.VideoFrame | None = None
+    # Camera frames are only decoded when a vision tool asks for one
+    frames = FrameSampler(ctx.room)
+    frames.start()
+    ctx.add_shutdown_callback(frames.aclose)
     human_agent_present = False
 
+    # Fetch both slot windows now so "when can I come in" doesn't wait on the calendar API
+    fnc_ctx = DentalAssistantFunction()
+    fnc_ctx.slots.start()
+    ctx.add_shutdown_callback(fnc_ctx.slots.aclose)
+
+    # Keeps long calls within a token budget by summarizing older turns
+    context_window = ContextWindow(chat_context, gpt)
+
+    # Booking follow-ups wait for the CRM webhook (or poll), cancelled with the room
+    follow_ups = FollowUpScheduler()
+    ctx.add_shutdown_callback(follow_ups.aclose)
+
     assistant = VoiceAssistant(
         vad=silero.VAD.load(),
         stt=deepgram.STT(),
         llm=gpt,
         tts=openai_tts,
-        fnc_ctx=DentalAssistantFunction(),
+        fnc_ctx=fnc_ctx,
         chat_ctx=chat_context,
+        before_llm_cb=context_window.before_llm_cb,
     )
 
     chat = rtc.ChatManager(ctx.room)
@@ -361,21 +355,25 @@ async def entrypoint(ctx: JobContext):
             return
 
         content: list[str | ChatImage] = [text]
-        if use_image and latest_image:
+        image = await frames.image() if use_image else None
+        if image:
             print(f"Calling with latest image")
-            content.append(ChatImage(image=latest_image))
+            content.append(image)
 
         chat_context.messages.append(ChatMessage(role="user", content=content))
+
+        context_window.compact()
         stream = gpt.chat(chat_ctx=chat_context)
         await assistant.say(stream, allow_interruptions=True)
 
 
-    async def follow_up_appointment(email: str):
-        fnc = assistant.fnc_ctx
-        await asyncio.sleep(20)
-        print(f"Finished waiting, checking dental appointment status for {email}")
-        status = await fnc.check_appointment_status(email)
-        await asyncio.create_task(_answer(status))
+    def follow_up_appointment(email: str):
+        """Tell the user about their booking once the CRM shows it (or the wait times out)."""
+        async def _report(booked: bool):
+            # The follow-up already knows the outcome; a fresh CRM lookup can lag the webhook
+            await _answer(BOOKED_STATUS if booked else NOT_BOOKED_STATUS)
+
+        follow_ups.schedule(email, _report)
 
     async def create_sip_participant(phone_number, room_name):
         print("trying to call an agent")
@@ -429,7 +427,7 @@ async def entrypoint(ctx: JobContext):
                 print("calling an agent")
                 human_agent_phone = os.getenv('HUMAN_AGENT_PHONE')
 
-                asyncio.create_task(_answer("Human assistance is coming. Please wait while I'm trying to connect you. I'll be here if you need me, just say my name.", human_agent_present = True, ai_assistance_required=True))
+                asyncio.create_task(assistant.say(HANDOFF_MESSAGE, allow_interruptions=True))
                 asyncio.sleep(10)
                 asyncio.create_task(create_sip_participant(human_agent_phone, ctx.room.name))
                 human_agent_present = True
@@ -439,7 +437,7 @@ async def entrypoint(ctx: JobContext):
         elif function_name == "book_appointment":
             email = called_functions[0].call_info.arguments.get("email")
             if email:
-                asyncio.create_task(follow_up_appointment(email))
+                follow_up_appointment(email)
         elif function_name == "analyze_dental_image":
             user_instruction = called_functions[0].call_info.arguments.get("user_msg")
             asyncio.create_task(_answer(user_instruction, use_image=True))
@@ -447,14 +445,19 @@ async def entrypoint(ctx: JobContext):
     assistant.start(ctx.room)
 
     await asyncio.sleep(1)
-    await assistant.say("Hello! I'm Daela, your dental assistant at Knolabs Dental Agency. Can I know if you are the patient or you're representing the patient?", allow_interruptions=True)
+    await assistant.say(GREETING, allow_interruptions=True)
 
     while ctx.room.connection_state == rtc.ConnectionState.CONN_CONNECTED:
-        video_track = await get_video_track(ctx.room)
-
-        async for event in rtc.VideoStream(video_track):
-            latest_image = event.frame
-            asyncio.sleep(1)
+        await asyncio.sleep(1)  # Keep the connection alive for incoming events
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    start_webhook_listener()
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
+        )
+    )
\ No newline at end of file
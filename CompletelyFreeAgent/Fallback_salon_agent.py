@@ -17,16 +17,18 @@ from typing import Annotated, Dict
 from livekit import agents, rtc, api
 import re
 import os
-from llama_index.core import (
-    SimpleDirectoryReader,
-    StorageContext,
-    VectorStoreIndex,
-    load_index_from_storage,
-)
-import requests
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from config import load_config
+from knowledge import get_knowledge_base
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
+from tts.chunker import LatencyAwareChunker
+from tts.router import get_tts_router
 from mock_order_service import salon_service
+from salon_availability import UnknownStylist
 import json
-from pathlib import Path
 
 def get_openai_key():
     try:
@@ -47,18 +49,12 @@ logger = logging.getLogger("fallback-adapter-example")
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    get_knowledge_base(PERSIST_DIR, DATA_DIR)
+    get_tts_router(load_config())
 
-# Initialize RAG components
+# Initialize RAG components (loaded once per worker process in prewarm)
 PERSIST_DIR = "./salon-knowledge-storage"
-if not os.path.exists(PERSIST_DIR):
-    # Load salon knowledge documents and create index
-    documents = SimpleDirectoryReader("saloon_company_data").load_data()
-    index = VectorStoreIndex.from_documents(documents)
-    index.storage_context.persist(persist_dir=PERSIST_DIR)
-else:
-    # Load existing salon knowledge index
-    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-    index = load_index_from_storage(storage_context)
+DATA_DIR = "saloon_company_data"
 
 class SalonBookingFunction(agents.llm.FunctionContext):
     @agents.llm.ai_callable(
@@ -98,11 +94,43 @@ class SalonBookingFunction(agents.llm.FunctionContext):
         ],
     ):
         print(f"Answering from knowledgebase: {query}")
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         print("Query result:", res)
         return str(res)
 
+    @agents.llm.ai_callable(
+        description="Called when user asks when the salon has free appointments, or whether a specific date and time is free"
+    )
+    async def find_available_slots(
+        self,
+        preferred_date: Annotated[
+            str,
+            llm.TypeInfo(description="Date to search from (YYYY-MM-DD format)")
+        ],
+        preferred_time: Annotated[
+            str,
+            llm.TypeInfo(description="Earliest acceptable time (HH:MM format), empty for any time that day")
+        ] = "",
+        stylist: Annotated[
+            str,
+            llm.TypeInfo(description="Stylist the customer asked for, empty for anyone")
+        ] = "",
+    ) -> str:
+        try:
+            slots = salon_service.find_available_slots(preferred_date, preferred_time or None, stylist=stylist or None)
+        except UnknownStylist as e:
+            # Lets the LLM ask again, with the roster to hand
+            return str(e)
+        except ValueError:
+            return "Please give the date as YYYY-MM-DD and the time as HH:MM."
+        if not slots:
+            return "There are no free appointments in the next two weeks from that date."
+        if preferred_time and slots[0]['date'] == preferred_date and slots[0]['time'] == preferred_time:
+            return f"{preferred_time} on {preferred_date} is free with {slots[0]['stylist']}."
+        return "The earliest free appointments are " + ", ".join(
+            f"{s['date']} at {s['time']} with {s['stylist']}" for s in slots
+        ) + "."
+
     @agents.llm.ai_callable(
         description="Called when a user wants to book salon services"
     )
@@ -120,6 +148,10 @@ class SalonBookingFunction(agents.llm.FunctionContext):
             str,
             llm.TypeInfo(description="Preferred time for the appointment (HH:MM format)")
         ],
+        stylist: Annotated[
+            str,
+            llm.TypeInfo(description="Stylist the customer asked for, empty for anyone")
+        ] = "",
     ) -> str:
         self.current_order = getattr(self, 'current_order', {})
         if not self.current_order.get('customer_name') or not self.current_order.get('phone'):
@@ -130,6 +162,8 @@ class SalonBookingFunction(agents.llm.FunctionContext):
             'preferred_date': preferred_date,
             'preferred_time': preferred_time
         })
+        # Always overwritten, so an earlier booking's stylist doesn't carry over
+        self.current_order['stylist'] = stylist or None
         
         # Process booking using mock service
         result = salon_service.process_order(self.current_order)
@@ -151,8 +185,7 @@ class SalonBookingFunction(agents.llm.FunctionContext):
         ],
     ):
         query = f"What are the special offers available{' on ' + day_of_week if day_of_week else ''}?"
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         return str(res)
 
 async def entrypoint(ctx: JobContext):
@@ -172,12 +205,14 @@ async def entrypoint(ctx: JobContext):
             "3. Confirm all details before finalizing\n\n"
             "Use available functions/tools to answer user queries whenever needed. "
             "Keep responses short and natural, avoiding complex punctuation. "
-            "For detailed service information, prices, or availability, use the query_salon_info function."
+            "For detailed service information or prices, use the query_salon_info function. "
+            "For free appointment times, or whether a time is free, use the find_available_slots function."
         ),
     )
 
     logger.info(f"connecting to room {ctx.room.name}")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    report_job_load(ctx)
 
     vad: silero.VAD = silero.VAD.load()
 
@@ -198,14 +233,13 @@ async def entrypoint(ctx: JobContext):
         ]
     )
 
-    # fallback to deepgram if openai goes down
-    # you can keep the same voice by using their voice cloning feature
-    fallback_tts = tts.FallbackAdapter(
-        [   
-            openai.TTS(),
-            deepgram.TTS(),
-        ]
-    )
+    # Each sentence goes to whichever of TTS_PROVIDERS is currently fastest and
+    # healthy, failing over to the next if it errors or stalls
+    # you can keep the same voice by using their voice cloning feature.
+    # Built once per process in prewarm; this job only runs its probes
+    tts_router = get_tts_router(load_config())
+    tts_router.start()
+    ctx.add_shutdown_callback(tts_router.stop)
 
     agent = VoicePipelineAgent(
         vad=silero.VAD.load(),
@@ -213,7 +247,7 @@ async def entrypoint(ctx: JobContext):
         chat_ctx=initial_ctx,
         llm=fallback_llm,
         # llm=openai.LLM.with_cerebras(model="llama-3.3-70b"),
-        tts=fallback_tts,
+        tts=tts.StreamAdapter(tts=tts_router, sentence_tokenizer=LatencyAwareChunker()),
     )
     
 
@@ -226,5 +260,8 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
         )
     )
\ No newline at end of file
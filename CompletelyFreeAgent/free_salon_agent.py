@@ -15,32 +15,25 @@ from typing import Annotated, Dict
 from livekit import agents, rtc, api
 import re
 import os
-from llama_index.core import (
-    SimpleDirectoryReader,
-    StorageContext,
-    VectorStoreIndex,
-    load_index_from_storage,
-)
-import requests
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from knowledge import get_knowledge_base
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
 from mock_order_service import salon_service
+from salon_availability import UnknownStylist
 
 load_dotenv(dotenv_path=".env.local")
 logger = logging.getLogger("voice-assistant")
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    get_knowledge_base(PERSIST_DIR, DATA_DIR)
 
-# Initialize RAG components
+# Initialize RAG components (loaded once per worker process in prewarm)
 PERSIST_DIR = "./salon-knowledge-storage"
-if not os.path.exists(PERSIST_DIR):
-    # Load salon knowledge documents and create index
-    documents = SimpleDirectoryReader("saloon_company_data").load_data()
-    index = VectorStoreIndex.from_documents(documents)
-    index.storage_context.persist(persist_dir=PERSIST_DIR)
-else:
-    # Load existing salon knowledge index
-    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-    index = load_index_from_storage(storage_context)
+DATA_DIR = "saloon_company_data"
 
 class SalonBookingFunction(agents.llm.FunctionContext):
     @agents.llm.ai_callable(
@@ -80,11 +73,43 @@ class SalonBookingFunction(agents.llm.FunctionContext):
         ],
     ):
         print(f"Answering from knowledgebase: {query}")
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         print("Query result:", res)
         return str(res)
 
+    @agents.llm.ai_callable(
+        description="Called when user asks when the salon has free appointments, or whether a specific date and time is free"
+    )
+    async def find_available_slots(
+        self,
+        preferred_date: Annotated[
+            str,
+            llm.TypeInfo(description="Date to search from (YYYY-MM-DD format)")
+        ],
+        preferred_time: Annotated[
+            str,
+            llm.TypeInfo(description="Earliest acceptable time (HH:MM format), empty for any time that day")
+        ] = "",
+        stylist: Annotated[
+            str,
+            llm.TypeInfo(description="Stylist the customer asked for, empty for anyone")
+        ] = "",
+    ) -> str:
+        try:
+            slots = salon_service.find_available_slots(preferred_date, preferred_time or None, stylist=stylist or None)
+        except UnknownStylist as e:
+            # Lets the LLM ask again, with the roster to hand
+            return str(e)
+        except ValueError:
+            return "Please give the date as YYYY-MM-DD and the time as HH:MM."
+        if not slots:
+            return "There are no free appointments in the next two weeks from that date."
+        if preferred_time and slots[0]['date'] == preferred_date and slots[0]['time'] == preferred_time:
+            return f"{preferred_time} on {preferred_date} is free with {slots[0]['stylist']}."
+        return "The earliest free appointments are " + ", ".join(
+            f"{s['date']} at {s['time']} with {s['stylist']}" for s in slots
+        ) + "."
+
     @agents.llm.ai_callable(
         description="Called when a user wants to book salon services"
     )
@@ -102,6 +127,10 @@ class SalonBookingFunction(agents.llm.FunctionContext):
             str,
             llm.TypeInfo(description="Preferred time for the appointment (HH:MM format)")
         ],
+        stylist: Annotated[
+            str,
+            llm.TypeInfo(description="Stylist the customer asked for, empty for anyone")
+        ] = "",
     ) -> str:
         self.current_order = getattr(self, 'current_order', {})
         if not self.current_order.get('customer_name') or not self.current_order.get('phone'):
@@ -112,6 +141,8 @@ class SalonBookingFunction(agents.llm.FunctionContext):
             'preferred_date': preferred_date,
             'preferred_time': preferred_time
         })
+        # Always overwritten, so an earlier booking's stylist doesn't carry over
+        self.current_order['stylist'] = stylist or None
         
         # Process booking using mock service
         result = salon_service.process_order(self.current_order)
@@ -133,8 +164,7 @@ class SalonBookingFunction(agents.llm.FunctionContext):
         ],
     ):
         query = f"What are the special offers available{' on ' + day_of_week if day_of_week else ''}?"
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         return str(res)
 
 async def entrypoint(ctx: JobContext):
@@ -147,12 +177,14 @@ async def entrypoint(ctx: JobContext):
             "When taking bookings first ask for the customer's name and phone number in sequence. "
             "You should use short and concise responses, avoiding usage of unpronounceable punctuation. "
             "Remember users could be of any age group, they may speak slowly, so use your judgment based on complete information given not piece of it as they speak. "
-            "For any queries about services, prices, or availability, use the query_salon_info function to get accurate information from our knowledge base."
+            "For any queries about services or prices, use the query_salon_info function to get accurate information from our knowledge base. "
+            "For free appointment times, or whether a time is free, use the find_available_slots function."
         ),
     )
 
     logger.info(f"connecting to room {ctx.room.name}")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    report_job_load(ctx)
 
     # agent = VoicePipelineAgent(
     #     vad=silero.VAD.load(),
@@ -183,5 +215,8 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
         )
     )
\ No newline at end of file
@@ -1,12 +1,29 @@
+import os
 import re
+import sys
 import json
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from storage import RecordStore
+from salon_availability import DEFAULT_DURATION_MINUTES, SLOT_MINUTES, SlotCalendar, UnknownStylist
 
 class MockSalonService:
     def __init__(self):
-        self.bookings = []
-        self.booking_counter = 1000
+        # Indexed by id, phone and date; ids and records are shared by every worker
+        self.bookings = RecordStore(
+            os.getenv("SALON_STORE_PATH", "./bookings.sqlite"),
+            kind="booking",
+            id_field="booking_id",
+            id_prefix="BKG",
+            indexes={
+                'phone': lambda r: r.get('phone'),
+                'date': lambda r: (r.get('preferred_date') or '')[:10] or None,
+            },
+        )
         self.business_hours = {
             'Monday': ('9:00', '20:00'),
             'Tuesday': ('9:00', '20:00'),
@@ -16,6 +33,10 @@ class MockSalonService:
             'Saturday': ('9:00', '20:00'),
             'Sunday': ('10:00', '18:00')
         }
+        # Which 15-minute slots each stylist has free; shares the bookings database
+        self.availability = SlotCalendar(
+            os.getenv("SALON_STORE_PATH", "./bookings.sqlite"), self.business_hours
+        )
 
     def validate_phone_number(self, phone: str) -> bool:
         # Basic UK phone number validation
@@ -31,16 +52,12 @@ class MockSalonService:
             if booking_datetime < datetime.now():
                 return False, "Cannot book appointments in the past"
             
-            # Get day of week
+            # Check if within business hours (parsed once in SlotCalendar)
             day_of_week = booking_datetime.strftime('%A')
-            
-            # Check if within business hours
-            if day_of_week in self.business_hours:
-                open_time = datetime.strptime(self.business_hours[day_of_week][0], "%H:%M").time()
-                close_time = datetime.strptime(self.business_hours[day_of_week][1], "%H:%M").time()
-                booking_time = booking_datetime.time()
-                
-                if not (open_time <= booking_time <= close_time):
+            opening = self.availability.opening(booking_datetime.date())
+            if opening:
+                slot = (booking_datetime.hour * 60 + booking_datetime.minute) / SLOT_MINUTES
+                if not (opening[0] <= slot <= opening[1]):
                     return False, f"We're not open at {time_str} on {day_of_week}s"
             
             return True, "Valid date and time"
@@ -66,18 +83,41 @@ class MockSalonService:
                     'error': message
                 }
 
-        # Generate booking details
-        booking_id = f"BKG{self.booking_counter}"
-        self.booking_counter += 1
-        
-        booking = {
-            'booking_id': booking_id,
-            'timestamp': datetime.now().isoformat(),
-            'status': 'confirmed',
-            **booking_data
-        }
-        
-        self.bookings.append(booking)
+        # Hold the slot before confirming so two callers cannot both get it
+        reservation = None
+        stylist = None
+        if date_str and time_str:
+            reservation = uuid.uuid4().hex
+            start = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+            duration = booking_data.get('duration_minutes') or DEFAULT_DURATION_MINUTES
+            try:
+                stylist = self.availability.reserve(reservation, start, duration, booking_data.get('stylist'))
+            except UnknownStylist as e:
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
+            if stylist is None:
+                alternatives = self.availability.next_free(start, duration, booking_data.get('stylist'))
+                suggestion = ", ".join(f"{at:%A %d %B at %H:%M} with {who}" for at, who in alternatives)
+                return {
+                    'success': False,
+                    'error': f"{time_str} on {date_str} is not available"
+                             + (f". The nearest free times are {suggestion}" if suggestion else ""),
+                }
+
+        try:
+            booking = self.bookings.create({
+                'timestamp': datetime.now().isoformat(),
+                'status': 'confirmed',
+                **booking_data,
+                **({'stylist': stylist, 'reservation': reservation} if stylist else {}),
+            })
+        except Exception:
+            if reservation:
+                self.availability.release(reservation)
+            raise
+        booking_id = booking['booking_id']
         
         return {
             'success': True,
@@ -85,11 +125,26 @@ class MockSalonService:
             'message': 'Booking confirmed'
         }
 
+    def find_available_slots(self, date_str: str, time_str: Optional[str] = None,
+                             duration_minutes: int = DEFAULT_DURATION_MINUTES,
+                             stylist: Optional[str] = None, limit: int = 3) -> List[Dict]:
+        """Free appointment starts from the given date (and time), earliest first."""
+        after = datetime.strptime(f"{date_str} {time_str or '00:00'}", "%Y-%m-%d %H:%M")
+        after = max(after, datetime.now())
+        return [
+            {'date': at.strftime('%Y-%m-%d'), 'time': at.strftime('%H:%M'), 'stylist': who}
+            for at, who in self.availability.next_free(after, duration_minutes, stylist, limit)
+        ]
+
     def get_booking_status(self, booking_id: str) -> Optional[Dict]:
-        for booking in self.bookings:
-            if booking['booking_id'] == booking_id:
-                return booking
-        return None
+        return self.bookings.get(booking_id)
+
+    def find_bookings_by_phone(self, phone: str) -> List[Dict]:
+        return self.bookings.find('phone', phone)
+
+    def find_bookings_by_date(self, date: str) -> List[Dict]:
+        # date as YYYY-MM-DD
+        return self.bookings.find('date', date)
 
 # Global instance
 salon_service = MockSalonService()
@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+SLOT_MINUTES = 15
+DEFAULT_DURATION_MINUTES = int(os.getenv("SALON_DEFAULT_DURATION_MIN", "60"))
+STYLISTS = [s.strip() for s in os.getenv("SALON_STYLISTS", "Alex,Sam,Jordan").split(",") if s.strip()]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day TEXT NOT NULL,
+    stylist TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    booking_ref TEXT NOT NULL,
+    UNIQUE (day, stylist, slot)
+);
+"""
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _slots(duration_minutes: int) -> int:
+    return max(1, -(-duration_minutes // SLOT_MINUTES))
+
+
+class UnknownStylist(ValueError):
+    """A stylist name that isn't on the roster; the message lists who is."""
+
+    def __init__(self, name: str, roster: List[str]):
+        self.name = name
+        self.roster = roster
+        names = ", ".join(roster[:-1]) + f" and {roster[-1]}" if len(roster) > 1 else "".join(roster)
+        super().__init__(f"We don't have a stylist called {name}. Our stylists are {names}.")
+
+
+class SlotCalendar:
+    """Per-day, per-stylist bitmaps of 15-minute slots.
+
+    Bit ``i`` of a day's bitmap is the slot starting ``i * 15`` minutes after
+    midnight. Availability questions are answered from the bitmaps in memory.
+    Reservations are also written to a SQLite table with a unique
+    (day, stylist, slot) key, so two rooms (or two worker processes) can
+    never hold the same slot: the loser's insert fails and it gets ``None``.
+    """
+
+    def __init__(self, path: str, business_hours: Dict[str, Tuple[str, str]], stylists: Optional[List[str]] = None):
+        self.stylists = stylists or STYLISTS
+        # Weekday name -> (first slot, end slot), parsed once instead of per request
+        self.hours = {
+            day: (_minutes(open_at) // SLOT_MINUTES, _minutes(close_at) // SLOT_MINUTES)
+            for day, (open_at, close_at) in business_hours.items()
+        }
+        self._booked: Dict[Tuple[str, str], int] = {}
+        self._last_id = 0
+        self._lock = threading.RLock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(SCHEMA)
+        self._sync()
+
+    def _sync(self):
+        # Pick up slots reserved by other processes since we last looked
+        rows = self._db.execute(
+            "SELECT id, day, stylist, slot FROM reservations WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        for row_id, day, stylist, slot in rows:
+            self._booked[(day, stylist)] = self._booked.get((day, stylist), 0) | (1 << slot)
+            self._last_id = row_id
+
+    def opening(self, day: date) -> Optional[Tuple[int, int]]:
+        """(first slot, end slot) the salon is open on ``day``, or None if closed."""
+        return self.hours.get(day.strftime("%A"))
+
+    def _fits(self, day: date, first: int, count: int) -> bool:
+        opening = self.opening(day)
+        return opening is not None and opening[0] <= first and first + count <= opening[1]
+
+    def stylist(self, name: Optional[str]) -> Optional[str]:
+        """The roster spelling of ``name`` (None for anyone); raises UnknownStylist if not on it.
+
+        Names come from the caller via the LLM, so "alex" must land on Alex's
+        bitmap and a made-up name must not get a calendar of its own.
+        """
+        if not name or not name.strip():
+            return None
+        wanted = name.strip().casefold()
+        for stylist in self.stylists:
+            if stylist.casefold() == wanted:
+                return stylist
+        raise UnknownStylist(name.strip(), self.stylists)
+
+    def _free_stylist(self, day: str, first: int, count: int, stylist: Optional[str]) -> Optional[str]:
+        mask = ((1 << count) - 1) << first
+        for candidate in [stylist] if stylist else self.stylists:
+            if not self._booked.get((day, candidate), 0) & mask:
+                return candidate
+        return None
+
+    def is_free(self, start: datetime, duration_minutes: int = DEFAULT_DURATION_MINUTES,
+                stylist: Optional[str] = None) -> Optional[str]:
+        """The stylist free for the whole appointment starting at ``start``, if any."""
+        stylist = self.stylist(stylist)
+        first = (start.hour * 60 + start.minute) // SLOT_MINUTES
+        count = _slots(duration_minutes)
+        if start.minute % SLOT_MINUTES or not self._fits(start.date(), first, count):
+            return None
+        with self._lock:
+            self._sync()
+            return self._free_stylist(start.date().isoformat(), first, count, stylist)
+
+    def next_free(self, after: datetime, duration_minutes: int = DEFAULT_DURATION_MINUTES,
+                  stylist: Optional[str] = None, limit: int = 3, days: int = 14) -> List[Tuple[datetime, str]]:
+        """Up to ``limit`` (start, stylist) pairs at or after ``after``, earliest first."""
+        stylist = self.stylist(stylist)
+        count = _slots(duration_minutes)
+        # Round up to the next slot boundary
+        earliest = -(-(after.hour * 60 + after.minute) // SLOT_MINUTES)
+        found = []
+        with self._lock:
+            self._sync()
+            for offset in range(days):
+                day = after.date() + timedelta(days=offset)
+                opening = self.opening(day)
+                if opening is None:
+                    continue
+                start = max(opening[0], earliest) if offset == 0 else opening[0]
+                key = day.isoformat()
+                for first in range(start, opening[1] - count + 1):
+                    free = self._free_stylist(key, first, count, stylist)
+                    if free:
+                        at = datetime.combine(day, datetime.min.time()) + timedelta(minutes=first * SLOT_MINUTES)
+                        found.append((at, free))
+                        if len(found) >= limit:
+                            return found
+        return found
+
+    def reserve(self, booking_ref: str, start: datetime, duration_minutes: int = DEFAULT_DURATION_MINUTES,
+                stylist: Optional[str] = None) -> Optional[str]:
+        """Atomically take the slots for an appointment; returns the stylist, or None if taken."""
+        stylist = self.stylist(stylist)
+        first = (start.hour * 60 + start.minute) // SLOT_MINUTES
+        count = _slots(duration_minutes)
+        if start.minute % SLOT_MINUTES or not self._fits(start.date(), first, count):
+            return None
+        day = start.date().isoformat()
+        with self._lock:
+            self._sync()
+            candidates = [stylist] if stylist else self.stylists
+            for candidate in candidates:
+                if not self._free_stylist(day, first, count, candidate):
+                    continue
+                try:
+                    self._db.execute("BEGIN IMMEDIATE")
+                    self._db.executemany(
+                        "INSERT INTO reservations (day, stylist, slot, booking_ref) VALUES (?, ?, ?, ?)",
+                        [(day, candidate, slot, booking_ref) for slot in range(first, first + count)],
+                    )
+                    self._db.execute("COMMIT")
+                except sqlite3.IntegrityError:
+                    # Another process got there first; our bitmap was stale
+                    self._db.execute("ROLLBACK")
+                    self._sync()
+                    continue
+                except sqlite3.Error:
+                    # Never leave the shared connection inside a transaction
+                    if self._db.in_transaction:
+                        self._db.execute("ROLLBACK")
+                    raise
+                self._sync()
+                return candidate
+        return None
+
+    def release(self, booking_ref: str):
+        """Free the slots held under ``booking_ref`` (e.g. the booking could not be saved).
+
+        Other processes only learn about new reservations, so until they restart
+        they keep treating these slots as taken; that can only refuse a booking,
+        never double-book one.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT day, stylist, slot FROM reservations WHERE booking_ref = ?", (booking_ref,)
+            ).fetchall()
+            self._db.execute("DELETE FROM reservations WHERE booking_ref = ?", (booking_ref,))
+            for day, stylist, slot in rows:
+                self._booked[(day, stylist)] = self._booked.get((day, stylist), 0) & ~(1 << slot)
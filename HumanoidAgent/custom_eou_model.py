@@ -1,17 +1,26 @@
 from typing import Optional
 from livekit.plugins import turn_detector
 from livekit.agents.llm import ChatContext
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
+from eou_inference import EOUInferenceService
+
+_service: Optional[EOUInferenceService] = None
+
+
+def get_inference_service() -> EOUInferenceService:
+    # One model, one inference thread per process, shared by every room
+    global _service
+    if _service is None:
+        _service = EOUInferenceService()
+    return _service
+
 
 class CustomEOUModel(turn_detector.EOUModel):
-    def __init__(self):
+    def __init__(self, service: Optional[EOUInferenceService] = None):
         super().__init__()
-        # Initialize the model and tokenizer
-        self.model_name = "livekit/opt-125m-endpoint-detector-2"
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(self.model_name)
-        
+        # Inference (and the tokenizer/model) lives in the shared service so
+        # predictions never run on the event loop
+        self.service = service or get_inference_service()
+
     def unlikely_threshold(self) -> float:
         # This threshold determines when we consider the user is likely still speaking
         # Lower values mean we're more likely to consider the user has finished speaking
@@ -25,29 +34,17 @@ class CustomEOUModel(turn_detector.EOUModel):
     async def predict_end_of_turn(self, chat_ctx: ChatContext) -> float:
         # Get the last few messages from the chat context
         messages = chat_ctx.messages[-4:]  # Take last 4 messages
-        
-        # Format the conversation for the model
-        conversation = ""
+
+        # Format each turn separately so earlier turns hit the encoding/KV caches
+        turns = []
         for msg in messages:
             if msg.role == "user":
-                conversation += f"Human: {msg.content}\n"
+                turns.append(f"Human: {msg.content}\n")
             elif msg.role == "assistant":
-                conversation += f"Assistant: {msg.content}\n"
-        
-        # Add the special token for end of utterance detection
-        conversation += "<|im_end|>"
-        
-        # Tokenize and prepare input
-        inputs = self.tokenizer(conversation, return_tensors="pt")
-        
-        # Get model prediction
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            logits = outputs.logits
-            
-            # Get probability for the end token
-            end_token_id = self.tokenizer.encode("<|im_end|>")[0]
-            last_token_logits = logits[0, -1, :]
-            end_token_prob = torch.softmax(last_token_logits, dim=0)[end_token_id].item()
-            
-        return end_token_prob
+                turns.append(f"Assistant: {msg.content}\n")
+
+        return await self.service.predict(turns)
+
+    def metrics(self) -> dict:
+        """p50/p99 prediction latency and mean batch size for this process."""
+        return self.service.metrics()
@@ -0,0 +1,225 @@
+import asyncio
+import copy
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+MODEL_NAME = "livekit/opt-125m-endpoint-detector-2"
+END_OF_UTTERANCE = "<|im_end|>"
+
+# "torch" (fp32), "int8" (dynamic quantization of the Linear layers) or "onnx"
+# (ONNX Runtime via optimum, exported once to EOU_ONNX_DIR)
+BACKEND = os.getenv("EOU_BACKEND", "torch")
+ONNX_DIR = os.getenv("EOU_ONNX_DIR", "./eou-onnx")
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def load_model(model_name: str = MODEL_NAME, backend: str = BACKEND):
+    """Load the EOU model for ``backend``; returns (model, supports_kv_cache)."""
+    if backend == "torch":
+        return AutoModelForCausalLM.from_pretrained(model_name).eval(), True
+    if backend == "int8":
+        model = AutoModelForCausalLM.from_pretrained(model_name).eval()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8), True
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError as e:
+            raise ImportError("EOU_BACKEND=onnx requires optimum[onnxruntime]") from e
+        if os.path.isdir(ONNX_DIR):
+            return ORTModelForCausalLM.from_pretrained(ONNX_DIR, use_cache=False), False
+        model = ORTModelForCausalLM.from_pretrained(model_name, export=True, use_cache=False)
+        model.save_pretrained(ONNX_DIR)
+        return model, False
+    raise ValueError(f"Unsupported EOU backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+
+def _deliver(set_outcome, value):
+    # A failure to hand back one result must never stop the inference thread,
+    # or every later predict() would wait forever
+    try:
+        set_outcome(value)
+    except InvalidStateError:
+        pass
+
+
+@dataclass
+class _Request:
+    prefix_ids: list[int]
+    suffix_ids: list[int]
+    future: Future
+    submitted: float = field(default_factory=time.perf_counter)
+
+
+class EOUInferenceService:
+    """Runs the end-of-utterance model on a dedicated thread.
+
+    Requests arriving within ``batch_window_ms`` of each other (from any room
+    in this process) are padded into a single forward pass. Message encodings
+    are cached so only new text is tokenized, and when a request runs alone the
+    KV cache of its unchanged earlier turns is reused (PyTorch backends only).
+    """
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        backend: str = BACKEND,
+        max_batch: int = 8,
+        batch_window_ms: float = 5.0,
+        token_cache_size: int = 1024,
+        kv_cache_size: int = 8,
+    ):
+        self.backend = backend
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model, supports_kv_cache = load_model(model_name, backend)
+        # Same id the original per-call tokenizer.encode(...)[0] produced
+        self.end_token_id = self.tokenizer.encode(END_OF_UTTERANCE)[0]
+        self.bos_ids = [self.tokenizer.bos_token_id] if self.tokenizer.bos_token_id is not None else []
+        self.pad_id = self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None else 0
+
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000
+        self._token_cache: OrderedDict[str, list[int]] = OrderedDict()
+        self._token_cache_size = token_cache_size
+        self._token_lock = threading.Lock()
+        self._kv_cache: OrderedDict[tuple, object] = OrderedDict()
+        self._kv_cache_size = kv_cache_size if supports_kv_cache else 0
+
+        self._latencies: deque[float] = deque(maxlen=1000)
+        self._batch_sizes: deque[int] = deque(maxlen=1000)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="eou-inference", daemon=True)
+        self._thread.start()
+
+    def encode(self, text: str) -> list[int]:
+        with self._token_lock:
+            ids = self._token_cache.get(text)
+            if ids is not None:
+                self._token_cache.move_to_end(text)
+                return ids
+        ids = self.tokenizer.encode(text, add_special_tokens=False)
+        with self._token_lock:
+            self._token_cache[text] = ids
+            if len(self._token_cache) > self._token_cache_size:
+                self._token_cache.popitem(last=False)
+        return ids
+
+    def submit(self, turns: list[str]) -> Future:
+        """Queue a prediction for the formatted turns; the last one is the live turn."""
+        prefix = list(self.bos_ids)
+        for turn in turns[:-1]:
+            prefix += self.encode(turn)
+        suffix = (self.encode(turns[-1]) if turns else []) + self.encode(END_OF_UTTERANCE)
+
+        future: Future = Future()
+        self._queue.put(_Request(prefix_ids=prefix, suffix_ids=suffix, future=future))
+        return future
+
+    async def predict(self, turns: list[str]) -> float:
+        return await asyncio.wrap_future(self.submit(turns))
+
+    def queue_depth(self) -> int:
+        """Predictions waiting for the inference thread."""
+        return self._queue.qsize()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+        if not latencies:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+            "mean_batch": sum(self._batch_sizes) / len(self._batch_sizes),
+        }
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            # The pipeline cancels predictions it no longer needs (the user kept
+            # talking); those futures can't take a result, so drop them here
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                if len(batch) == 1 and self._kv_cache_size > 0 and len(batch[0].prefix_ids) > len(self.bos_ids):
+                    probs = [self._predict_with_prefix_cache(batch[0])]
+                else:
+                    probs = self._predict_batch(batch)
+            except Exception as e:
+                for request in batch:
+                    _deliver(request.future.set_exception, e)
+                continue
+
+            done = time.perf_counter()
+            self._batch_sizes.append(len(batch))
+            for request, prob in zip(batch, probs):
+                self._latencies.append(done - request.submitted)
+                _deliver(request.future.set_result, prob)
+
+    @torch.no_grad()
+    def _predict_batch(self, batch: list[_Request]) -> list[float]:
+        sequences = [r.prefix_ids + r.suffix_ids for r in batch]
+        lengths = torch.tensor([len(s) for s in sequences])
+        input_ids = torch.full((len(sequences), int(lengths.max())), self.pad_id, dtype=torch.long)
+        attention_mask = torch.zeros_like(input_ids)
+        for i, seq in enumerate(sequences):
+            # Right padding: the causal mask keeps real tokens from seeing the pads
+            input_ids[i, : len(seq)] = torch.tensor(seq)
+            attention_mask[i, : len(seq)] = 1
+
+        logits = self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+        last = logits[torch.arange(len(sequences)), lengths - 1]
+        return torch.softmax(last, dim=-1)[:, self.end_token_id].tolist()
+
+    @torch.no_grad()
+    def _predict_with_prefix_cache(self, request: _Request) -> float:
+        key = tuple(request.prefix_ids)
+        past = self._kv_cache.get(key)
+        if past is None:
+            prefix = torch.tensor([request.prefix_ids])
+            past = self.model(input_ids=prefix, use_cache=True).past_key_values
+            self._kv_cache[key] = past
+            if len(self._kv_cache) > self._kv_cache_size:
+                self._kv_cache.popitem(last=False)
+        else:
+            self._kv_cache.move_to_end(key)
+
+        total = len(request.prefix_ids) + len(request.suffix_ids)
+        logits = self.model(
+            input_ids=torch.tensor([request.suffix_ids]),
+            attention_mask=torch.ones((1, total), dtype=torch.long),
+            # Newer transformers extend cache objects in place; keep ours pristine
+            past_key_values=copy.deepcopy(past),
+            use_cache=True,
+        ).logits
+        return torch.softmax(logits[0, -1], dim=-1)[self.end_token_id].item()
@@ -1,4 +1,6 @@
 import logging
+import resource
+import time
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -16,34 +18,48 @@ from typing import Annotated, Dict
 from livekit import agents, rtc, api
 import re
 import os
-from llama_index.core import (
-    SimpleDirectoryReader,
-    StorageContext,
-    VectorStoreIndex,
-    load_index_from_storage,
-)
-import requests
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from knowledge import get_knowledge_base
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
+from tts.phrase_cache import CachedTTS, prewarm_phrases
 from mock_order_service import order_service
 
 load_dotenv()
 logger = logging.getLogger("voice-assistant")
 
+# "livekit" runs the turn_detector plugin, loaded once per worker in its shared
+# inference process. "custom" runs custom_eou_model in every job process
+# instead: a different model, prompt format and threshold, so only switch
+# after comparing the two on real calls.
+EOU_MODEL = os.getenv("EOU_MODEL", "livekit")
+
 
 def prewarm(proc: JobProcess):
+    start = time.perf_counter()
     proc.userdata["vad"] = silero.VAD.load()
+    if EOU_MODEL == "custom":
+        # Imported here so processes on the plugin never load torch
+        from custom_eou_model import get_inference_service
+
+        # The tokenizer/model and inference thread are loaded once here and
+        # shared read-only by every job this process runs
+        proc.userdata["eou"] = get_inference_service()
+    get_knowledge_base(PERSIST_DIR, DATA_DIR)
+    prewarm_phrases(lambda: openai.TTS(), "alloy", [GREETING])
+    logger.info(
+        f"prewarmed in {time.perf_counter() - start:.2f}s, "
+        f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+    )
 
 
-# Initialize RAG components
+# Initialize RAG components (loaded once per worker process in prewarm)
 PERSIST_DIR = "./pizza-knowledge-storage"
-if not os.path.exists(PERSIST_DIR):
-    # Load pizza knowledge documents and create index
-    documents = SimpleDirectoryReader("pizza_company_data").load_data()
-    index = VectorStoreIndex.from_documents(documents)
-    index.storage_context.persist(persist_dir=PERSIST_DIR)
-else:
-    # Load existing pizza knowledge index
-    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-    index = load_index_from_storage(storage_context)
+DATA_DIR = "pizza_company_data"
+
+GREETING = "Hi This is Emily from No Ordinary Pizza Center! How can I help ?"
 
 class PizzaOrderFunction(agents.llm.FunctionContext):
 
@@ -101,8 +117,7 @@ class PizzaOrderFunction(agents.llm.FunctionContext):
         ],
     ):
         print(f"Answering from knowledgebase: {query}")
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         print("Query result:", res)
         return str(res)
 
@@ -142,11 +157,16 @@ class PizzaOrderFunction(agents.llm.FunctionContext):
         ],
     ):
         query = f"What are the special offers available{' on ' + day_of_week if day_of_week else ''}?"
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         return str(res)
 
 
+def custom_turn_detector(service):
+    from custom_eou_model import CustomEOUModel
+
+    return CustomEOUModel(service)
+
+
 # This example uses our open-weight turn detection model to detect when the user is
 # done speaking. This approach is more accurate than the default VAD model, reducing
 # false positive interruptions by the agent.
@@ -166,22 +186,26 @@ async def entrypoint(ctx: JobContext):
 
     logger.info(f"connecting to room {ctx.room.name}")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    eou = ctx.proc.userdata.get("eou")
+    report_job_load(ctx, queue_depth=eou.queue_depth if eou else None)
 
     # wait for the first participant to connect
     participant = await ctx.wait_for_participant()
     logger.info(f"starting voice assistant for participant {participant.identity}")
 
+    setup_start = time.perf_counter()
     agent = VoicePipelineAgent(
         vad=ctx.proc.userdata["vad"],
         stt=deepgram.STT(),
-        tts=openai.TTS(),
+        tts=CachedTTS(openai.TTS(), voice="alloy"),
         chat_ctx=initial_ctx,
         fnc_ctx=PizzaOrderFunction(),
         llm=openai.LLM(model="gpt-4o-mini"),
-        turn_detector=turn_detector.EOUModel(),
+        turn_detector=custom_turn_detector(eou) if eou else turn_detector.EOUModel(),
     )
 
     agent.start(ctx.room, participant)
+    logger.info(f"agent ready {(time.perf_counter() - setup_start) * 1000:.0f}ms after participant joined")
 
     usage_collector = metrics.UsageCollector()
 
@@ -196,7 +220,7 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
-    await agent.say("Hi This is Emily from No Ordinary Pizza Center! How can I help ?", allow_interruptions=True)
+    await agent.say(GREETING, allow_interruptions=True)
 
 
 if __name__ == "__main__":
@@ -204,5 +228,8 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
         ),
     )
\ No newline at end of file
@@ -1,12 +1,27 @@
+import os
 import re
+import sys
 import json
 from datetime import datetime
-from typing import Dict, Optional
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from storage import RecordStore
 
 class MockOrderService:
     def __init__(self):
-        self.orders = []
-        self.order_counter = 1000
+        # Indexed by id, phone and date; ids and records are shared by every worker
+        self.orders = RecordStore(
+            os.getenv("ORDER_STORE_PATH", "./orders.sqlite"),
+            kind="order",
+            id_field="order_id",
+            id_prefix="ORD",
+            indexes={
+                'phone': lambda r: r.get('phone'),
+                'date': lambda r: (r.get('timestamp') or '')[:10] or None,
+            },
+        )
 
     def validate_uk_postcode(self, postcode: str) -> bool:
         # Basic UK postcode validation
@@ -35,19 +50,13 @@ class MockOrderService:
                 'error': 'Invalid UK phone number format'
             }
 
-        # Generate order details
-        order_id = f"ORD{self.order_counter}"
-        self.order_counter += 1
-        
-        order = {
-            'order_id': order_id,
+        order = self.orders.create({
             'timestamp': datetime.now().isoformat(),
             'status': 'confirmed',
             'estimated_delivery': '30-45 minutes',
             **order_data
-        }
-        
-        self.orders.append(order)
+        })
+        order_id = order['order_id']
         
         return {
             'success': True,
@@ -56,10 +65,14 @@ class MockOrderService:
         }
 
     def get_order_status(self, order_id: str) -> Optional[Dict]:
-        for order in self.orders:
-            if order['order_id'] == order_id:
-                return order
-        return None
+        return self.orders.get(order_id)
+
+    def find_orders_by_phone(self, phone: str) -> List[Dict]:
+        return self.orders.find('phone', phone)
+
+    def find_orders_by_date(self, date: str) -> List[Dict]:
+        # date as YYYY-MM-DD
+        return self.orders.find('date', date)
 
 # Global instance
 order_service = MockOrderService()
@@ -15,13 +15,13 @@ from livekit.plugins import deepgram, openai, silero, turn_detector
 from typing import Annotated, Dict
 import re
 import os
-from llama_index.core import (
-    SimpleDirectoryReader,
-    StorageContext,
-    VectorStoreIndex,
-    load_index_from_storage,
-)
-import requests
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from knowledge import get_knowledge_base
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
+from tts.phrase_cache import CachedTTS, prewarm_phrases
 from mock_order_service import order_service
 
 load_dotenv()
@@ -30,19 +30,15 @@ logger = logging.getLogger("voice-assistant")
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    get_knowledge_base(PERSIST_DIR, DATA_DIR)
+    prewarm_phrases(lambda: openai.TTS(), "alloy", [GREETING])
 
 
-# Initialize RAG components
+# Initialize RAG components (loaded once per worker process in prewarm)
 PERSIST_DIR = "./pizza-knowledge-storage"
-if not os.path.exists(PERSIST_DIR):
-    # Load pizza knowledge documents and create index
-    documents = SimpleDirectoryReader("pizza_company_data").load_data()
-    index = VectorStoreIndex.from_documents(documents)
-    index.storage_context.persist(persist_dir=PERSIST_DIR)
-else:
-    # Load existing pizza knowledge index
-    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-    index = load_index_from_storage(storage_context)
+DATA_DIR = "pizza_company_data"
+
+GREETING = "Hi This is Emily from No Ordinary Pizza Center! How can I help ?"
 
 class PizzaOrderFunction(llm.FunctionContext):
     def __init__(self):
@@ -102,8 +98,7 @@ class PizzaOrderFunction(llm.FunctionContext):
         ],
     ):
         print(f"Answering from knowledgebase: {query}")
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         print("Query result:", res)
         return str(res)
 
@@ -143,8 +138,7 @@ class PizzaOrderFunction(llm.FunctionContext):
         ],
     ):
         query = f"What are the special offers available{' on ' + day_of_week if day_of_week else ''}?"
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         return str(res)
 
 
@@ -172,6 +166,7 @@ async def entrypoint(ctx: JobContext):
 
     logger.info(f"connecting to room {ctx.room.name}")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    report_job_load(ctx)
 
     # wait for the first participant to connect
     participant = await ctx.wait_for_participant()
@@ -180,7 +175,7 @@ async def entrypoint(ctx: JobContext):
     agent = VoicePipelineAgent(
         vad=silero.VAD.load(),
         stt=deepgram.STT(),
-        tts=openai.TTS(),
+        tts=CachedTTS(openai.TTS(), voice="alloy"),
         chat_ctx=initial_ctx,
         llm=openai.LLM(model="gpt-4o-mini"),
     )
@@ -200,7 +195,7 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
-    await agent.say("Hi This is Emily from No Ordinary Pizza Center! How can I help ?", allow_interruptions=True)
+    await agent.say(GREETING, allow_interruptions=True)
 
 
 if __name__ == "__main__":
@@ -208,5 +203,8 @@ if __name__ == "__main__":
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
         ),
     )
\ No newline at end of file
@@ -2,10 +2,9 @@ import asyncio
 from typing import Annotated
 import re
 import os
-import requests
 from dotenv import load_dotenv
 from livekit import agents, rtc
-from livekit.agents import JobContext, WorkerOptions, cli, tokenize, tts
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli, tts
 from livekit.agents.llm import (
     ChatContext,
     ChatMessage,
@@ -13,9 +12,29 @@ from livekit.agents.llm import (
 )
 from livekit.agents.voice_assistant import VoiceAssistant
 from livekit.plugins import deepgram, openai, silero
+from assistant.http_client import RequestError, get_http_client
+from assistant.context_window import ContextWindow
+from assistant.follow_up import FollowUpScheduler, start_webhook_listener
+from assistant.frame_sampler import FrameSampler
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
+from tts.chunker import LatencyAwareChunker
+from tts.phrase_cache import CachedTTS, prewarm_phrases
 
 load_dotenv(dotenv_path=".env.local")
 
+GREETING = "Hello! I'm Daela, your dental assistant at Knolabs Dental Agency. Can I know if you are the patient or you're representing the patient?"
+
+
+def prewarm(proc: JobProcess):
+    # Fixed lines are synthesized once per machine and replayed from the phrase cache
+    prewarm_phrases(lambda: openai.TTS(voice="alloy"), "alloy", [GREETING])
+
+
+# What the caller hears about their booking, from a tool call or a follow-up
+BOOKED_STATUS = "You have successfully booked a dental appointment."
+NOT_BOOKED_STATUS = "You haven't booked a dental appointment yet. Would you like assistance in scheduling one?"
+
+
 class DentalAssistantFunction(agents.llm.FunctionContext):
     @agents.llm.ai_callable(
         description=(
@@ -60,10 +79,9 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
             webhook_url = os.getenv('WEBHOOK_URL')
             headers = {'Content-Type': 'application/json'}
             data = {'email': email, 'name': name}
-            response = requests.post(webhook_url, json=data, headers=headers)
-            response.raise_for_status()
+            await get_http_client().post(webhook_url, endpoint="WEBHOOK_URL", json=data, headers=headers)
             return f"Dental appointment booking link sent to {email}. Please check your email."
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error booking appointment: {e}")
             return "There was an error booking your dental appointment. Please try again later."
 
@@ -80,15 +98,12 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
                 'Authorization': f'Bearer {api_token}',
                 'Content-Type': 'application/json'
             }
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()
-
-            data = response.json()
+            data = await get_http_client().get(api_url, endpoint="CRM_CONTACT_LOOKUP_ENDPOINT", headers=headers) or {}
             for contact in data.get('contacts', []):
                 if 'livekit_appointment_booked' in contact.get('tags', []):
-                    return "You have successfully booked a dental appointment."
-            return "You haven't booked a dental appointment yet. Would you like assistance in scheduling one?"
-        except requests.RequestException as e:
+                    return BOOKED_STATUS
+            return NOT_BOOKED_STATUS
+        except RequestError as e:
             print(f"Error during API request: {e}")
             return "Error checking the dental appointment status."
 
@@ -110,22 +125,9 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
         else:
             return "Your dental issue doesn't appear to be immediately urgent, but it's still important to schedule an appointment soon for a proper evaluation."
 
-async def get_video_track(room: rtc.Room):
-    video_track = asyncio.Future[rtc.RemoteVideoTrack]()
-
-    for _, participant in room.remote_participants.items():
-        for _, track_publication in participant.track_publications.items():
-            if track_publication.track is not None and isinstance(
-                track_publication.track, rtc.RemoteVideoTrack
-            ):
-                video_track.set_result(track_publication.track)
-                print(f"Using video track {track_publication.track.sid}")
-                break
-
-    return await video_track
-
 async def entrypoint(ctx: JobContext):
     await ctx.connect()
+    report_job_load(ctx)
     print(f"Connected to room: {ctx.room.name}")
 
     chat_context = ChatContext(
@@ -149,11 +151,21 @@ async def entrypoint(ctx: JobContext):
 
     gpt = openai.LLM(model="gpt-4o-mini")
     openai_tts = tts.StreamAdapter(
-        tts=openai.TTS(voice="alloy"),
-        sentence_tokenizer=tokenize.basic.SentenceTokenizer(),
+        tts=CachedTTS(openai.TTS(voice="alloy"), voice="alloy"),
+        sentence_tokenizer=LatencyAwareChunker(),
     )
 
-    latest_image: rtc.VideoFrame | None = None
+    # Camera frames are only decoded when a vision tool asks for one
+    frames = FrameSampler(ctx.room)
+    frames.start()
+    ctx.add_shutdown_callback(frames.aclose)
+
+    # Keeps long calls within a token budget by summarizing older turns
+    context_window = ContextWindow(chat_context, gpt)
+
+    # Booking follow-ups wait for the CRM webhook (or poll), cancelled with the room
+    follow_ups = FollowUpScheduler()
+    ctx.add_shutdown_callback(follow_ups.aclose)
 
     assistant = VoiceAssistant(
         vad=silero.VAD.load(),
@@ -162,26 +174,31 @@ async def entrypoint(ctx: JobContext):
         tts=openai_tts,
         fnc_ctx=DentalAssistantFunction(),
         chat_ctx=chat_context,
+        before_llm_cb=context_window.before_llm_cb,
     )
 
     chat = rtc.ChatManager(ctx.room)
 
     async def _answer(text: str, use_image: bool = False):
         content: list[str | ChatImage] = [text]
-        if use_image and latest_image:
+        image = await frames.image() if use_image else None
+        if image:
             print(f"Calling with latest image")
-            content.append(ChatImage(image=latest_image))
+            content.append(image)
 
         chat_context.messages.append(ChatMessage(role="user", content=content))
+
+        context_window.compact()
         stream = gpt.chat(chat_ctx=chat_context)
         await assistant.say(stream, allow_interruptions=True)
 
-    async def follow_up_appointment(email: str):
-        fnc = assistant.fnc_ctx
-        await asyncio.sleep(20)
-        print(f"Finished waiting, checking dental appointment status for {email}")
-        status = await fnc.check_appointment_status(email)
-        await asyncio.create_task(_answer(status))
+    def follow_up_appointment(email: str):
+        """Tell the user about their booking once the CRM shows it (or the wait times out)."""
+        async def _report(booked: bool):
+            # The follow-up already knows the outcome; a fresh CRM lookup can lag the webhook
+            await _answer(BOOKED_STATUS if booked else NOT_BOOKED_STATUS)
+
+        follow_ups.schedule(email, _report)
 
     @chat.on("message_received")
     def on_message_received(msg: rtc.ChatMessage):
@@ -201,7 +218,7 @@ async def entrypoint(ctx: JobContext):
         elif function_name == "book_appointment":
             email = called_functions[0].call_info.arguments.get("email")
             if email:
-                asyncio.create_task(follow_up_appointment(email))
+                follow_up_appointment(email)
         elif function_name == "analyze_dental_image":
             user_instruction = called_functions[0].call_info.arguments.get("user_msg")
             asyncio.create_task(_answer(user_instruction, use_image=True))
@@ -210,15 +227,20 @@ async def entrypoint(ctx: JobContext):
     assistant.start(ctx.room)
 
     await asyncio.sleep(1)
-    await assistant.say("Hello! I'm Daela, your dental assistant at Knolabs Dental Agency. Can I know if you are the patient or you're representing the patient?", allow_interruptions=True)
+    await assistant.say(GREETING, allow_interruptions=True)
 
     while ctx.room.connection_state == rtc.ConnectionState.CONN_CONNECTED:
-        video_track = await get_video_track(ctx.room)
-
-        async for event in rtc.VideoStream(video_track):
-            latest_image = event.frame
-            asyncio.sleep(1)
+        await asyncio.sleep(1)  # Keep the connection alive for incoming events
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    start_webhook_listener()
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
+        )
+    )
\ No newline at end of file
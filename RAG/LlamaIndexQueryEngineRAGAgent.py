@@ -4,7 +4,7 @@ import re
 import os
 from dotenv import load_dotenv
 from livekit import agents, rtc, api
-from livekit.agents import JobContext, WorkerOptions, cli, tokenize, tts
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli, tokenize, tts
 from livekit.agents.llm import (
     ChatContext,
     ChatMessage,
@@ -13,27 +13,24 @@ from livekit.agents.llm import (
 )
 from livekit.agents.pipeline import VoicePipelineAgent
 from livekit.plugins import deepgram, openai, silero
-from llama_index.core import (
-    SimpleDirectoryReader,
-    StorageContext,
-    VectorStoreIndex,
-    load_index_from_storage,
-)
-import requests
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from assistant.http_client import RequestError, get_http_client
+from assistant.context_window import ContextWindow
+from assistant.frame_sampler import find_video_track
+from knowledge import get_knowledge_base
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
 
 load_dotenv(dotenv_path=".env.local")
 
-# Initialize RAG components
+# Initialize RAG components (loaded once per worker process in prewarm)
 PERSIST_DIR = "./dental-knowledge-storage"
-if not os.path.exists(PERSIST_DIR):
-    # Load dental knowledge documents and create index
-    documents = SimpleDirectoryReader("dental_data").load_data()
-    index = VectorStoreIndex.from_documents(documents)
-    index.storage_context.persist(persist_dir=PERSIST_DIR)
-else:
-    # Load existing dental knowledge index
-    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-    index = load_index_from_storage(storage_context)
+DATA_DIR = "dental_data"
+
+def prewarm(proc: JobProcess):
+    get_knowledge_base(PERSIST_DIR, DATA_DIR)
 
 class DentalAssistantFunction(FunctionContext):
     @agents.llm.ai_callable(
@@ -50,8 +47,7 @@ class DentalAssistantFunction(FunctionContext):
     ):
         
         print(f"Answering from knowledgebase {query}")
-        query_engine = index.as_query_engine(use_async=True)
-        res = await query_engine.aquery(query)
+        res = await get_knowledge_base(PERSIST_DIR, DATA_DIR).query(query)
         print("Query result:", res)
         return str(res)
 
@@ -85,10 +81,9 @@ class DentalAssistantFunction(FunctionContext):
             webhook_url = os.getenv('WEBHOOK_URL')
             headers = {'Content-Type': 'application/json'}
             data = {'email': email, 'name': name}
-            response = requests.post(webhook_url, json=data, headers=headers)
-            response.raise_for_status()
+            await get_http_client().post(webhook_url, endpoint="WEBHOOK_URL", json=data, headers=headers)
             return f"Dental appointment booking link sent to {email}. Please check your email."
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error booking appointment: {e}")
             return "There was an error booking your dental appointment. Please try again later."
 
@@ -105,20 +100,9 @@ class DentalAssistantFunction(FunctionContext):
         else:
             return "Your dental issue doesn't appear to be immediately urgent, but it's still important to schedule an appointment soon for a proper evaluation."
 
-async def get_video_track(room: rtc.Room):
-    video_track = asyncio.Future[rtc.RemoteVideoTrack]()
-    for _, participant in room.remote_participants.items():
-        for _, track_publication in participant.track_publications.items():
-            if track_publication.track is not None and isinstance(
-                track_publication.track, rtc.RemoteVideoTrack
-            ):
-                video_track.set_result(track_publication.track)
-                print(f"Using video track {track_publication.track.sid}")
-                break
-    return await video_track
-
 async def entrypoint(ctx: JobContext):
     await ctx.connect()
+    report_job_load(ctx)
     print(f"Connected to room: {ctx.room.name}")
 
     initial_ctx = ChatContext(
@@ -142,16 +126,20 @@ async def entrypoint(ctx: JobContext):
         ]
     )
 
-    latest_image: rtc.VideoFrame | None = None
     human_agent_present = False
 
+    gpt = openai.LLM(model="gpt-4o-mini")
+    # Keeps long calls within a token budget by summarizing older turns
+    context_window = ContextWindow(initial_ctx, gpt)
+
     assistant = VoicePipelineAgent(
         vad=silero.VAD.load(),
         stt=deepgram.STT(),
-        llm=openai.LLM(model="gpt-4o-mini"),
+        llm=gpt,
         tts=openai.TTS(voice="alloy"),
         chat_ctx=initial_ctx,
         fnc_ctx=DentalAssistantFunction(),
+        before_llm_cb=context_window.before_llm_cb,
     )
 
     chat = rtc.ChatManager(ctx.room)
@@ -178,7 +166,7 @@ async def entrypoint(ctx: JobContext):
                 human_agent_phone = os.getenv('HUMAN_AGENT_PHONE')
                 await create_sip_participant(human_agent_phone, ctx.room.name)
                 human_agent_present = True
-        elif function_name == "analyze_dental_image" and latest_image:
+        elif function_name == "analyze_dental_image" and find_video_track(ctx.room):
             user_instruction = function.call_info.arguments.get("user_msg")
             await assistant.say(user_instruction, allow_interruptions=True)
 
@@ -190,10 +178,7 @@ async def entrypoint(ctx: JobContext):
     )
 
     while ctx.room.connection_state == rtc.ConnectionState.CONN_CONNECTED:
-        video_track = await get_video_track(ctx.room)
-        async for event in rtc.VideoStream(video_track):
-            latest_image = event.frame
-            await asyncio.sleep(1)
+        await asyncio.sleep(1)  # Keep the connection alive for incoming events
 
 async def create_sip_participant(phone_number, room_name):
     print("Trying to call an agent")
@@ -216,4 +201,12 @@ async def create_sip_participant(phone_number, room_name):
     await livekit_api.aclose()
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
+        )
+    )
\ No newline at end of file
@@ -2,9 +2,10 @@ import asyncio
 from typing import Annotated
 import re
 import os
+import time
 from dotenv import load_dotenv
 from livekit import agents, rtc, api
-from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli, tokenize, llm
+from livekit.agents import AutoSubscribe, JobContext, JobProcess, WorkerOptions, cli, tokenize, llm
 from livekit.agents.pipeline import VoicePipelineAgent
 from livekit.agents.llm import (
     ChatContext,
@@ -12,28 +13,31 @@ from livekit.agents.llm import (
     ChatImage,
 )
 from livekit.plugins import deepgram, openai, silero
-from llama_index.core import (
-    SimpleDirectoryReader,
-    StorageContext,
-    VectorStoreIndex,
-    load_index_from_storage,
-)
-from llama_index.core.schema import MetadataMode
-import requests
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from assistant.http_client import RequestError, get_http_client
+from assistant.context_window import ContextWindow
+from assistant.follow_up import FollowUpScheduler, start_webhook_listener
+from assistant.transcript_tap import TranscriptTap
+from knowledge import ContextInjector, SpeculativeRetriever, get_knowledge_base
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
 
 load_dotenv(dotenv_path=".env.local")
 
-# Initialize RAG components
+# Initialize RAG components (loaded once per worker process in prewarm)
 PERSIST_DIR = "./dental-knowledge-storage"
-if not os.path.exists(PERSIST_DIR):
-    # Load dental knowledge documents and create index
-    documents = SimpleDirectoryReader("dental_data").load_data()
-    index = VectorStoreIndex.from_documents(documents)
-    index.storage_context.persist(persist_dir=PERSIST_DIR)
-else:
-    # Load existing dental knowledge index
-    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-    index = load_index_from_storage(storage_context)
+DATA_DIR = "dental_data"
+
+def prewarm(proc: JobProcess):
+    get_knowledge_base(PERSIST_DIR, DATA_DIR)
+
+
+# What the caller hears about their booking, from a tool call or a follow-up
+BOOKED_STATUS = "You have successfully booked a dental appointment."
+NOT_BOOKED_STATUS = "You haven't booked a dental appointment yet. Would you like assistance in scheduling one?"
+
 
 class DentalAssistantFunction(agents.llm.FunctionContext):
     @agents.llm.ai_callable(
@@ -79,10 +83,9 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
             webhook_url = os.getenv('WEBHOOK_URL')
             headers = {'Content-Type': 'application/json'}
             data = {'email': email, 'name': name}
-            response = requests.post(webhook_url, json=data, headers=headers)
-            response.raise_for_status()
+            await get_http_client().post(webhook_url, endpoint="WEBHOOK_URL", json=data, headers=headers)
             return f"Dental appointment booking link sent to {email}. Please check your email."
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error booking appointment: {e}")
             return "There was an error booking your dental appointment. Please try again later."
 
@@ -99,15 +102,12 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
                 'Authorization': f'Bearer {api_token}',
                 'Content-Type': 'application/json'
             }
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()
-
-            data = response.json()
+            data = await get_http_client().get(api_url, endpoint="CRM_CONTACT_LOOKUP_ENDPOINT", headers=headers) or {}
             for contact in data.get('contacts', []):
                 if 'livekit_appointment_booked' in contact.get('tags', []):
-                    return "You have successfully booked a dental appointment."
-            return "You haven't booked a dental appointment yet. Would you like assistance in scheduling one?"
-        except requests.RequestException as e:
+                    return BOOKED_STATUS
+            return NOT_BOOKED_STATUS
+        except RequestError as e:
             print(f"Error during API request: {e}")
             return "Error checking the dental appointment status."
 
@@ -129,20 +129,6 @@ class DentalAssistantFunction(agents.llm.FunctionContext):
         else:
             return "Your dental issue doesn't appear to be immediately urgent, but it's still important to schedule an appointment soon for a proper evaluation."
 
-async def get_video_track(room: rtc.Room):
-    video_track = asyncio.Future[rtc.RemoteVideoTrack]()
-
-    for _, participant in room.remote_participants.items():
-        for _, track_publication in participant.track_publications.items():
-            if track_publication.track is not None and isinstance(
-                track_publication.track, rtc.RemoteVideoTrack
-            ):
-                video_track.set_result(track_publication.track)
-                print(f"Using video track {track_publication.track.sid}")
-                break
-
-    return await video_track
-
 async def entrypoint(ctx: JobContext):
     system_msg = llm.ChatMessage(
         role="system",
@@ -162,30 +148,44 @@ async def entrypoint(ctx: JobContext):
     
     initial_ctx = llm.ChatContext()
     initial_ctx.messages.append(system_msg)
+
+    gpt = openai.LLM()
+    # Keeps long calls within a token budget by summarizing older turns
+    context_window = ContextWindow(initial_ctx, gpt)
+
+    # Booking follow-ups wait for the CRM webhook (or poll), cancelled with the room
+    follow_ups = FollowUpScheduler()
+    ctx.add_shutdown_callback(follow_ups.aclose)
     
+    kb = get_knowledge_base(PERSIST_DIR, DATA_DIR)
+    # Retrieval starts on interim transcripts, while the user is still talking
+    speculative = SpeculativeRetriever(kb)
+    # Ranked, deduplicated, token-budgeted knowledge context for this call
+    injector = ContextInjector(kb, system_msg.content, speculative=speculative)
+    ctx_msg = system_msg.copy()
+
     async def _will_synthesize_assistant_reply(
         assistant: VoicePipelineAgent, chat_ctx: llm.ChatContext
     ):
-        ctx_msg = system_msg.copy()
+        nonlocal ctx_msg
+        context_window.compact()
         user_msg = chat_ctx.messages[-1]
-        retriever = index.as_retriever()
-        nodes = await retriever.aretrieve(user_msg.content)
-        ctx_msg.content += "\n\nContext that might help answer the user's question:"
-        for node in nodes:
-            node_content = node.get_content(metadata_mode=MetadataMode.LLM)
-            ctx_msg.content += f"\n\n{node_content}"
+        prompt = await injector.prompt_for(user_msg.content)
+        if prompt is not ctx_msg.content:
+            ctx_msg = system_msg.copy()
+            ctx_msg.content = prompt
         chat_ctx.messages[0] = ctx_msg  # the first message is the system message
         return assistant.llm.chat(chat_ctx=chat_ctx)
 
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    report_job_load(ctx)
     
-    latest_image: rtc.VideoFrame | None = None
     human_agent_present = False
 
     assistant = VoicePipelineAgent(
         vad=silero.VAD.load(),
-        stt=deepgram.STT(),
-        llm=openai.LLM(),
+        stt=TranscriptTap(deepgram.STT(), speculative.on_interim),
+        llm=gpt,
         tts=openai.TTS(),
         fnc_ctx=DentalAssistantFunction(),
         chat_ctx=initial_ctx,
@@ -194,12 +194,30 @@ async def entrypoint(ctx: JobContext):
 
     chat = rtc.ChatManager(ctx.room)
 
-    async def follow_up_appointment(email: str):
-        fnc = assistant.fnc_ctx
-        await asyncio.sleep(20)
-        print(f"Finished waiting, checking dental appointment status for {email}")
-        status = await fnc.check_appointment_status(email)
-        await assistant.say(status, allow_interruptions=True)
+    speech_ended = 0.0
+
+    @assistant.on("user_stopped_speaking")
+    def on_user_stopped_speaking():
+        nonlocal speech_ended
+        speech_ended = time.perf_counter()
+
+    @assistant.on("agent_started_speaking")
+    def on_agent_started_speaking():
+        nonlocal speech_ended
+        if speech_ended:
+            print(
+                f"End of speech to first audio: {(time.perf_counter() - speech_ended) * 1000:.0f}ms "
+                f"(speculative retrieval: {speculative.stats()})"
+            )
+            speech_ended = 0.0
+
+    def follow_up_appointment(email: str):
+        """Tell the user about their booking once the CRM shows it (or the wait times out)."""
+        async def _report(booked: bool):
+            # The follow-up already knows the outcome; a fresh CRM lookup can lag the webhook
+            await assistant.say(BOOKED_STATUS if booked else NOT_BOOKED_STATUS, allow_interruptions=True)
+
+        follow_ups.schedule(email, _report)
 
     async def create_sip_participant(phone_number, room_name):
         print("trying to call an agent")
@@ -274,7 +292,7 @@ async def entrypoint(ctx: JobContext):
         elif function_name == "book_appointment":
             email = function.call_info.arguments.get("email")
             if email:
-                asyncio.create_task(follow_up_appointment(email))
+                follow_up_appointment(email)
 
     assistant.start(ctx.room)
     await assistant.say(
@@ -283,11 +301,16 @@ async def entrypoint(ctx: JobContext):
     )
 
     while ctx.room.connection_state == rtc.ConnectionState.CONN_CONNECTED:
-        video_track = await get_video_track(ctx.room)
-
-        async for event in rtc.VideoStream(video_track):
-            latest_image = event.frame
-            await asyncio.sleep(1)
+        await asyncio.sleep(1)  # Keep the connection alive for incoming events
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    start_webhook_listener()
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
+        )
+    )
\ No newline at end of file
@@ -2,10 +2,9 @@ import asyncio
 from typing import Annotated
 import re
 import os
-import requests
 from dotenv import load_dotenv
 from livekit import agents, rtc
-from livekit.agents import JobContext, WorkerOptions, cli, tokenize, tts
+from livekit.agents import JobContext, WorkerOptions, cli, tts
 from livekit.agents.llm import (
     ChatContext,
     ChatImage,
@@ -13,10 +12,23 @@ from livekit.agents.llm import (
 )
 from livekit.agents.voice_assistant import VoiceAssistant
 from livekit.plugins import deepgram, openai, silero
+from assistant.http_client import RequestError, get_http_client
+from assistant.context_window import ContextWindow
+from assistant.follow_up import FollowUpScheduler, start_webhook_listener
+from assistant.frame_sampler import FrameSampler
+from assistant.room_readiness import wait_until_ready
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
+from tts.chunker import LatencyAwareChunker
 
 # Load environment variables from .env.local
 load_dotenv(dotenv_path=".env.local")
 
+
+# What the caller hears about their booking, from a tool call or a follow-up
+BOOKED_STATUS = "The user has successfully booked the appointment."
+NOT_BOOKED_STATUS = "The user has not yet booked an appointment. Please offer him help"
+
+
 class AssistantFunction(agents.llm.FunctionContext):
     """This class defines functions that the assistant will call."""
 
@@ -62,16 +74,15 @@ class AssistantFunction(agents.llm.FunctionContext):
 
         # Webhook call to book the appointment
         try:
-            webhook_url = f'{os.getenv('WEBHOOK_URL')}'
+            webhook_url = os.getenv('WEBHOOK_URL')
             headers = {'Content-Type': 'application/json'}
             data = {'email': email, 'name': name}
-            response = requests.post(webhook_url, json=data, headers=headers)
-            response.raise_for_status()
+            await get_http_client().post(webhook_url, endpoint="WEBHOOK_URL", json=data, headers=headers)
 
             # Return success message
             return f"Appointment booking link sent to {email}. Please check your email."
 
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error booking appointment: {e}")
             return "There was an error booking your appointment. Please try again later."
 
@@ -84,64 +95,35 @@ class AssistantFunction(agents.llm.FunctionContext):
         print("calling check function")
 
         try:
-            api_url = f'{os.getenv('CRM_CONTACT_LOOKUP_ENDPOINT')}?email={email}'
+            api_url = f"{os.getenv('CRM_CONTACT_LOOKUP_ENDPOINT')}?email={email}"
             headers = {
                 'Authorization': f'Bearer {api_token}',
                 'Content-Type': 'application/json'
             }
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()
-
-            data = response.json()
+            data = await get_http_client().get(api_url, endpoint="CRM_CONTACT_LOOKUP_ENDPOINT", headers=headers) or {}
             # Check if the contact has the 'livekit_appointment_booked' tag
             for contact in data.get('contacts', []):
                 if 'livekit_appointment_booked' in contact.get('tags', []):
-                    return "The user has successfully booked the appointment."
-            return "The user has not yet booked an appointment. Please offer him help"
+                    return BOOKED_STATUS
+            return NOT_BOOKED_STATUS
 
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error during API request: {e}")
             return "Error checking the appointment status."
 
 
-async def check_room_status(room_name: str) -> bool:
-    """Check if the room exists and has participants."""
-    try:
-        response = requests.get(f"{os.getenv('LIVEKIT_SERVER_URL')}/rooms/{room_name}", 
-                                headers={"Authorization": f"Bearer {os.getenv('LIVEKIT_API_KEY')}:{os.getenv('LIVEKIT_API_SECRET')}"})
-        if response.status_code == 200:
-            room_info = response.json()
-            participants = room_info.get("num_participants", 0)
-            return participants > 0
-        return False
-    except requests.RequestException as e:
-        print(f"Error checking room status: {e}")
-        return False  # Assume room is inactive on error
-
-async def wait_for_room(room_name: str) -> bool:
-    """Poll for the room to be created and become active."""
-    max_retries = 12  # Max number of retries (every 5 seconds) for up to 1 minute
-    retries = 0
-    while retries < max_retries:
-        room_exists = await check_room_status(room_name)
-        if room_exists:
-            print(f"Room {room_name} is active. Joining now...")
-            return True
-        print(f"Waiting for the room {room_name} to become active... ({retries+1}/{max_retries})")
-        retries += 1
-        await asyncio.sleep(5)  # Poll every 5 seconds
-    return False
-
 async def entrypoint(ctx: JobContext):
     room_name = ctx.room.name
 
-    room_active = await wait_for_room(room_name)  # Wait for client to start the room
-    if not room_active:
+    # Join straight away and wait for the caller's participant_connected event
+    participant = await wait_until_ready(ctx)
+    if participant is None:
         print(f"Room {room_name} did not become active in time.")
+        ctx.shutdown(reason="no participant joined")
         return
 
-    await ctx.connect()  # Agent joins the room after detecting activity
     print(f"Connected to room: {room_name}")
+    report_job_load(ctx)
 
     chat_context = ChatContext(
         messages=[
@@ -158,9 +140,16 @@ async def entrypoint(ctx: JobContext):
     gpt = openai.LLM(model="gpt-4o-mini")
     openai_tts = tts.StreamAdapter(
         tts=openai.TTS(voice="alloy"),
-        sentence_tokenizer=tokenize.basic.SentenceTokenizer(),
+        sentence_tokenizer=LatencyAwareChunker(),
     )
 
+    # Keeps long calls within a token budget by summarizing older turns
+    context_window = ContextWindow(chat_context, gpt)
+
+    # Booking follow-ups wait for the CRM webhook (or poll), cancelled with the room
+    follow_ups = FollowUpScheduler()
+    ctx.add_shutdown_callback(follow_ups.aclose)
+
     assistant = VoiceAssistant(
         vad=silero.VAD.load(),
         stt=deepgram.STT(),
@@ -168,22 +157,34 @@ async def entrypoint(ctx: JobContext):
         tts=openai_tts,
         fnc_ctx=AssistantFunction(),
         chat_ctx=chat_context,
+        before_llm_cb=context_window.before_llm_cb,
     )
 
     chat = rtc.ChatManager(ctx.room)
 
-    async def _answer(text: str):
-        chat_context.messages.append(ChatMessage(role="user", content=text))
+    # Camera frames are only decoded when a vision tool asks for one
+    frames = FrameSampler(ctx.room)
+    frames.start()
+    ctx.add_shutdown_callback(frames.aclose)
+
+    async def _answer(text: str, use_image: bool = False):
+        content: list[str | ChatImage] = [text]
+        image = await frames.image() if use_image else None
+        if image:
+            content.append(image)
+
+        chat_context.messages.append(ChatMessage(role="user", content=content))
+        context_window.compact()
         stream = gpt.chat(chat_ctx=chat_context)
         await assistant.say(stream, allow_interruptions=True)
 
-    async def follow_up_appointment(email: str):
-        """Automatically check the appointment status and inform the user."""
-        fnc = assistant.fnc_ctx
-        await asyncio.sleep(20)  # Delay for checking (in seconds)
-        print(f"Finished waiting, checking status for {email}")
-        status = await fnc.check_appointment_status(email)
-        await asyncio.create_task(_answer(status))
+    def follow_up_appointment(email: str):
+        """Tell the user about their booking once the CRM shows it (or the wait times out)."""
+        async def _report(booked: bool):
+            # The follow-up already knows the outcome; a fresh CRM lookup can lag the webhook
+            await _answer(BOOKED_STATUS if booked else NOT_BOOKED_STATUS)
+
+        follow_ups.schedule(email, _report)
 
     @chat.on("message_received")
     def on_message_received(msg: rtc.ChatMessage):
@@ -200,11 +201,11 @@ async def entrypoint(ctx: JobContext):
             asyncio.create_task(_answer(user_msg, use_image=True))
         email = called_functions[0].call_info.arguments.get("email")
         if email:
-            asyncio.create_task(follow_up_appointment(email))
+            follow_up_appointment(email)
 
-    assistant.start(ctx.room)
+    assistant.start(ctx.room, participant)
 
-    await asyncio.sleep(1)
+    # The caller is already in the room, so greet without extra dead air
     await assistant.say("Hi there! How can I help?", allow_interruptions=True)
 
     while ctx.room.connection_state == rtc.ConnectionState.CONN_CONNECTED:
@@ -212,4 +213,12 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    start_webhook_listener()
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
+        )
+    )
\ No newline at end of file
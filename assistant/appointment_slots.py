@@ -0,0 +1,135 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from .http_client import get_http_client
+
+# Seconds a fetched window is served before the calendar is asked again
+SLOT_CACHE_TTL = float(os.getenv("SLOT_CACHE_TTL", "60"))
+URGENCIES = ("emergency", "non_emergency")
+
+
+def slot_window(urgency: str, now: Optional[datetime] = None) -> tuple[datetime, datetime]:
+    current_time = now or datetime.now()
+    if urgency == "emergency":
+        return current_time, current_time + timedelta(hours=24)
+    start_date = current_time + timedelta(days=3)
+    return start_date, start_date + timedelta(days=7)
+
+
+def rank_slots(slots: dict, limit: int) -> list[str]:
+    """Flatten the calendar's {date: {"slots": [...]}} reply into the earliest future slots."""
+    now = datetime.now(timezone.utc)
+    ranked = []
+    for day in slots.values():
+        # Replies carry scalars such as "traceId" next to the date keys
+        if not isinstance(day, dict):
+            continue
+        for slot in day.get("slots", []):
+            try:
+                at = datetime.fromisoformat(slot)
+            except (TypeError, ValueError):
+                continue
+            if at.tzinfo is None:
+                at = at.replace(tzinfo=timezone.utc)
+            if at > now:
+                ranked.append((at, slot))
+    ranked.sort()
+    return [slot for _, slot in ranked[:limit]]
+
+
+class AppointmentSlotCache:
+    """Emergency and non-emergency slot windows, fetched ahead of the question.
+
+    ``start()`` prefetches both windows and refreshes them every ``ttl``
+    seconds for the rest of the session, so ``get()`` normally answers from
+    memory. A stale or missing window is fetched on demand, sharing any
+    request already in flight. Call ``invalidate()`` after booking.
+    """
+
+    def __init__(self, ttl: float = SLOT_CACHE_TTL):
+        self.ttl = ttl
+        self._slots: dict[str, tuple[float, dict]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        # Bumped by invalidate() so a fetch started before a booking is not cached
+        self._generation = {urgency: 0 for urgency in URGENCIES}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def _fetch(self, urgency: str) -> dict:
+        generation = self._generation.get(urgency, 0)
+        start_date, end_date = slot_window(urgency)
+        params = {
+            'calendarId': os.getenv('CALENDAR_ID'),
+            'startDate': int(start_date.timestamp() * 1000),
+            'endDate': int(end_date.timestamp() * 1000),
+            'timezone': 'Europe/London'
+        }
+        headers = {
+            'Authorization': f"Bearer {os.getenv('API_TOKEN')}",
+            'Content-Type': 'application/json'
+        }
+        slots = await get_http_client().get(
+            os.getenv('APPOINTMENT_SLOTS_ENDPOINT'), endpoint="APPOINTMENT_SLOTS_ENDPOINT", params=params, headers=headers
+        )
+        # An empty body, or a JSON list/string from a misbehaving calendar, means no slots
+        if not isinstance(slots, dict):
+            slots = {}
+        if generation == self._generation.get(urgency, 0):
+            self._slots[urgency] = (time.monotonic(), slots)
+        return slots
+
+    def refresh(self, urgency: str) -> asyncio.Task:
+        task = self._inflight.get(urgency)
+        if task is None or task.done():
+            task = asyncio.create_task(self._fetch(urgency))
+            # Background refreshes may fail unobserved; get() re-raises for its caller
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[urgency] = task
+        return task
+
+    async def _refresh_loop(self):
+        while True:
+            for urgency in URGENCIES:
+                try:
+                    await asyncio.shield(self.refresh(urgency))
+                except Exception as e:
+                    # Anything but cancellation: one bad reply must not end prefetching for the session
+                    print(f"Error prefetching {urgency} appointment slots: {e}")
+            await asyncio.sleep(self.ttl)
+
+    def start(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def aclose(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        for task in self._inflight.values():
+            task.cancel()
+
+    async def get(self, urgency: str, limit: int = 3) -> list[str]:
+        """Up to ``limit`` slots for ``urgency``, earliest first. Raises RequestError on fetch failure."""
+        urgency = "emergency" if urgency == "emergency" else "non_emergency"
+        cached = self._slots.get(urgency)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            self.hits += 1
+            slots = cached[1]
+        else:
+            self.misses += 1
+            # Shielded: an interrupted tool call must not cancel the fetch other callers share
+            slots = await asyncio.shield(self.refresh(urgency))
+        return rank_slots(slots, limit)
+
+    def invalidate(self, urgency: Optional[str] = None):
+        """Drop cached windows (a slot was just taken) and fetch them again in the background."""
+        for key in [urgency] if urgency else URGENCIES:
+            self._slots.pop(key, None)
+            self._generation[key] = self._generation.get(key, 0) + 1
+            self._inflight.pop(key, None)
+            if self._refresh_task is not None:
+                self.refresh(key)
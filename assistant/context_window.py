@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+from livekit.agents import llm
+from livekit.agents.llm import ChatContext, ChatMessage
+
+# Estimated prompt tokens above which older turns get summarized
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+# Most recent messages that are always sent verbatim
+CONTEXT_KEEP_RECENT = int(os.getenv("CONTEXT_KEEP_RECENT", "8"))
+
+SUMMARY_PREFIX = "Summary of the conversation so far: "
+SUMMARY_PROMPT = (
+    "Summarize this part of a customer call for the assistant who will continue it. "
+    "Keep names, contact details, dates, times, order or booking details, open questions "
+    "and anything the customer asked to be done. Be brief, plain text, no preamble."
+)
+IMAGE_TOKENS = 85
+
+
+def estimate_tokens(message: ChatMessage) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    content = message.content
+    parts = content if isinstance(content, list) else [content]
+    tokens = 4  # role and message framing
+    for part in parts:
+        if isinstance(part, str):
+            tokens += len(part) // 4 + 1
+        elif part is not None:
+            tokens += IMAGE_TOKENS
+    for call in message.tool_calls or []:
+        tokens += len(str(call.arguments)) // 4 + 8
+    return tokens
+
+
+def _text(message: ChatMessage) -> str:
+    content = message.content
+    parts = content if isinstance(content, list) else [content]
+    return " ".join(part for part in parts if isinstance(part, str))
+
+
+class ContextWindow:
+    """Keeps a chat context within a token budget for the whole call.
+
+    The leading system prompt and the last ``keep_recent`` messages always stay
+    verbatim. Once the estimate goes over ``max_tokens``, the turns in between
+    are summarized in the background and replaced, in place, by one summary
+    message; until the summary lands the full history is sent as before.
+    """
+
+    def __init__(
+        self,
+        chat_ctx: ChatContext,
+        summary_llm: llm.LLM,
+        max_tokens: int = CONTEXT_MAX_TOKENS,
+        keep_recent: int = CONTEXT_KEEP_RECENT,
+    ):
+        self.chat_ctx = chat_ctx
+        self.summary_llm = summary_llm
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.turn_tokens: list[int] = []
+        self._summary: Optional[ChatMessage] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def tokens(self) -> int:
+        return sum(estimate_tokens(m) for m in self.chat_ctx.messages)
+
+    def compact(self) -> int:
+        """Record this turn's prompt size and start a summary if over budget."""
+        tokens = self.tokens()
+        self.turn_tokens.append(tokens)
+        print(f"Context: {tokens} tokens across {len(self.chat_ctx.messages)} messages (turn {len(self.turn_tokens)})")
+
+        if tokens > self.max_tokens and (self._task is None or self._task.done()):
+            older = self._older_messages()
+            if older:
+                self._task = asyncio.create_task(self._summarize(older))
+        return tokens
+
+    def before_llm_cb(self, agent, chat_ctx: ChatContext):
+        """VoicePipelineAgent hook; returning None keeps the default LLM call."""
+        self.compact()
+        return None
+
+    def report(self) -> dict:
+        if not self.turn_tokens:
+            return {"turns": 0}
+        return {
+            "turns": len(self.turn_tokens),
+            "mean_tokens": sum(self.turn_tokens) / len(self.turn_tokens),
+            "max_tokens": max(self.turn_tokens),
+            "last_tokens": self.turn_tokens[-1],
+        }
+
+    def _older_messages(self) -> list[ChatMessage]:
+        messages = self.chat_ctx.messages
+        head = 0
+        while head < len(messages) and messages[head].role == "system" and messages[head] is not self._summary:
+            head += 1
+        end = len(messages) - self.keep_recent
+        # Never separate tool results from the assistant message that called them
+        while head < end < len(messages) and messages[end].role == "tool":
+            end -= 1
+        older = messages[head:end]
+        # Nothing new to fold in if only the previous summary is older
+        return older if any(m is not self._summary for m in older) else []
+
+    async def _summarize(self, older: list[ChatMessage]):
+        start = time.perf_counter()
+        transcript = "\n".join(
+            f"{m.role}: {_text(m)}" for m in older if m.role in ("system", "user", "assistant") and _text(m)
+        )
+        try:
+            stream = self.summary_llm.chat(
+                chat_ctx=ChatContext(
+                    messages=[
+                        ChatMessage(role="system", content=SUMMARY_PROMPT),
+                        ChatMessage(role="user", content=transcript),
+                    ]
+                )
+            )
+            summary = ""
+            try:
+                async for chunk in stream:
+                    for choice in chunk.choices:
+                        summary += choice.delta.content or ""
+            finally:
+                await stream.aclose()
+        except Exception as e:
+            # Fall back to dropping the old turns so the budget still holds
+            print(f"Context summary failed, dropping {len(older)} older messages: {e}")
+            previous = any(m is self._summary for m in older)
+            summary = _text(self._summary)[len(SUMMARY_PREFIX):] if previous else ""
+
+        # The agent keeps appending while we summarize, so splice by identity
+        messages = self.chat_ctx.messages
+        ids = {id(m) for m in older}
+        first = next((i for i, m in enumerate(messages) if id(m) in ids), None)
+        if first is None:
+            return
+        kept = [m for m in messages if id(m) not in ids]
+        message = ChatMessage(role="system", content=SUMMARY_PREFIX + summary.strip()) if summary.strip() else None
+        if message:
+            kept.insert(first, message)
+        messages[:] = kept
+        self._summary = message
+        print(
+            f"Context: summarized {len(older)} messages in {time.perf_counter() - start:.2f}s, "
+            f"now {self.tokens()} tokens"
+        )
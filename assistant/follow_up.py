@@ -0,0 +1,212 @@
+import asyncio
+import glob
+import hashlib
+import hmac
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import web
+
+from .http_client import RequestError, get_http_client
+
+# Port for the CRM's "appointment booked" webhook; unset means poll only
+WEBHOOK_PORT = os.getenv("FOLLOW_UP_WEBHOOK_PORT")
+# Interface the webhook binds; anything but loopback requires FOLLOW_UP_WEBHOOK_SECRET
+WEBHOOK_HOST = os.getenv("FOLLOW_UP_WEBHOOK_HOST") or "127.0.0.1"
+WEBHOOK_SECRET = os.getenv("FOLLOW_UP_WEBHOOK_SECRET", "")
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+# Shared by the worker's listener and its job processes
+NOTIFY_DIR = os.getenv("FOLLOW_UP_NOTIFY_DIR") or os.path.join(tempfile.gettempdir(), "agent-follow-up")
+# How often a waiting follow-up looks for its notification
+NOTIFY_CHECK_INTERVAL = 0.5
+# Polling fallback: first check after POLL_INITIAL seconds, doubling up to POLL_MAX
+POLL_INITIAL = float(os.getenv("FOLLOW_UP_POLL_INITIAL", "5"))
+POLL_MAX = float(os.getenv("FOLLOW_UP_POLL_MAX", "60"))
+# Give up and tell the caller it isn't booked after this many seconds
+FOLLOW_UP_TIMEOUT = float(os.getenv("FOLLOW_UP_TIMEOUT", "120"))
+
+BOOKED_TAG = "livekit_appointment_booked"
+
+
+async def appointment_booked(email: str) -> Optional[bool]:
+    """Whether the CRM contact for ``email`` carries the booked tag; None if the CRM is unreachable."""
+    headers = {
+        'Authorization': f"Bearer {os.getenv('API_TOKEN')}",
+        'Content-Type': 'application/json'
+    }
+    try:
+        data = await get_http_client().get(
+            os.getenv('CRM_CONTACT_LOOKUP_ENDPOINT'), endpoint="CRM_CONTACT_LOOKUP_ENDPOINT",
+            params={'email': email}, headers=headers,
+        ) or {}
+    except RequestError as e:
+        print(f"Error checking appointment status for {email}: {e}")
+        return None
+    return any(BOOKED_TAG in contact.get('tags', []) for contact in data.get('contacts', []))
+
+
+def _email_key(email: str) -> str:
+    return hashlib.sha1(email.strip().lower().encode()).hexdigest()
+
+
+def _prune_notifications(max_age: float):
+    """Drop watch/booked files left by job processes that died mid follow-up."""
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(NOTIFY_DIR, "*.watch")) + glob.glob(os.path.join(NOTIFY_DIR, "*.booked")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+async def _handle(request: web.Request) -> web.Response:
+    if WEBHOOK_SECRET and not hmac.compare_digest(request.headers.get("X-Webhook-Secret", ""), WEBHOOK_SECRET):
+        return web.Response(status=401)
+    try:
+        payload = await request.json()
+    except ValueError:
+        return web.Response(status=400, text="expected JSON")
+    if not isinstance(payload, dict):
+        return web.Response(status=400, text="expected a JSON object")
+    contact = payload.get("contact")
+    email = payload.get("email") or (contact.get("email") if isinstance(contact, dict) else None)
+    if not isinstance(email, str) or not email.strip():
+        return web.Response(status=400, text="missing email")
+
+    # Each waiting follow-up, in whichever job process, owns one watch file;
+    # renaming it is the notification
+    notified = 0
+    for path in glob.glob(os.path.join(NOTIFY_DIR, f"{_email_key(email)}.*.watch")):
+        try:
+            os.replace(path, path[: -len(".watch")] + ".booked")
+            notified += 1
+        except FileNotFoundError:
+            pass
+    return web.json_response({"notified": notified}, status=200 if notified else 202)
+
+
+async def _serve():
+    app = web.Application()
+    app.router.add_post("/appointment-booked", _handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, int(WEBHOOK_PORT)).start()
+    except OSError as e:
+        print(f"Follow-up webhook not listening on {WEBHOOK_HOST}:{WEBHOOK_PORT} ({e}); polling only")
+        await runner.cleanup()
+        return
+    print(f"Follow-up webhook listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}")
+    await asyncio.Event().wait()
+
+
+def start_webhook_listener() -> Optional[threading.Thread]:
+    """Serve the CRM's booking webhook from the worker's main process.
+
+    Call it under ``if __name__ == "__main__"`` before ``cli.run_app``, so it
+    binds once per worker rather than once per job process. Jobs never talk
+    to it directly: they drop a watch file in ``NOTIFY_DIR`` and the handler
+    renames it when the booking arrives.
+    """
+    if not WEBHOOK_PORT:
+        return None
+    if not WEBHOOK_SECRET and WEBHOOK_HOST not in LOOPBACK_HOSTS:
+        print(f"Follow-up webhook not started: set FOLLOW_UP_WEBHOOK_SECRET to listen on {WEBHOOK_HOST}; polling only")
+        return None
+    os.makedirs(NOTIFY_DIR, exist_ok=True)
+    _prune_notifications(FOLLOW_UP_TIMEOUT * 2)
+    thread = threading.Thread(target=asyncio.run, args=(_serve(),), name="follow-up-webhook", daemon=True)
+    thread.start()
+    return thread
+
+
+async def _wait_for_file(path: str, timeout: float) -> bool:
+    if not WEBHOOK_PORT:
+        await asyncio.sleep(timeout)
+        return False
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not os.path.exists(path):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(NOTIFY_CHECK_INTERVAL, remaining))
+    return True
+
+
+class FollowUpScheduler:
+    """Tells the caller once their appointment is booked, instead of checking after a fixed sleep.
+
+    Each follow-up watches for the booking webhook (see
+    ``start_webhook_listener``) and polls the CRM with exponential backoff in
+    case the webhook never arrives. There is at most one follow-up per email;
+    ``aclose()`` cancels them when the room closes.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[str], Awaitable[Optional[bool]]] = appointment_booked,
+        timeout: float = FOLLOW_UP_TIMEOUT,
+        poll_initial: float = POLL_INITIAL,
+        poll_max: float = POLL_MAX,
+    ):
+        self.check = check
+        self.timeout = timeout
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def schedule(self, email: str, on_done: Callable[[bool], Awaitable[None]]) -> asyncio.Task:
+        """Watch ``email`` and await ``on_done(booked)`` once it is booked or the wait times out."""
+        key = email.strip().lower()
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            return task
+        task = asyncio.create_task(self._follow_up(key, on_done))
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._tasks.pop(key, None) if self._tasks.get(key) is t else None)
+        return task
+
+    async def _follow_up(self, email: str, on_done: Callable[[bool], Awaitable[None]]):
+        watch = os.path.join(NOTIFY_DIR, f"{_email_key(email)}.{os.getpid()}.{uuid.uuid4().hex}.watch")
+        booked_path = watch[: -len(".watch")] + ".booked"
+        if WEBHOOK_PORT:
+            os.makedirs(NOTIFY_DIR, exist_ok=True)
+            open(watch, "w").close()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        delay = self.poll_initial
+        booked = False
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                if await _wait_for_file(booked_path, min(delay, remaining)):
+                    print(f"Booking webhook received for {email}")
+                    booked = True
+                    break
+                if await self.check(email):
+                    booked = True
+                    break
+                delay = min(delay * 2, self.poll_max)
+        finally:
+            for path in (watch, booked_path):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+        print(f"Follow-up for {email}: {'booked' if booked else 'not booked'}")
+        await on_done(booked)
+
+    async def aclose(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
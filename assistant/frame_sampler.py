@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import os
+import time
+from collections import deque
+from typing import Optional
+
+from livekit import rtc
+from livekit.agents.llm import ChatImage
+from livekit.agents.utils import images
+
+# "on_demand" opens the video only when a vision tool asks for a frame;
+# "background" keeps the last few frames, read at VISION_SAMPLE_INTERVAL
+VISION_SAMPLE_MODE = os.getenv("VISION_SAMPLE_MODE", "on_demand")
+VISION_SAMPLE_INTERVAL = float(os.getenv("VISION_SAMPLE_INTERVAL", "1.0"))
+# Longest side of the JPEG sent to the LLM
+VISION_MAX_SIZE = int(os.getenv("VISION_MAX_SIZE", "768"))
+VISION_RING_SIZE = 3
+
+
+def find_video_track(room: rtc.Room) -> Optional[rtc.RemoteVideoTrack]:
+    for participant in room.remote_participants.values():
+        for publication in participant.track_publications.values():
+            if isinstance(publication.track, rtc.RemoteVideoTrack):
+                return publication.track
+    return None
+
+
+class FrameSampler:
+    """Snapshots of the caller's camera for vision tools, without decoding every frame.
+
+    Frames are only pulled into Python when asked for (or, in background mode,
+    one per interval through a single-slot stream), then downscaled and
+    JPEG-encoded in a worker thread. The last encoded image is reused until a
+    newer frame is taken, so repeated vision calls cost nothing extra.
+    """
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        mode: str = VISION_SAMPLE_MODE,
+        interval: float = VISION_SAMPLE_INTERVAL,
+        max_size: int = VISION_MAX_SIZE,
+    ):
+        if mode not in ("on_demand", "background"):
+            raise ValueError(f"Unsupported vision sample mode: {mode} (expected on_demand or background)")
+        self.room = room
+        self.mode = mode
+        self.interval = interval
+        self.max_size = max_size
+        self.frames: deque[tuple[float, rtc.VideoFrame]] = deque(maxlen=VISION_RING_SIZE)
+        self._encoded: Optional[tuple[float, ChatImage]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.encodes = 0
+
+    def start(self):
+        if self.mode == "background" and self._task is None:
+            self._task = asyncio.create_task(self._sample_loop())
+
+    async def aclose(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sample_loop(self):
+        while True:
+            track = find_video_track(self.room)
+            if track is None:
+                await asyncio.sleep(self.interval)
+                continue
+            # capacity=1: frames arriving between reads replace each other instead of queueing
+            stream = rtc.VideoStream(track, capacity=1)
+            try:
+                async for event in stream:
+                    self.frames.append((time.monotonic(), event.frame))
+                    await asyncio.sleep(self.interval)
+            finally:
+                await stream.aclose()
+
+    async def _grab(self, timeout: float) -> Optional[rtc.VideoFrame]:
+        track = find_video_track(self.room)
+        if track is None:
+            return None
+        stream = rtc.VideoStream(track, capacity=1)
+        try:
+            event = await asyncio.wait_for(stream.__anext__(), timeout)
+            return event.frame
+        except (asyncio.TimeoutError, StopAsyncIteration):
+            return None
+        finally:
+            await stream.aclose()
+
+    def _encode(self, frame: rtc.VideoFrame) -> str:
+        scale = min(1.0, self.max_size / max(frame.width, frame.height))
+        options = images.EncodeOptions(
+            format="JPEG",
+            resize_options=images.ResizeOptions(
+                width=max(1, int(frame.width * scale)),
+                height=max(1, int(frame.height * scale)),
+                strategy="scale_aspect_fit",
+            ),
+        )
+        return base64.b64encode(images.encode(frame, options)).decode()
+
+    async def image(self, timeout: float = 2.0) -> Optional[ChatImage]:
+        """A downscaled JPEG of the most recent frame, or None if there is no video."""
+        if self.frames:
+            taken, frame = self.frames[-1]
+        elif self._encoded and time.monotonic() - self._encoded[0] < self.interval:
+            return self._encoded[1]
+        else:
+            frame = await self._grab(timeout)
+            if frame is None:
+                return None
+            taken = time.monotonic()
+
+        if self._encoded and self._encoded[0] >= taken:
+            return self._encoded[1]
+        data = await asyncio.to_thread(self._encode, frame)
+        self.encodes += 1
+        self._encoded = (taken, ChatImage(image=f"data:image/jpeg;base64,{data}"))
+        return self._encoded[1]
@@ -1,7 +1,7 @@
 import re
-import requests
 from livekit.agents import llm
 from typing import Annotated
+from .http_client import RequestError, get_http_client
 
 class AssistantFunction(llm.FunctionContext):
     def __init__(self, webhook_url):
@@ -55,9 +55,8 @@ class AssistantFunction(llm.FunctionContext):
                 'email': email,
                 'name': name
             }
-            response = requests.post(self.webhook_url, json=data, headers=headers)
-            response.raise_for_status()
+            await get_http_client().post(self.webhook_url, endpoint="WEBHOOK_URL", json=data, headers=headers)
             return f"Appointment booking link sent to {email}. Please check your email for further instructions."
-        except requests.RequestException as e:
+        except RequestError as e:
             print(f"Error booking appointment: {e}")
             return "There was an error booking your appointment. Please try again later."
\ No newline at end of file
@@ -0,0 +1,129 @@
+import asyncio
+import os
+from typing import Optional
+
+import aiohttp
+
+# Errors the function tools should treat as a failed CRM/webhook call, the
+# async equivalent of requests.RequestException: connection failures,
+# timeouts, non-2xx statuses and bodies that aren't valid JSON.
+RequestError = (aiohttp.ClientError, asyncio.TimeoutError)
+
+DEFAULT_TIMEOUT = 10.0
+
+# Total timeout (seconds) per endpoint, keyed by the env var holding its URL.
+# Lookups sit on the conversational path so they get the tightest budget.
+ENDPOINT_TIMEOUTS = {
+    "WEBHOOK_URL": 10.0,
+    "CRM_CONTACT_ENDPOINT": 8.0,
+    "CRM_CONTACT_LOOKUP_ENDPOINT": 5.0,
+    "APPOINTMENT_SLOTS_ENDPOINT": 8.0,
+    "BOOK_APPOINTMENT_ENDPOINT": 10.0,
+    "LIVEKIT_SERVER_URL": 5.0,
+}
+
+
+class HttpClient:
+    """Keep-alive aiohttp session shared by every function context in the process.
+
+    A session is bound to the event loop that created it, so one is kept per
+    running loop. Requests beyond ``max_concurrency`` queue instead of opening
+    more sockets against the CRM.
+    """
+
+    def __init__(self, max_connections: int = 100, max_per_host: int = 20, max_concurrency: int = 50):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.max_concurrency = max_concurrency
+        self._sessions: dict[asyncio.AbstractEventLoop, tuple[aiohttp.ClientSession, asyncio.Semaphore]] = {}
+
+    def _state(self) -> tuple[aiohttp.ClientSession, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        state = self._sessions.get(loop)
+        if state is None or state[0].closed:
+            # Forget sessions left behind by loops of finished jobs
+            for stale in [l for l in self._sessions if l.is_closed()]:
+                del self._sessions[stale]
+
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                keepalive_timeout=30,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+            )
+            state = (session, asyncio.Semaphore(self.max_concurrency))
+            self._sessions[loop] = state
+        return state
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        *,
+        endpoint: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        """Send a request and return the decoded JSON body (None if empty).
+
+        ``endpoint`` names the env var the URL came from and selects its timeout.
+        Non-2xx responses raise ``aiohttp.ClientResponseError`` and a body that
+        isn't valid JSON raises ``aiohttp.ContentTypeError``, so callers only
+        need to catch ``RequestError``.
+        """
+        if not url:
+            raise aiohttp.InvalidURL(f"{endpoint or 'endpoint'} is not configured")
+        if timeout is None:
+            timeout = ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+
+        session, semaphore = self._state()
+        async with semaphore:
+            async with session.request(
+                method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+                if not body:
+                    return None
+                try:
+                    return await response.json(content_type=None)
+                except ValueError as e:
+                    # JSONDecodeError / UnicodeDecodeError from an HTML error page or a truncated body
+                    raise aiohttp.ContentTypeError(
+                        response.request_info,
+                        response.history,
+                        status=response.status,
+                        message=f"Invalid JSON body: {e}",
+                        headers=response.headers,
+                    ) from e
+
+    async def get(self, url: str, **kwargs):
+        return await self.request_json("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request_json("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs):
+        return await self.request_json("PUT", url, **kwargs)
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        state = self._sessions.pop(loop, None)
+        if state is not None:
+            await state[0].close()
+
+
+_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """Return the per-process client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = HttpClient(
+            max_concurrency=int(os.getenv("HTTP_MAX_CONCURRENCY", "50")),
+        )
+    return _client
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+from livekit import rtc
+from livekit.agents import JobContext
+
+from .http_client import RequestError, get_http_client
+
+# Seconds to wait for a caller to join before giving up on the job
+READY_TIMEOUT = float(os.getenv("ROOM_READY_TIMEOUT", "60"))
+# "events" connects straight away and waits for participant_connected;
+# "rest" polls LIVEKIT_SERVER_URL first (with backoff) and only then connects.
+READY_MODE = os.getenv("ROOM_READY_MODE", "events")
+
+
+async def check_room_status(room_name: str) -> bool:
+    """Check via the REST API if the room exists and has participants."""
+    try:
+        room_info = await get_http_client().get(
+            f"{os.getenv('LIVEKIT_SERVER_URL')}/rooms/{room_name}",
+            endpoint="LIVEKIT_SERVER_URL",
+            headers={"Authorization": f"Bearer {os.getenv('LIVEKIT_API_KEY')}:{os.getenv('LIVEKIT_API_SECRET')}"},
+        ) or {}
+        return room_info.get("num_participants", 0) > 0
+    except RequestError as e:
+        print(f"Error checking room status: {e}")
+        return False  # Assume room is inactive on error
+
+
+async def poll_room_active(
+    room_name: str,
+    timeout: float = READY_TIMEOUT,
+    initial_delay: float = 0.25,
+    max_delay: float = 5.0,
+) -> bool:
+    """Poll the REST API with exponential backoff until the room has participants."""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        if await check_room_status(room_name):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+async def wait_until_ready(
+    ctx: JobContext,
+    timeout: float = READY_TIMEOUT,
+    mode: str = READY_MODE,
+    **connect_kwargs,
+) -> Optional[rtc.RemoteParticipant]:
+    """Connect to the job's room and return the first remote participant.
+
+    Returns None if nobody joins within ``timeout``. If connecting fails, or in
+    ``rest`` mode, the room is polled over REST with backoff before (re)connecting.
+    """
+    start = time.monotonic()
+    room_name = ctx.room.name
+
+    connected = False
+    if mode != "rest":
+        try:
+            await ctx.connect(**connect_kwargs)
+            connected = True
+        except Exception as e:
+            print(f"Could not connect to room {room_name} yet, falling back to REST polling: {e}")
+
+    if not connected:
+        if not await poll_room_active(room_name, timeout=timeout):
+            return None
+        await ctx.connect(**connect_kwargs)
+
+    remaining = max(timeout - (time.monotonic() - start), 0)
+    try:
+        participant = await asyncio.wait_for(ctx.wait_for_participant(), remaining)
+    except asyncio.TimeoutError:
+        return None
+
+    print(f"Participant {participant.identity} joined {room_name} after {time.monotonic() - start:.2f}s")
+    return participant
@@ -0,0 +1,50 @@
+from typing import Callable
+
+from livekit.agents import stt
+
+
+class _TappedStream:
+    """Forwards everything to the wrapped stream, reporting transcripts on the way."""
+
+    def __init__(self, stream, on_interim: Callable[[str], None]):
+        self._stream = stream
+        self._on_interim = on_interim
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> stt.SpeechEvent:
+        event = await self._stream.__anext__()
+        if event.type == stt.SpeechEventType.INTERIM_TRANSCRIPT and event.alternatives:
+            text = event.alternatives[0].text
+            if text:
+                try:
+                    self._on_interim(text)
+                except Exception as e:
+                    print(f"Interim transcript handler failed: {e}")
+        return event
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        return await self._stream.__aexit__(*args)
+
+
+class TranscriptTap:
+    """Wraps a streaming STT (e.g. deepgram.STT) and calls ``on_interim`` with
+    each interim hypothesis, leaving the events the agent sees untouched."""
+
+    def __init__(self, inner: stt.STT, on_interim: Callable[[str], None]):
+        self._inner = inner
+        self._on_interim = on_interim
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def stream(self, *args, **kwargs):
+        return _TappedStream(self._inner.stream(*args, **kwargs), self._on_interim)
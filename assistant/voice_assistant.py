@@ -3,10 +3,13 @@ from livekit.agents.llm import ChatContext, ChatMessage
 from livekit.plugins import silero, deepgram, openai
 from tts import get_tts_engine
 from .functions import AssistantFunction
+from .context_window import ContextWindow
 
 async def create_voice_assistant(config, chat_context):
     gpt = openai.LLM(model=config["gpt_model"])
     tts_engine = await get_tts_engine(config)
+    # Keeps long calls within a token budget by summarizing older turns
+    context_window = ContextWindow(chat_context, gpt)
 
     assistant = VoiceAssistant(
         vad=silero.VAD.load(),
@@ -15,6 +18,7 @@ async def create_voice_assistant(config, chat_context):
         tts=tts_engine,
         fnc_ctx=AssistantFunction(config["webhook_url"]),
         chat_ctx=chat_context,
+        before_llm_cb=context_window.before_llm_cb,
     )
 
-    return assistant
\ No newline at end of file
+    return assistant, context_window
\ No newline at end of file
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from livekit.agents import JobContext, JobRequest
+from livekit.agents.utils import hw
+
+# Past this load the worker reports itself full and turns job requests away
+LOAD_THRESHOLD = float(os.getenv("WORKER_LOAD_THRESHOLD", "0.75"))
+# Sessions one worker is sized for; load from sessions alone is active / MAX_SESSIONS
+MAX_SESSIONS = int(os.getenv("WORKER_MAX_SESSIONS", "4"))
+# Event-loop lag and inference backlog at which a job process counts as saturated
+LOOP_LAG_MAX_MS = float(os.getenv("WORKER_LOOP_LAG_MAX_MS", "200"))
+INFERENCE_QUEUE_MAX = int(os.getenv("WORKER_INFERENCE_QUEUE_MAX", "8"))
+LOAD_DIR = os.getenv("WORKER_LOAD_DIR") or os.path.join(tempfile.gettempdir(), "agent-load")
+
+REPORT_INTERVAL = 1.0
+# Reports older than this belong to a job process that has gone away
+REPORT_MAX_AGE = 10.0
+# An accepted job that hasn't shown up in active_jobs after this long never started
+ACCEPT_GRACE = 5.0
+
+# Job processes inherit this from the worker, so their reports land in its directory
+os.environ.setdefault("AGENT_WORKER_ID", str(os.getpid()))
+
+
+def _report_dir() -> str:
+    return os.path.join(LOAD_DIR, os.environ["AGENT_WORKER_ID"])
+
+
+def write_report(directory: str, name: str, lag_ms: float, queue: int):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"lag_ms": lag_ms, "queue": queue, "t": time.time()}, f)
+    os.replace(tmp, path)
+
+
+def read_reports(directory: str) -> list[dict]:
+    reports = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return reports
+    now = time.time()
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            # Removed or replaced between listdir and open
+            continue
+        if now - report.get("t", 0) <= REPORT_MAX_AGE:
+            reports.append(report)
+    return reports
+
+
+class JobLoadReporter:
+    """Measures event-loop lag (and optionally an inference queue) inside a job process.
+
+    The worker's load function runs in the parent process, which can't see
+    either, so each job writes a small report file it can read.
+    """
+
+    def __init__(self, queue_depth: Optional[Callable[[], int]] = None, directory: Optional[str] = None):
+        self.queue_depth = queue_depth
+        self.directory = directory or _report_dir()
+        self.name = f"{os.getpid()}-{id(self):x}"
+        self.lags: deque[float] = deque(maxlen=5)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + REPORT_INTERVAL
+            await asyncio.sleep(REPORT_INTERVAL)
+            # How late the loop woke us is how long callbacks are waiting to run
+            self.lags.append(max(0.0, loop.time() - expected) * 1000)
+            queue = self.queue_depth() if self.queue_depth else 0
+            try:
+                write_report(self.directory, self.name, max(self.lags), queue)
+            except OSError as e:
+                print(f"Could not write load report: {e}")
+
+    async def aclose(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            os.remove(os.path.join(self.directory, f"{self.name}.json"))
+        except FileNotFoundError:
+            pass
+
+
+def report_job_load(ctx: JobContext, queue_depth: Optional[Callable[[], int]] = None) -> JobLoadReporter:
+    """Start reporting this job's load to the worker until the job shuts down."""
+    reporter = JobLoadReporter(queue_depth)
+    reporter.start()
+    ctx.add_shutdown_callback(reporter.aclose)
+    return reporter
+
+
+class _CpuSampler:
+    """Average CPU use over the last few seconds, sampled on a background thread."""
+
+    def __init__(self, window: int = 5):
+        self.samples: deque[float] = deque(maxlen=window)
+        self._monitor = hw.get_cpu_monitor()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True, name="worker_load_cpu").start()
+
+    def _run(self):
+        while True:
+            cpu = self._monitor.cpu_percent(interval=0.5)
+            with self._lock:
+                self.samples.append(cpu)
+
+    def __call__(self) -> float:
+        with self._lock:
+            return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+
+class WorkerLoad:
+    """Load for ``WorkerOptions.load_fnc``: the busiest of sessions, CPU, loop lag and inference backlog.
+
+    Each signal is scaled so that 1.0 means saturated, and the worker's load
+    is the highest of them. One hot resource is enough to make a worker a bad
+    place for the next room, even when the other signals look idle.
+    """
+
+    def __init__(
+        self,
+        threshold: float = LOAD_THRESHOLD,
+        max_sessions: int = MAX_SESSIONS,
+        cpu: Optional[Callable[[], float]] = None,
+        directory: Optional[str] = None,
+    ):
+        self.threshold = threshold
+        self.max_sessions = max_sessions
+        self._cpu = cpu
+        self.directory = directory or _report_dir()
+        self.active: set[str] = set()
+        # Job id -> accept time, for accepted jobs not yet in active_jobs
+        self.accepted: dict[str, float] = {}
+        self.last: dict[str, float] = {}
+        # load_fnc and request_fnc measure from different executor threads
+        self._lock = threading.Lock()
+
+    def cpu(self) -> float:
+        if self._cpu is None:
+            self._cpu = _CpuSampler()
+        return self._cpu()
+
+    def _sessions(self, active: Optional[set[str]]) -> int:
+        with self._lock:
+            if active is not None:
+                self.active = active
+            cutoff = time.monotonic() - ACCEPT_GRACE
+            # Each job counts once: from active_jobs as soon as it appears there
+            self.accepted = {
+                job_id: at for job_id, at in self.accepted.items() if job_id not in self.active and at >= cutoff
+            }
+            return len(self.active) + len(self.accepted)
+
+    def measure(self, active: Optional[set[str]] = None) -> float:
+        """Current load; ``active`` is the ids of the worker's running jobs, if known."""
+        reports = read_reports(self.directory)
+        self.last = {
+            "sessions": self._sessions(active) / self.max_sessions,
+            "cpu": self.cpu(),
+            "loop_lag": max((r["lag_ms"] for r in reports), default=0.0) / LOOP_LAG_MAX_MS,
+            "inference": max((r["queue"] for r in reports), default=0) / INFERENCE_QUEUE_MAX,
+        }
+        return min(1.0, max(self.last.values()))
+
+    def __call__(self, worker) -> float:
+        # Runs in the worker process every few seconds, off its event loop
+        return self.measure({info.job.id for info in worker.active_jobs})
+
+    async def admit(self, req: JobRequest):
+        """``request_fnc`` that turns a job away when taking it would push this worker past the threshold."""
+        # active_jobs is as of the last load_fnc call, so jobs accepted since
+        # then count against the session budget until they show up there
+        load = await asyncio.to_thread(self.measure)
+        if load >= self.threshold:
+            print(f"Rejecting job {req.id}: load {load:.2f} ({self.last})")
+            await req.reject()
+            return
+        with self._lock:
+            self.accepted[req.id] = time.monotonic()
+        await req.accept()
+
+
+worker_load = WorkerLoad()
+
+
+def load_fnc(worker) -> float:
+    return worker_load(worker)
+
+
+async def admit_job(req: JobRequest):
+    await worker_load.admit(req)
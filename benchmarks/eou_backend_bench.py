@@ -0,0 +1,142 @@
+"""Parity, latency and memory of the end-of-turn detector backends.
+
+Each backend is loaded in its own subprocess so resident memory is measured in
+isolation. Predictions are compared against the fp32 PyTorch model and the
+script exits non-zero if a backend drifts beyond its tolerance, or if cancelling
+queued predictions stops the inference thread. Run from the repo root:
+
+    python benchmarks/eou_backend_bench.py --backends torch int8 onnx
+"""
+import argparse
+import concurrent.futures
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "HumanoidAgent"))
+
+# Max absolute difference in end-of-turn probability vs fp32 PyTorch
+TOLERANCE = {"torch": 0.0, "int8": 0.05, "onnx": 1e-3}
+
+CONVERSATIONS = [
+    ["Human: hi\n"],
+    ["Human: I'd like to order a pizza\n"],
+    ["Human: I'd like to order a\n"],
+    ["Assistant: What's your address?\n", "Human: 42 Baker Street, London W1U 6DJ\n"],
+    ["Assistant: What's your address?\n", "Human: it's 42 Baker Street and\n"],
+    [
+        "Human: do you deliver to Westminster?\n",
+        "Assistant: Yes, delivery is free within 3 miles.\n",
+        "Human: great, then I'll have a Margherita and\n",
+    ],
+    [
+        "Human: what are the offers today\n",
+        "Assistant: Monday Madness is 50% off classic pizzas.\n",
+        "Human: okay thanks that's all\n",
+    ],
+]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def check_cancellation(service) -> bool:
+    """Cancel predictions while they are queued or batched; the next one must still complete."""
+    futures = [service.submit(turns) for turns in CONVERSATIONS]
+    for future in futures[::2]:
+        future.cancel()
+    try:
+        service.submit(CONVERSATIONS[0]).result(timeout=30)
+    except concurrent.futures.TimeoutError:
+        return False
+    return all(f.cancelled() or f.done() for f in futures)
+
+
+def run_backend(backend: str, repeat: int):
+    import torch
+    from eou_inference import EOUInferenceService
+
+    torch.set_num_threads(1)
+    before = rss_mb()
+    start = time.perf_counter()
+    # No KV reuse so every backend does the same work per prediction
+    service = EOUInferenceService(backend=backend, kv_cache_size=0)
+    load_s = time.perf_counter() - start
+    after = rss_mb()
+
+    probs = [service.submit(turns).result() for turns in CONVERSATIONS]
+    latencies = []
+    for _ in range(repeat):
+        for turns in CONVERSATIONS:
+            t = time.perf_counter()
+            service.submit(turns).result()
+            latencies.append(time.perf_counter() - t)
+    cancel_ok = check_cancellation(service)
+    service.close()
+
+    latencies.sort()
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_s,
+        "rss_mb": after - before,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "probs": probs,
+        "cancel_ok": cancel_ok,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_backend(args.child, args.repeat)
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {}
+    for backend in backends:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", backend, "--repeat", str(args.repeat)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{backend}: failed\n{out.stderr.strip()}")
+            continue
+        results[backend] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    reference = results.get("torch", {}).get("probs")
+    failed = False
+    print(f"{'backend':<8}{'load (s)':>10}{'RSS (MB)':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'max diff':>10}")
+    for backend, r in results.items():
+        diff = max(abs(a - b) for a, b in zip(r["probs"], reference)) if reference else float("nan")
+        if reference and diff > TOLERANCE.get(backend, 0.0):
+            failed = True
+        if not r["cancel_ok"]:
+            print(f"{backend}: a cancelled prediction stopped the inference thread")
+            failed = True
+        print(f"{backend:<8}{r['load_s']:>10.2f}{r['rss_mb']:>10.0f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{diff:>10.4f}")
+
+    if failed:
+        print("Check failed: a backend drifted beyond its tolerance from fp32 PyTorch or hung after a cancellation")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Per-job start latency and process memory: EOU model per job vs loaded in prewarm.
+
+"per-job" loads the tokenizer and model at the start of every job (what
+constructing the turn detector inside ``entrypoint`` did); "prewarm" loads it
+once per process and each job only reuses it. Each mode runs in its own
+subprocess. Run from the repo root:
+
+    python benchmarks/eou_prewarm_bench.py --jobs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "HumanoidAgent"))
+
+FIRST_TURN = ["Assistant: Hi, how can I help?\n", "Human: I'd like to order a pizza\n"]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run_mode(mode: str, jobs: int):
+    from eou_inference import EOUInferenceService
+
+    baseline = rss_mb()
+    prewarm_s = 0.0
+    shared = None
+    if mode == "prewarm":
+        start = time.perf_counter()
+        shared = EOUInferenceService()
+        prewarm_s = time.perf_counter() - start
+
+    starts = []
+    peak = baseline
+    for _ in range(jobs):
+        start = time.perf_counter()
+        service = shared or EOUInferenceService()
+        # A job is ready once it can answer its first end-of-turn prediction
+        service.submit(FIRST_TURN).result()
+        starts.append(time.perf_counter() - start)
+        peak = max(peak, rss_mb())
+        if service is not shared:
+            service.close()
+
+    print(json.dumps({
+        "mode": mode,
+        "prewarm_s": prewarm_s,
+        "job_start_p50_ms": statistics.median(starts) * 1000,
+        "job_start_max_ms": max(starts) * 1000,
+        "rss_mb": peak - baseline,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.child, args.jobs)
+        return
+
+    print(f"{'mode':<10}{'prewarm (s)':>12}{'job p50 (ms)':>14}{'job max (ms)':>14}{'RSS (MB)':>10}")
+    for mode in ("per-job", "prewarm"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--jobs", str(args.jobs)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{mode}: failed\n{out.stderr.strip()}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{mode:<10}{r['prewarm_s']:>12.2f}{r['job_start_p50_ms']:>14.1f}"
+            f"{r['job_start_max_ms']:>14.1f}{r['rss_mb']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Event-loop lag under concurrent CRM calls: blocking requests vs the shared async client.
+
+Starts a stub CRM on localhost that answers after a fixed delay, then simulates
+N rooms each making a handful of function-tool calls while a ticker measures how
+late the event loop wakes up. Run from the repo root:
+
+    python benchmarks/http_client_bench.py --rooms 50
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from assistant.http_client import HttpClient
+
+
+class StubCRMHandler(BaseHTTPRequestHandler):
+    delay = 0.1
+
+    def _reply(self):
+        time.sleep(self.delay)
+        body = json.dumps({"contacts": [{"id": "abc", "tags": ["livekit_appointment_booked"]}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_crm(delay: float) -> ThreadingHTTPServer:
+    StubCRMHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCRMHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.01) -> list[float]:
+    lags = []
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+    return lags
+
+
+async def blocking_room(url: str, calls: int):
+    # What the function tools did before: requests inside async def
+    for _ in range(calls):
+        response = requests.get(url, params={"email": "a@b.co"})
+        response.raise_for_status()
+        response.json()
+
+
+async def async_room(client: HttpClient, url: str, calls: int):
+    for _ in range(calls):
+        await client.get(url, endpoint="CRM_CONTACT_LOOKUP_ENDPOINT", params={"email": "a@b.co"})
+
+
+async def run(mode: str, url: str, rooms: int, calls: int) -> dict:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    client = HttpClient()
+
+    start = time.perf_counter()
+    if mode == "blocking":
+        await asyncio.gather(*(blocking_room(url, calls) for _ in range(rooms)))
+    else:
+        await asyncio.gather(*(async_room(client, url, calls) for _ in range(rooms)))
+        await client.aclose()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    lags = await lag_task
+    lags.sort()
+    return {
+        "mode": mode,
+        "wall_s": elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=3, help="CRM calls per room")
+    parser.add_argument("--delay", type=float, default=0.1, help="stub CRM response delay in seconds")
+    args = parser.parse_args()
+
+    server = start_stub_crm(args.delay)
+    url = f"http://127.0.0.1:{server.server_address[1]}/contacts/lookup"
+
+    print(f"{'mode':<10}{'wall (s)':>10}{'lag p50 (ms)':>14}{'lag p99 (ms)':>14}{'lag max (ms)':>14}")
+    for mode in ("blocking", "async"):
+        r = asyncio.run(run(mode, url, args.rooms, args.calls))
+        print(f"{r['mode']:<10}{r['wall_s']:>10.2f}{r['lag_p50_ms']:>14.1f}{r['lag_p99_ms']:>14.1f}{r['lag_max_ms']:>14.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
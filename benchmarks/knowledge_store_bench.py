@@ -0,0 +1,80 @@
+"""Startup time of the JSON SimpleVectorStore vs the memory-mapped binary store.
+
+Writes a synthetic knowledge base of N chunks in both formats to a temp dir,
+then times load + first top-k query for each. Run from the repo root:
+
+    python benchmarks/knowledge_store_bench.py --chunks 5000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from knowledge.vector_store import MmapVectorStore
+
+
+def make_nodes(count: int, dim: int) -> list[TextNode]:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    return [
+        TextNode(id_=f"node-{i}", text=f"chunk {i}", embedding=vectors[i].tolist())
+        for i in range(count)
+    ]
+
+
+def time_load(load, query: VectorStoreQuery, repeat: int) -> tuple[float, float]:
+    best_load = best_query = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        store = load()
+        loaded = time.perf_counter()
+        store.query(query)
+        best_load = min(best_load, loaded - start)
+        best_query = min(best_query, time.perf_counter() - loaded)
+    return best_load, best_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1536, help="embedding size (text-embedding-3-small is 1536)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    nodes = make_nodes(args.chunks, args.dim)
+    query = VectorStoreQuery(query_embedding=nodes[0].embedding, similarity_top_k=2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = str(Path(tmp) / "json" / "default__vector_store.json")
+        bin_path = str(Path(tmp) / "bin" / "default__vector_store.json")
+
+        simple = SimpleVectorStore()
+        simple.add(nodes)
+        simple.persist(json_path)
+        mmap_store = MmapVectorStore()
+        mmap_store.add(nodes)
+        mmap_store.persist(bin_path)
+
+        json_size = Path(json_path).stat().st_size
+        bin_size = sum(p.stat().st_size for p in Path(bin_path).parent.iterdir())
+
+        results = [
+            ("json", json_size, *time_load(lambda: SimpleVectorStore.from_persist_path(json_path), query, args.repeat)),
+            ("mmap", bin_size, *time_load(lambda: MmapVectorStore.from_persist_path(bin_path), query, args.repeat)),
+        ]
+
+    print(f"{args.chunks} chunks x {args.dim} dims")
+    print(f"{'store':<8}{'size (MB)':>12}{'load (ms)':>12}{'query (ms)':>12}")
+    for name, size, load_s, query_s in results:
+        print(f"{name:<8}{size / 1e6:>12.1f}{load_s * 1000:>12.1f}{query_s * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
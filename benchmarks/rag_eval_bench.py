@@ -0,0 +1,297 @@
+"""Retrieval quality and latency of the three RAG strategies on RAG/testQuestions.
+
+Every question (follow-ups included, in conversation order) goes through the
+chat engine, the query engine tool and retrieval injection, all sharing one
+index built from RAG/dental_data. Embeddings and the LLM are local stubs with
+configurable latency, so runs are offline and repeatable. Records retrieval
+latency, prompt tokens, whether a chunk from the expected source was
+retrieved, and end-to-end time. It also checks that a repeated question is
+answered from the semantic answer cache. Run from the repo root:
+
+    python benchmarks/rag_eval_bench.py --embed-ms 150 --llm-ms 300 --min-hit-rate 0.6
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.chat_engine import ContextChatEngine
+from llama_index.core.llms import ChatMessage, CompletionResponse, CompletionResponseGen, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_completion_callback
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from knowledge import ContextInjector, KnowledgeBase, SemanticAnswerCache, ingest, open_index
+
+QUESTIONS_FILE = ROOT / "RAG" / "testQuestions"
+DATA_DIR = ROOT / "RAG" / "dental_data"
+SYSTEM_PROMPT = "You are Daela, a dental assistant for Knolabs Dental Agency. Answer briefly."
+
+PROCEDURES, CARE, PRIVACY = "dental-procedures.md", "post-procedure-care.md", "privacy-policy.md"
+# Source files that can answer each section of RAG/testQuestions
+SECTION_SOURCES = {
+    "Treatment Journey Questions": {PROCEDURES, CARE},
+    "Post-Procedure Care Conversations": {CARE},
+    "Pricing and Insurance": {PROCEDURES},
+    "Procedure Details": {PROCEDURES},
+    "Comprehensive Treatment Information": {PROCEDURES, CARE},
+    "Policy and Rights Questions": {PRIVACY, PROCEDURES},
+    "Immediate Care": {CARE},
+    "Post-Procedure Complications": {CARE},
+    "Procedure-Specific Care": {CARE, PROCEDURES},
+    "Long-term Maintenance": {CARE, PROCEDURES},
+    "Regulatory and Compliance Questions": {PRIVACY},
+}
+# Sections mixing sources are labelled per question
+QUESTION_SOURCES = {
+    "What's your emergency contact number?": {CARE},
+    "Who is your Data Protection Officer?": {PRIVACY},
+    "How long do you keep dental records?": {PRIVACY},
+    "What advanced technologies do you use?": {PROCEDURES},
+}
+STRATEGIES = ("chat_engine", "query_engine", "retrieval_injection")
+
+
+def load_conversations(path: Path = QUESTIONS_FILE) -> list[list[tuple[str, Optional[set]]]]:
+    """Parse testQuestions into conversations of (question, expected source files)."""
+    conversations = []
+    section = None
+    for line in path.read_text().splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            section = stripped.lstrip("#").strip()
+            continue
+        match = re.search(r'"([^"]+)"', stripped)
+        if not match:
+            continue
+        question = match.group(1)
+        expected = QUESTION_SOURCES.get(question, SECTION_SOURCES.get(section))
+        if stripped.startswith("Follow-up:") and conversations:
+            conversations[-1].append((question, expected))
+        else:
+            conversations.append([(question, expected)])
+    return conversations
+
+
+def count_tokens(text: str) -> int:
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+class HashEmbedding(BaseEmbedding):
+    """Hashed bag-of-words vectors: free, deterministic and still topical."""
+
+    dim: int = 512
+    delay: float = 0.0
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            digest = hashlib.md5(token.encode()).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        time.sleep(self.delay)
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        await asyncio.sleep(self.delay)
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+class StubLLM(CustomLLM):
+    """Answers instantly (after ``delay``) and records prompt sizes."""
+
+    delay: float = 0.0
+    prompt_tokens: list = []
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(context_window=128000, num_output=64, model_name="stub")
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        self.prompt_tokens.append(count_tokens(prompt))
+        time.sleep(self.delay)
+        return CompletionResponse(text="Stub answer.")
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        yield self.complete(prompt, formatted=formatted)
+
+
+class TimedRetriever(BaseRetriever):
+    """Delegates to the knowledge base retriever, keeping the last nodes and timing."""
+
+    def __init__(self, inner: BaseRetriever):
+        super().__init__()
+        self.inner = inner
+        self.last_nodes: list[NodeWithScore] = []
+        self.last_ms = 0.0
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        start = time.perf_counter()
+        self.last_nodes = self.inner.retrieve(query_bundle)
+        self.last_ms = (time.perf_counter() - start) * 1000
+        return self.last_nodes
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        start = time.perf_counter()
+        self.last_nodes = await self.inner.aretrieve(query_bundle)
+        self.last_ms = (time.perf_counter() - start) * 1000
+        return self.last_nodes
+
+
+class _InjectorKB:
+    """The knowledge base as ContextInjector sees it, retrieving via TimedRetriever."""
+
+    def __init__(self, kb: KnowledgeBase, retriever: TimedRetriever):
+        self.kb = kb
+        self.retriever = retriever
+
+    @property
+    def version(self) -> int:
+        return self.kb.version
+
+    def render(self, node) -> str:
+        return self.kb.render(node)
+
+    async def retrieve(self, query: str) -> list[NodeWithScore]:
+        return await self.retriever.aretrieve(query)
+
+
+def _source(node: NodeWithScore) -> str:
+    return os.path.basename(node.node.metadata.get("file_name") or node.node.metadata.get("file_path", ""))
+
+
+async def run_strategy(strategy: str, kb: KnowledgeBase, llm: StubLLM, conversations) -> list[dict]:
+    retriever = TimedRetriever(kb.retriever)
+    rows = []
+    for conversation in conversations:
+        # Fresh memory / injected context per conversation, as per call in the agents
+        if strategy == "chat_engine":
+            engine = ContextChatEngine.from_defaults(retriever=retriever, llm=llm)
+        elif strategy == "query_engine":
+            engine = RetrieverQueryEngine(retriever=retriever, response_synthesizer=kb.synthesizer)
+        else:
+            injector = ContextInjector(_InjectorKB(kb, retriever), SYSTEM_PROMPT)
+            history = []
+
+        for question, expected in conversation:
+            retriever.last_nodes, retriever.last_ms = [], 0.0
+            prompts_before = len(llm.prompt_tokens)
+            start = time.perf_counter()
+            if strategy == "chat_engine":
+                await engine.achat(question)
+            elif strategy == "query_engine":
+                await engine.aquery(question)
+            else:
+                prompt = await injector.prompt_for(question)
+                history.append(ChatMessage(role="user", content=question))
+                await llm.achat([ChatMessage(role="system", content=prompt), *history])
+                history.append(ChatMessage(role="assistant", content="Stub answer."))
+            elapsed = (time.perf_counter() - start) * 1000
+
+            sources = {_source(n) for n in retriever.last_nodes}
+            rows.append({
+                "retrieval_ms": retriever.last_ms,
+                "prompt_tokens": sum(llm.prompt_tokens[prompts_before:]),
+                "retrieved": bool(retriever.last_nodes),
+                "hit": bool(sources & expected) if expected else None,
+                "e2e_ms": elapsed,
+            })
+    return rows
+
+
+def summarise(rows: list[dict]) -> dict:
+    scored = [r["hit"] for r in rows if r["hit"] is not None]
+    retrievals = sorted(r["retrieval_ms"] for r in rows if r["retrieved"])
+    e2e = sorted(r["e2e_ms"] for r in rows)
+    return {
+        "questions": len(rows),
+        "retrieval_p50_ms": statistics.median(retrievals) if retrievals else 0.0,
+        "prompt_tokens": statistics.mean(r["prompt_tokens"] for r in rows),
+        "hit_rate": sum(scored) / len(scored) if scored else 0.0,
+        "e2e_p50_ms": statistics.median(e2e),
+        "e2e_p95_ms": e2e[min(len(e2e) - 1, int(len(e2e) * 0.95))],
+    }
+
+
+async def check_answer_cache(index, args, question: str) -> bool:
+    """Ask the same question twice; the second answer must come from the cache."""
+    kb = KnowledgeBase(
+        index, similarity_top_k=args.top_k, retrieval_mode=args.retrieval_mode, answer_cache=SemanticAnswerCache()
+    )
+    await kb.query(question)
+    response = await kb.query(question)
+    return response.metadata["timing"].cached
+
+
+async def run(args) -> tuple[dict, bool]:
+    Settings.embed_model = HashEmbedding(delay=args.embed_ms / 1000)
+    llm = StubLLM(delay=args.llm_ms / 1000, prompt_tokens=[])
+    Settings.llm = llm
+
+    conversations = load_conversations()
+    results = {}
+    with tempfile.TemporaryDirectory() as persist_dir:
+        ingest(str(DATA_DIR), persist_dir)
+        index = open_index(persist_dir)
+        for strategy in args.strategies:
+            # No answer cache: every question pays for retrieval and synthesis
+            kb = KnowledgeBase(index, similarity_top_k=args.top_k, retrieval_mode=args.retrieval_mode)
+            results[strategy] = summarise(await run_strategy(strategy, kb, llm, conversations))
+        cache_ok = await check_answer_cache(index, args, conversations[0][0][0])
+    return results, cache_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=STRATEGIES)
+    parser.add_argument("--retrieval-mode", default="hybrid", choices=("hybrid", "vector", "lexical"))
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--embed-ms", type=float, default=0.0, help="simulated query embedding latency")
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="simulated LLM latency per call")
+    parser.add_argument("--min-hit-rate", type=float, default=0.0, help="exit non-zero below this hit rate")
+    args = parser.parse_args()
+
+    results, cache_ok = asyncio.run(run(args))
+
+    print(f"retrieval mode: {args.retrieval_mode}, top-k {args.top_k}")
+    print(
+        f"{'strategy':<21}{'questions':>10}{'retr p50 (ms)':>15}{'prompt tok':>12}"
+        f"{'hit rate':>10}{'e2e p50 (ms)':>14}{'e2e p95 (ms)':>14}"
+    )
+    failed = False
+    for strategy, r in results.items():
+        failed |= r["hit_rate"] < args.min_hit_rate
+        print(
+            f"{strategy:<21}{r['questions']:>10}{r['retrieval_p50_ms']:>15.1f}{r['prompt_tokens']:>12.0f}"
+            f"{r['hit_rate']:>10.0%}{r['e2e_p50_ms']:>14.1f}{r['e2e_p95_ms']:>14.1f}"
+        )
+    print(f"answer cache: repeated question {'served from cache' if cache_ok else 'NOT served from cache'}")
+    if failed:
+        print(f"Hit rate below {args.min_hit_rate:.0%}")
+    if failed or not cache_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Order lookups: linear list scan (the old MockOrderService) vs the indexed RecordStore.
+
+Creates N orders in a fresh SQLite store, then times lookups by id, phone and
+date at each size, next to the same lookups as a scan over a plain list.
+Also reports create throughput and how long a second process needs to load
+the store. Run from the repo root:
+
+    python benchmarks/record_store_bench.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from storage import RecordStore
+
+INDEXES = {
+    "phone": lambda r: r.get("phone"),
+    "date": lambda r: (r.get("timestamp") or "")[:10] or None,
+}
+
+
+def make_order(i: int) -> dict:
+    day = date(2024, 1, 1) + timedelta(days=i % 365)
+    return {
+        "timestamp": f"{day.isoformat()}T12:00:00",
+        "status": "confirmed",
+        "phone": f"07{i % 5000:09d}",
+        "items": ["Margherita"],
+    }
+
+
+def per_call_us(fn, keys) -> float:
+    samples = []
+    for key in keys:
+        start = time.perf_counter()
+        fn(key)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def open_store(path: str) -> RecordStore:
+    return RecordStore(path, kind="order", id_field="order_id", id_prefix="ORD", indexes=INDEXES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'orders':>8}{'create/s':>10}{'load (ms)':>11}"
+          f"{'id scan':>10}{'id idx':>9}{'phone scan':>12}{'phone idx':>11}{'date scan':>11}{'date idx':>10}  (us, p50)")
+    for size in sorted(args.sizes):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "orders.sqlite")
+            store = open_store(path)
+            orders = []
+            start = time.perf_counter()
+            for i in range(size):
+                orders.append(store.create(make_order(i)))
+            create_rate = size / (time.perf_counter() - start)
+
+            # What another worker pays to pick up the existing log
+            start = time.perf_counter()
+            other = open_store(path)
+            load_ms = (time.perf_counter() - start) * 1000
+            assert len(other) == size
+            other.close()
+
+            rng = random.Random(0)
+            ids = [orders[rng.randrange(size)]["order_id"] for _ in range(args.lookups)]
+            phones = [orders[rng.randrange(size)]["phone"] for _ in range(args.lookups)]
+            dates = [orders[rng.randrange(size)]["timestamp"][:10] for _ in range(args.lookups)]
+
+            def scan_id(order_id):
+                for order in orders:
+                    if order["order_id"] == order_id:
+                        return order
+                return None
+
+            row = [
+                per_call_us(scan_id, ids),
+                per_call_us(store.get, ids),
+                per_call_us(lambda p: [o for o in orders if o["phone"] == p], phones),
+                per_call_us(lambda p: store.find("phone", p), phones),
+                per_call_us(lambda d: [o for o in orders if o["timestamp"][:10] == d], dates),
+                per_call_us(lambda d: store.find("date", d), dates),
+            ]
+            store.close()
+        print(f"{size:>8}{create_rate:>10.0f}{load_ms:>11.0f}"
+              f"{row[0]:>10.1f}{row[1]:>9.1f}{row[2]:>12.1f}{row[3]:>11.1f}{row[4]:>11.1f}{row[5]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Time to first audio with the basic sentence tokenizer vs the latency-aware chunker.
+
+Replays LLM token streams (text deltas with their arrival offsets, one reply
+per line of ``--streams``) into each tokenizer's stream and notes when every
+chunk is released to TTS. TTS is modelled the way tts.StreamAdapter drives
+it: chunks are synthesized one after another, each taking ``--ttfb-ms``
+before audio starts and finishing at ``--speed`` x real time. Reports time
+to first audio from the first LLM token, playback stalls between chunks,
+and any price, postcode or phone number split across chunks. Run from the
+repo root:
+
+    python benchmarks/tts_chunking_bench.py --ttfb-ms 250 --speed 4
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from pathlib import Path
+
+from livekit.agents import tokenize
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from tts.chunker import PROTECTED_SPANS, LatencyAwareChunker
+
+STREAMS_FILE = ROOT / "benchmarks" / "data" / "llm_token_streams.jsonl"
+# Spoken English at roughly 15 characters per second
+SPEECH_MS_PER_CHAR = 65
+
+
+async def chunk_times(tokenizer: tokenize.SentenceTokenizer, deltas: list) -> list[tuple[float, str]]:
+    """(ms since first token, chunk) for every chunk the tokenizer releases."""
+    stream = tokenizer.stream()
+    now = 0.0
+    released = []
+
+    async def _read():
+        async for ev in stream:
+            released.append((now, ev.token))
+
+    reader = asyncio.create_task(_read())
+    for offset, text in deltas:
+        now = offset
+        stream.push_text(text)
+        for _ in range(3):
+            await asyncio.sleep(0)
+    stream.end_input()
+    await reader
+    return released
+
+
+def play(released: list[tuple[float, str]], ttfb_ms: float, speed: float) -> tuple[float, float]:
+    """Time to first audio and total stall (ms) for chunks synthesized back to back."""
+    synth_free = 0.0
+    playing_until = None
+    first_audio = None
+    stalls = 0.0
+    for at, chunk in released:
+        duration = len(chunk) * SPEECH_MS_PER_CHAR
+        start = max(at, synth_free)
+        audio_at = start + ttfb_ms
+        synth_free = audio_at + duration / speed
+        if first_audio is None:
+            first_audio = audio_at
+            playing_until = audio_at + duration
+        else:
+            stalls += max(0.0, audio_at - playing_until)
+            playing_until = max(audio_at, playing_until) + duration
+    return first_audio, stalls
+
+
+def split_spans(text: str, chunks: list[str]) -> int:
+    """Prices, postcodes and phone numbers in ``text`` that no single chunk contains whole."""
+    return sum(
+        1
+        for m in PROTECTED_SPANS.finditer(text)
+        if any(c.isdigit() for c in m.group()) and not any(m.group().strip() in chunk for chunk in chunks)
+    )
+
+
+async def run(args):
+    streams = [json.loads(line) for line in Path(args.streams).read_text().splitlines() if line.strip()]
+    tokenizers = {
+        "basic": tokenize.basic.SentenceTokenizer(),
+        "chunker": LatencyAwareChunker(),
+    }
+    results = {mode: {"ttfa": [], "stall": [], "chunks": 0, "split": 0} for mode in tokenizers}
+    for s in streams:
+        text = "".join(d for _, d in s["deltas"])
+        for mode, tokenizer in tokenizers.items():
+            released = await chunk_times(tokenizer, s["deltas"])
+            ttfa, stall = play(released, args.ttfb_ms, args.speed)
+            r = results[mode]
+            r["ttfa"].append(ttfa)
+            r["stall"].append(stall)
+            r["chunks"] += len(released)
+            r["split"] += split_spans(text, [c for _, c in released])
+            if args.verbose:
+                print(f"{s['name']:<16}{mode:<9}{ttfa:>7.0f} ms  {[c for _, c in released]}")
+    return len(streams), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", default=str(STREAMS_FILE), help="JSONL of {name, deltas: [[offset_ms, text], ...]}")
+    parser.add_argument("--ttfb-ms", type=float, default=250.0, help="TTS time to first byte per chunk")
+    parser.add_argument("--speed", type=float, default=4.0, help="synthesis speed relative to real time")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every reply's chunks")
+    args = parser.parse_args()
+
+    count, results = asyncio.run(run(args))
+    print(f"{count} replies, TTS first byte {args.ttfb_ms:.0f} ms, {args.speed:g}x real time")
+    print(f"{'mode':<10}{'TTFA p50 (ms)':>15}{'TTFA max (ms)':>15}{'stall total (ms)':>18}{'chunks':>8}{'split':>7}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<10}{statistics.median(r['ttfa']):>15.0f}{max(r['ttfa']):>15.0f}"
+            f"{sum(r['stall']):>18.0f}{r['chunks']:>8}{r['split']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
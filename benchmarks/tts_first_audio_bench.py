@@ -0,0 +1,116 @@
+"""Time to first audio: buffered ElevenLabs synthesis (old wrapper) vs the streaming backend.
+
+A local aiohttp server stands in for the ElevenLabs stream endpoint: it waits
+``--first-byte-ms`` and then sends PCM in odd-sized chunks at ``--speed`` x
+real time. "buffered" reads the whole response before framing it, which is
+what the old create_elevenlabs_tts did. "streaming" is tts.elevenlabs_tts,
+which emits 20 ms frames as soon as they arrive. The script also checks that
+the frames add up to the exact bytes sent. Run from the repo root:
+
+    python benchmarks/tts_first_audio_bench.py --runs 10 --first-byte-ms 150
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from tts.audio import PcmFramer
+from tts.elevenlabs_tts import ElevenLabsTTS
+
+SAMPLE_RATE = 24000
+TEXT = "Hi, this is Emily from No Ordinary Hair and Beauty Salon. How can I help you today?"
+
+
+def fake_pcm(seconds: float) -> bytes:
+    samples = int(SAMPLE_RATE * seconds)
+    return bytes((i * 7) % 256 for i in range(samples * 2))
+
+
+def make_app(audio: bytes, first_byte_ms: float, speed: float) -> web.Application:
+    async def stream(request: web.Request) -> web.StreamResponse:
+        await request.json()
+        await asyncio.sleep(first_byte_ms / 1000)
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        offset, sizes, i = 0, (4099, 1023, 8191, 3), 0
+        while offset < len(audio):
+            chunk = audio[offset:offset + sizes[i % len(sizes)]]
+            offset += len(chunk)
+            i += 1
+            await resp.write(chunk)
+            # Synthesis runs faster than real time, but not infinitely fast
+            await asyncio.sleep(len(chunk) / 2 / SAMPLE_RATE / speed)
+        await resp.write_eof()
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/v1/text-to-speech/{voice}/stream", stream)
+    return app
+
+
+async def buffered(session: aiohttp.ClientSession, url: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    async with session.post(url, json={"text": TEXT}) as resp:
+        data = await resp.read()
+    framer = PcmFramer(SAMPLE_RATE)
+    frames = [*framer.push(data), *framer.flush()]
+    return (time.perf_counter() - start) * 1000, sum(len(f.data) * 2 for f in frames)
+
+
+async def streaming(engine: ElevenLabsTTS) -> tuple[float, int]:
+    start = time.perf_counter()
+    first = None
+    total = 0
+    async for audio in engine.synthesize(TEXT):
+        if first is None:
+            first = (time.perf_counter() - start) * 1000
+        total += len(audio.frame.data) * 2
+    return first, total
+
+
+async def run(args):
+    audio = fake_pcm(args.seconds)
+    runner = web.AppRunner(make_app(audio, args.first_byte_ms, args.speed))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    results = {"buffered": [], "streaming": []}
+    async with aiohttp.ClientSession() as session:
+        engine = ElevenLabsTTS(api_key="fake", voice_id="bench", base_url=base_url, http_session=session)
+        for _ in range(args.runs):
+            ms, size = await buffered(session, f"{base_url}/v1/text-to-speech/bench/stream")
+            assert size == len(audio), (size, len(audio))
+            results["buffered"].append(ms)
+            ms, size = await streaming(engine)
+            assert size == len(audio), (size, len(audio))
+            results["streaming"].append(ms)
+    await runner.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of the synthesized utterance")
+    parser.add_argument("--first-byte-ms", type=float, default=150.0)
+    parser.add_argument("--speed", type=float, default=4.0, help="synthesis speed relative to real time")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{args.seconds:.1f}s utterance, first byte after {args.first_byte_ms:.0f} ms, {args.speed:g}x real time")
+    print(f"{'mode':<12}{'TTFA p50 (ms)':>15}{'TTFA max (ms)':>15}")
+    for mode, samples in results.items():
+        print(f"{mode:<12}{statistics.median(samples):>15.1f}{max(samples):>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
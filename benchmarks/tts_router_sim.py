@@ -0,0 +1,197 @@
+"""TTS routing vs the old FallbackAdapter, against local fake providers with injected latency and failures.
+
+Three fake providers stand in for openai, deepgram and elevenlabs. Each one
+waits a jittered time to first byte and then streams 20 ms frames. Over the
+run:
+
+- "openai" starts fastest, slows to ``--degrade-factor`` x after a third
+  of the utterances, and errors on ``--error-rate`` of requests.
+- "deepgram" has an outage through the middle third. During the outage it
+  either refuses connections or, with --hang, accepts them and never
+  sends audio.
+- "elevenlabs" is steady.
+
+The same utterance sequence goes through tts.router.TTSRouter and through
+``tts.FallbackAdapter([openai, deepgram, elevenlabs])``. The script reports
+time to first audio, failed utterances and which provider served each
+third. Time is scaled down by ``--time-scale`` so a run takes seconds, and
+the reported times are scaled back up. Run from the repo root:
+
+    python benchmarks/tts_router_sim.py --utterances 300 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from livekit import rtc
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectionError, APIConnectOptions, APIStatusError, tts, utils
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from tts.router import TTSRouter
+
+SAMPLE_RATE = 24000
+FRAME_SAMPLES = SAMPLE_RATE // 50
+
+
+class FakeTTS(tts.TTS):
+    def __init__(self, name: str, clock: "Clock", ttfb_ms, fail, hang, frames: int = 25):
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=SAMPLE_RATE, num_channels=1)
+        self._label = name
+        self.name = name
+        self.clock = clock
+        self.ttfb_ms = ttfb_ms  # (utterance index) -> ms
+        self.fail = fail  # (utterance index) -> bool
+        self.hang = hang  # (utterance index) -> bool
+        self.frames = frames
+        self.requests = 0
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "FakeStream":
+        self.requests += 1
+        return FakeStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeStream(tts.ChunkedStream):
+    def __init__(self, *, tts: FakeTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._fake = tts
+
+    async def _run(self):
+        fake = self._fake
+        i = fake.clock.utterance
+        if fake.fail(i):
+            await fake.clock.sleep(random.uniform(20, 80))
+            raise APIStatusError(f"{fake.name} returned 503", status_code=503, request_id=None, body=None)
+        if fake.hang(i):
+            await asyncio.Event().wait()
+        await fake.clock.sleep(fake.ttfb_ms(i))
+        request_id = f"{fake.name}-{utils.shortuuid()}"
+        for _ in range(fake.frames):
+            frame = rtc.AudioFrame(
+                data=bytes(FRAME_SAMPLES * 2), sample_rate=SAMPLE_RATE, num_channels=1, samples_per_channel=FRAME_SAMPLES
+            )
+            self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+            await fake.clock.sleep(5)
+
+
+class Clock:
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.utterance = 0
+
+    async def sleep(self, ms: float):
+        await asyncio.sleep(ms / 1000 / self.scale)
+
+
+def providers(args, clock: Clock) -> list[FakeTTS]:
+    n = args.utterances
+    third = n // 3
+    rng = random.Random(args.seed)
+
+    def jitter(base):
+        return lambda i: base(i) * rng.lognormvariate(0, 0.25)
+
+    outage = (lambda i: third <= i < 2 * third)
+    return [
+        FakeTTS(
+            "openai",
+            clock,
+            jitter(lambda i: 300 * (args.degrade_factor if i >= third else 1)),
+            fail=lambda i: rng.random() < args.error_rate,
+            hang=lambda i: False,
+        ),
+        FakeTTS(
+            "deepgram",
+            clock,
+            jitter(lambda i: 380),
+            fail=lambda i: outage(i) and not args.hang,
+            hang=lambda i: outage(i) and args.hang,
+        ),
+        FakeTTS("elevenlabs", clock, jitter(lambda i: 450), fail=lambda i: False, hang=lambda i: False),
+    ]
+
+
+async def speak(engine: tts.TTS, text: str) -> tuple[float, str]:
+    """Time to first audio (s) and the provider that served it ('' if none did)."""
+    start = time.perf_counter()
+    first = None
+    provider = ""
+    try:
+        async for audio in engine.synthesize(text):
+            if first is None:
+                first = time.perf_counter() - start
+                provider = audio.request_id.split("-")[0]
+    except APIConnectionError:
+        return time.perf_counter() - start, ""
+    return (first if first is not None else time.perf_counter() - start), provider
+
+
+async def simulate(mode: str, args) -> dict:
+    clock = Clock(args.time_scale)
+    fakes = providers(args, clock)
+    if mode == "router":
+        engine = TTSRouter(
+            {f.name: f for f in fakes},
+            first_byte_timeout=args.first_byte_timeout / args.time_scale,
+            cooldown=args.cooldown / args.time_scale,
+            probe_interval=args.probe_interval / args.time_scale,
+        )
+        engine.start()
+        await clock.sleep(1000)
+    else:
+        engine = tts.FallbackAdapter(
+            fakes, attempt_timeout=args.first_byte_timeout / args.time_scale, retry_interval=5 / args.time_scale
+        )
+
+    ttfa, failed, served = [], 0, [Counter(), Counter(), Counter()]
+    third = max(1, args.utterances // 3)
+    for i in range(args.utterances):
+        clock.utterance = i
+        seconds, provider = await speak(engine, f"Utterance number {i}.")
+        if provider:
+            ttfa.append(seconds * 1000 * args.time_scale)
+            served[min(i // third, 2)][provider] += 1
+        else:
+            failed += 1
+        # A caller listens for a couple of seconds between sentences
+        await clock.sleep(args.gap_ms)
+    await engine.aclose()
+    return {"ttfa": ttfa, "failed": failed, "served": served}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="openai request failure rate")
+    parser.add_argument("--degrade-factor", type=float, default=3.0, help="openai slowdown after the first third")
+    parser.add_argument("--hang", action="store_true", help="deepgram's outage hangs instead of refusing")
+    parser.add_argument("--first-byte-timeout", type=float, default=2.0, help="seconds, router and fallback attempt timeout")
+    parser.add_argument("--cooldown", type=float, default=15.0, help="seconds a failed provider is benched")
+    parser.add_argument("--probe-interval", type=float, default=30.0, help="seconds between probes of idle providers")
+    parser.add_argument("--gap-ms", type=float, default=2000.0, help="simulated time between utterances")
+    parser.add_argument("--time-scale", type=float, default=50.0, help="run this many times faster than real time")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    # FallbackAdapter logs every failed attempt with a traceback
+    logging.getLogger("livekit.agents").setLevel(logging.ERROR)
+
+    print(
+        f"{args.utterances} utterances, openai error rate {args.error_rate:.0%}, "
+        f"{args.degrade_factor:g}x slower after 1/3, deepgram {'hangs' if args.hang else 'down'} in the middle third"
+    )
+    print(f"{'mode':<10}{'TTFA p50 (ms)':>15}{'TTFA p95 (ms)':>15}{'failed':>8}   served (per third)")
+    for mode in ("fallback", "router"):
+        r = asyncio.run(simulate(mode, args))
+        ttfa = sorted(r["ttfa"])
+        p95 = ttfa[min(len(ttfa) - 1, int(len(ttfa) * 0.95))] if ttfa else float("nan")
+        served = " | ".join(", ".join(f"{k} {v}" for k, v in c.most_common()) for c in r["served"])
+        print(f"{mode:<10}{statistics.median(ttfa):>15.0f}{p95:>15.0f}{r['failed']:>8}   {served}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Job distribution across agent replicas, with and without the worker load signal.
+
+Simulates the three ``agent.py`` replicas from docker-compose.yml receiving
+a stream of fake rooms. Rooms arrive at random and stay for a random time.
+Some are "heavy": they run VAD and the EOU model and cost
+``--heavy-cpu`` of a worker's CPU, while light rooms cost ``--light-cpu``.
+Once a worker's CPU demand goes past what it has, its job processes fall
+behind. Their event-loop lag and inference queues grow, and every room on
+that worker hears it.
+
+- "baseline" is the current deployment. The workers report no load, and
+  each room goes to a random worker, which always accepts it.
+- "load" uses assistant.worker_load.WorkerLoad on every worker. The
+  dispatcher offers each room to available workers, lowest reported load
+  first. It sees loads as of the last report, made every ``--report-interval``
+  seconds. A worker that is over its threshold rejects the job in
+  ``request_fnc``. A room that no worker accepts waits and is offered again.
+
+Job processes write their lag and queue depth to report files, and the
+worker reads them, just as in production. CPU is injected, and
+worker_load's clock is swapped for the simulated one, so a run takes
+seconds. The script reports sessions per worker, peak CPU, how many
+room-seconds were spent on a saturated worker, rejections and how long
+rooms waited for a worker. Run from the repo root:
+
+    python benchmarks/worker_load_sim.py --rooms 200 --mean-gap 5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import math
+import random
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import assistant.worker_load as worker_load
+from assistant.worker_load import WorkerLoad, write_report
+
+TICK = 0.5
+# CPU the worker process itself uses with no rooms
+IDLE_CPU = 0.05
+# Past this CPU demand job processes start falling behind
+SATURATION = 0.85
+
+
+class SimClock:
+    """Replaces the ``time`` module inside worker_load."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+class Room:
+    def __init__(self, name: str, arrives: float, duration: float, heavy: bool, cpu: float):
+        self.name = name
+        # Shaped like livekit.agents.RunningJobInfo, as found in worker.active_jobs
+        self.job = SimpleNamespace(id=name)
+        self.arrives = arrives
+        self.duration = duration
+        self.heavy = heavy
+        self.cpu = cpu
+        self.started = None
+        self.rejections = 0
+
+
+class FakeWorker:
+    def __init__(self, name: str, directory: str, args):
+        self.name = name
+        self.directory = directory
+        self.active_jobs: list[Room] = []
+        self.served = 0
+        self.peak_cpu = 0.0
+        self.peak_sessions = 0
+        self.reported = 0.0
+        self.load = WorkerLoad(
+            threshold=args.threshold, max_sessions=args.max_sessions, cpu=self.cpu, directory=directory
+        )
+
+    def demand(self) -> float:
+        return IDLE_CPU + sum(room.cpu for room in self.active_jobs)
+
+    def cpu(self) -> float:
+        return min(1.0, self.demand())
+
+    def saturated(self) -> bool:
+        return self.demand() > SATURATION
+
+    def write_reports(self):
+        demand = self.demand()
+        lag_ms = 20 + max(0.0, demand - SATURATION) * 1500
+        for room in self.active_jobs:
+            queue = max(0, round((demand - 0.7) * 20)) if room.heavy else 0
+            write_report(self.directory, room.name, lag_ms, queue)
+
+    def finish(self, room: Room):
+        self.active_jobs.remove(room)
+        Path(self.directory, f"{room.name}.json").unlink(missing_ok=True)
+
+
+class FakeRequest:
+    """Stands in for livekit.agents.JobRequest."""
+
+    def __init__(self, room: Room):
+        self.id = room.name
+        self.accepted = None
+
+    async def accept(self):
+        self.accepted = True
+
+    async def reject(self):
+        self.accepted = False
+
+
+def make_rooms(args) -> list[Room]:
+    rng = random.Random(args.seed)
+    rooms, t = [], 0.0
+    for i in range(args.rooms):
+        t += rng.expovariate(1 / args.mean_gap)
+        arrives = math.ceil(t / TICK) * TICK
+        heavy = rng.random() < args.heavy_share
+        rooms.append(
+            Room(
+                f"room-{i}",
+                arrives,
+                rng.uniform(args.min_duration, args.max_duration),
+                heavy,
+                args.heavy_cpu if heavy else args.light_cpu,
+            )
+        )
+    return rooms
+
+
+async def simulate(mode: str, args) -> dict:
+    clock = SimClock()
+    worker_load.time = clock
+    rng = random.Random(args.seed + 1)
+    rooms = make_rooms(args)
+    all_rooms = list(rooms)
+    waiting: list[Room] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workers = [FakeWorker(f"agent{i + 1}", str(Path(tmp, f"agent{i + 1}")), args) for i in range(args.workers)]
+        next_report = 0.0
+        saturated_room_s = room_s = 0.0
+        while rooms or waiting or any(w.active_jobs for w in workers):
+            now = clock.now
+            for w in workers:
+                for room in [r for r in w.active_jobs if now - r.started >= r.duration]:
+                    w.finish(room)
+                w.write_reports()
+
+            if mode == "load" and now >= next_report:
+                # The worker's load_fnc runs every few seconds and the dispatcher only sees that value
+                for w in workers:
+                    w.reported = await asyncio.to_thread(w.load, w)
+                next_report = now + args.report_interval
+
+            while rooms and rooms[0].arrives <= now:
+                waiting.append(rooms.pop(0))
+            still_waiting = []
+            for room in waiting:
+                if mode == "baseline":
+                    target = rng.choice(workers)
+                else:
+                    available = [w for w in workers if w.reported < args.threshold]
+                    rng.shuffle(available)
+                    target = None
+                    for w in sorted(available, key=lambda w: w.reported):
+                        req = FakeRequest(room)
+                        await w.load.admit(req)
+                        if req.accepted:
+                            target = w
+                            break
+                        room.rejections += 1
+                if target is None:
+                    still_waiting.append(room)
+                    continue
+                room.started = now
+                target.active_jobs.append(room)
+                target.served += 1
+            waiting = still_waiting
+
+            for w in workers:
+                w.peak_cpu = max(w.peak_cpu, w.demand())
+                w.peak_sessions = max(w.peak_sessions, len(w.active_jobs))
+                room_s += len(w.active_jobs) * TICK
+                if w.saturated():
+                    saturated_room_s += len(w.active_jobs) * TICK
+            clock.now += TICK
+
+    return {
+        "workers": workers,
+        "saturated": saturated_room_s / room_s if room_s else 0.0,
+        "rejections": sum(room.rejections for room in all_rooms),
+        "waits": sorted(room.started - room.arrives for room in all_rooms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--mean-gap", type=float, default=5.0, help="mean seconds between room arrivals")
+    parser.add_argument("--min-duration", type=float, default=15.0, help="seconds")
+    parser.add_argument("--max-duration", type=float, default=45.0, help="seconds")
+    parser.add_argument("--heavy-share", type=float, default=0.4, help="share of rooms running VAD + EOU")
+    parser.add_argument("--heavy-cpu", type=float, default=0.22, help="CPU share of a heavy room")
+    parser.add_argument("--light-cpu", type=float, default=0.08, help="CPU share of a light room")
+    parser.add_argument("--threshold", type=float, default=worker_load.LOAD_THRESHOLD)
+    parser.add_argument("--max-sessions", type=int, default=worker_load.MAX_SESSIONS)
+    parser.add_argument("--report-interval", type=float, default=2.5, help="seconds between load reports")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(
+        f"{args.rooms} rooms over {args.workers} workers, one every {args.mean_gap:g}s on average, "
+        f"{args.heavy_share:.0%} heavy, threshold {args.threshold:g}, {args.max_sessions} sessions per worker"
+    )
+    for mode in ("baseline", "load"):
+        # Rejections are logged from request_fnc; the counts below are enough here
+        with contextlib.redirect_stdout(io.StringIO()):
+            r = asyncio.run(simulate(mode, args))
+        waits = r["waits"]
+        print(
+            f"\n{mode}: {r['saturated']:.1%} of room time on a saturated worker, {r['rejections']} rejections, "
+            f"wait p50 {statistics.median(waits):.1f}s, p95 {waits[int(len(waits) * 0.95)]:.1f}s, "
+            f"max {waits[-1]:.1f}s"
+        )
+        print(f"  {'worker':<9}{'sessions':>9}{'peak':>6}{'peak CPU':>10}")
+        for w in r["workers"]:
+            print(f"  {w.name:<9}{w.served:>9}{w.peak_sessions:>6}{w.peak_cpu:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
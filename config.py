@@ -8,7 +8,16 @@ def load_config():
         "livekit_api_key": os.getenv("LIVEKIT_API_KEY"),
         "livekit_api_secret": os.getenv("LIVEKIT_API_SECRET"),
         "tts_provider": os.getenv("TTS_PROVIDER", "openai"),
+        "tts_providers": os.getenv("TTS_PROVIDERS", "openai,deepgram"),  # pool used when tts_provider is "router"
         "webhook_url": os.getenv("WEBHOOK_URL"),
         "gpt_model": os.getenv("GPT_MODEL", "gpt-4o-mini"),  # Default to gpt-4o-mini if not specified
         "openai_tts_voice": os.getenv("OPENAI_TTS_VOICE", "alloy"),  # Default to alloy if not specified
+        "elevenlabs_api_key": os.getenv("ELEVENLABS_API_KEY") or os.getenv("ELEVEN_API_KEY"),
+        "elevenlabs_voice_id": os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM"),  # Rachel
+        "elevenlabs_model": os.getenv("ELEVENLABS_MODEL", "eleven_turbo_v2_5"),
+        "elevenlabs_base_url": os.getenv("ELEVENLABS_BASE_URL"),  # override to point at a proxy or local fake
+        "deepgram_tts_model": os.getenv("DEEPGRAM_TTS_MODEL", "aura-asteria-en"),
+        "embedding_backend": os.getenv("EMBEDDING_BACKEND", "openai"),  # "openai" or "local" (sentence-transformers on CPU)
+        "local_embedding_model": os.getenv("LOCAL_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5"),
+        "embedding_cache": os.getenv("EMBEDDING_CACHE", "./.embedding-cache/embeddings.sqlite"),  # empty disables the cache
     }
\ No newline at end of file
@@ -0,0 +1,10 @@
+from .answer_cache import SemanticAnswerCache
+from .context import ContextInjector, is_knowledge_question
+from .embeddings import CachedEmbedding, EmbeddingCache, LocalEmbedding, configure_embeddings
+from .hybrid import HybridRetriever
+from .index import build_index, current_snapshot, load_index, open_index
+from .ingest import IngestStats, ingest
+from .lexical import BM25Index
+from .service import KnowledgeBase, QueryTiming, get_knowledge_base
+from .speculative import SpeculativeRetriever
+from .vector_store import MmapVectorStore
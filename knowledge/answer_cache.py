@@ -0,0 +1,129 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+DEFAULT_THRESHOLD = float(os.getenv("KB_CACHE_THRESHOLD", "0.95"))
+DEFAULT_TTL = float(os.getenv("KB_CACHE_TTL", "3600"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("KB_CACHE_SIZE", "256"))
+
+
+def normalise_question(text: str) -> str:
+    text = re.sub(r"['’]", "", text.lower())
+    return re.sub(r"[^a-z0-9£$%]+", " ", text).strip()
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    embedding: Optional[np.ndarray]
+    created: float
+    index_version: int
+
+
+class SemanticAnswerCache:
+    """LRU cache of knowledge-base answers, matched by question embedding.
+
+    An exact (normalised) repeat of a question is answered without touching
+    the embedding; otherwise the closest cached question above ``threshold``
+    cosine similarity wins. Entries expire after ``ttl`` seconds and are
+    dropped whenever the index version they were answered against changes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: list[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _evict_expired(self, now: float, index_version: int):
+        stale = [
+            key for key, entry in self._entries.items()
+            if now - entry.created > self.ttl or entry.index_version != index_version
+        ]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._matrix = None
+
+    def _hit(self, key: str) -> str:
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key].answer
+
+    def lookup_exact(self, question: str, index_version: int = 0) -> Optional[str]:
+        """Cheap check for a verbatim repeat, before any embedding is computed."""
+        key = normalise_question(question)
+        with self._lock:
+            self._evict_expired(time.monotonic(), index_version)
+            if key in self._entries:
+                return self._hit(key)
+        return None
+
+    def lookup(self, question: str, embedding: Sequence[float], index_version: int = 0) -> Optional[str]:
+        key = normalise_question(question)
+        with self._lock:
+            self._evict_expired(time.monotonic(), index_version)
+            if key in self._entries:
+                return self._hit(key)
+            if self._matrix is None:
+                # Answers stored without an embedding only match exact repeats
+                self._keys = [k for k, entry in self._entries.items() if entry.embedding is not None]
+                self._matrix = np.stack([self._entries[k].embedding for k in self._keys]) if self._keys else None
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            scores = self._matrix @ self._unit(embedding)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                return self._hit(self._keys[best])
+            self.misses += 1
+            return None
+
+    def store(self, question: str, embedding: Optional[Sequence[float]], answer: str, index_version: int = 0):
+        if self.max_entries <= 0:
+            return
+        key = normalise_question(question)
+        with self._lock:
+            self._entries[key] = CachedAnswer(
+                question=question,
+                answer=answer,
+                embedding=self._unit(embedding) if embedding is not None else None,
+                created=time.monotonic(),
+                index_version=index_version,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from llama_index.core.schema import NodeWithScore
+
+from .answer_cache import normalise_question
+from .hybrid import vector_similarity
+
+# Upper bound on knowledge text added to the system prompt (estimated tokens)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("KB_CONTEXT_TOKENS", "600"))
+# Retrieved chunks whose vector (cosine) similarity is below this are not
+# injected. Fused and lexical scores are ranks, not similarities, so chunks
+# found by BM25 alone are kept: the lexical confidence gate vouches for them.
+MIN_SCORE = float(os.getenv("KB_MIN_SCORE", "0.0"))
+
+CONTEXT_HEADER = "\n\nContext that might help answer the user's question:"
+
+# Turns that are pure small talk or the caller handing over their own details
+_SMALL_TALK = re.compile(
+    r"^(hi|hello|hey|yes|yeah|yep|no|nope|ok|okay|sure|thanks|thank you|thank you so much|"
+    r"great|perfect|cool|fine|alright|bye|goodbye|good morning|good afternoon|good evening|"
+    r"thats all|thats it|sounds good|of course|please|sorry|pardon|hmm|um|uh)( [a-z]+)?$"
+)
+_PERSONAL_DETAILS = re.compile(
+    r"(@|\b(my name is|my names|im called|call me|my email|my number|my phone|my address)\b|\d{5,})"
+)
+_QUESTION_WORDS = re.compile(
+    r"\b(what|which|when|where|who|why|how|do|does|can|could|is|are|any|price|cost|open|offer|tell|explain)\b"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def is_knowledge_question(text: str) -> bool:
+    """Cheap check for turns where retrieval cannot help (greetings, acks, details)."""
+    normalised = normalise_question(text)
+    if not normalised or _SMALL_TALK.match(normalised):
+        return False
+    if _PERSONAL_DETAILS.search(text.lower()) and "?" not in text:
+        return False
+    return "?" in text or len(normalised.split()) > 3 or bool(_QUESTION_WORDS.search(normalised))
+
+
+class ContextInjector:
+    """Builds the retrieval-augmented system prompt for one call.
+
+    Retrieved chunks are ranked by score, deduplicated (by node and by text)
+    and kept in a most-recently-relevant working set capped at
+    ``token_budget``. Chunks injected on earlier turns stay in place, so the
+    prompt string is only rebuilt when that set changes, and retrieval is
+    skipped for turns that are clearly not knowledge questions. With a
+    ``speculative`` retriever, results warmed from interim transcripts are used
+    when they match the final one.
+    """
+
+    def __init__(
+        self,
+        kb,
+        system_prompt: str,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        min_score: float = MIN_SCORE,
+        speculative=None,
+    ):
+        self.kb = kb
+        self.speculative = speculative
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.min_score = min_score
+        self.skipped = 0
+        self.retrieved = 0
+        # text hash -> rendered chunk, oldest relevance first
+        self._chunks: OrderedDict[str, str] = OrderedDict()
+        self._tokens = 0
+        self._prompt = system_prompt
+        self._kb_version = kb.version
+
+    @property
+    def prompt(self) -> str:
+        return self._prompt
+
+    async def prompt_for(self, user_text: str) -> str:
+        """Return the system prompt to use for this user turn."""
+        if not is_knowledge_question(user_text):
+            if self.speculative is not None:
+                self.speculative.cancel()
+            self.skipped += 1
+            return self._prompt
+
+        start = time.perf_counter()
+        nodes = await self.speculative.take(user_text) if self.speculative is not None else None
+        if nodes is None:
+            nodes = await self.kb.retrieve(user_text)
+        self.retrieved += 1
+        if self.kb.version != self._kb_version:
+            # Snapshot reloaded: earlier chunks may be stale
+            self._kb_version = self.kb.version
+            self._chunks.clear()
+            self._tokens = 0
+        if self._add(nodes):
+            self._prompt = self.system_prompt + CONTEXT_HEADER + "".join(
+                f"\n\n{text}" for text in self._chunks.values()
+            )
+        print(
+            f"Context injection: {len(self._chunks)} chunks, ~{self._tokens} tokens "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return self._prompt
+
+    def _relevant(self, node: NodeWithScore) -> bool:
+        similarity = vector_similarity(node)
+        return similarity is None or similarity >= self.min_score
+
+    def _add(self, nodes: list[NodeWithScore]) -> bool:
+        ranked = sorted(
+            (n for n in nodes if self._relevant(n)),
+            key=lambda n: n.score or 0.0,
+        )
+        changed = False
+        # Lowest score first so the best match ends up most recent
+        for node in ranked:
+            text = self.kb.render(node.node)
+            key = hashlib.sha1(text.encode()).hexdigest()
+            if key in self._chunks:
+                self._chunks.move_to_end(key)
+                continue
+            limit = self.token_budget * 4
+            if len(text) > limit:
+                text = text[:limit]
+            self._chunks[key] = text
+            self._tokens += estimate_tokens(text)
+            changed = True
+
+        while self._tokens > self.token_budget and len(self._chunks) > 1:
+            _, evicted = self._chunks.popitem(last=False)
+            self._tokens -= estimate_tokens(evicted)
+            changed = True
+        return changed
+
+    def stats(self) -> dict:
+        return {
+            "retrieved_turns": self.retrieved,
+            "skipped_turns": self.skipped,
+            "chunks": len(self._chunks),
+            "tokens": self._tokens,
+        }
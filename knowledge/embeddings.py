@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Optional
+
+import numpy as np
+from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+# Written into every snapshot; a store embedded by a different model is rebuilt
+EMBED_MODEL_FILE = "EMBED_MODEL"
+LOCAL_BACKEND = "local"
+OPENAI_BACKEND = "openai"
+
+
+def embedding_id(embed_model: BaseEmbedding) -> str:
+    model = embed_model.inner if isinstance(embed_model, CachedEmbedding) else embed_model
+    return f"{model.class_name()}:{model.model_name}"
+
+
+def stored_embedding_id(path: str) -> Optional[str]:
+    """Embedding id recorded in a snapshot; stores predating it used OpenAI."""
+    try:
+        with open(os.path.join(path, EMBED_MODEL_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def compatible(path: str, embed_model: BaseEmbedding) -> bool:
+    stored = stored_embedding_id(path)
+    if stored is None:
+        return embedding_id(embed_model).startswith("OpenAIEmbedding:")
+    return stored == embedding_id(embed_model)
+
+
+class LocalEmbedding(BaseEmbedding):
+    """sentence-transformers model run in-process on CPU, batched."""
+
+    device: str = "cpu"
+    normalize: bool = True
+    _model: Any = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr()
+
+    def __init__(self, model_name: str = "BAAI/bge-small-en-v1.5", **kwargs: Any):
+        super().__init__(model_name=model_name, **kwargs)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("EMBEDDING_BACKEND=local requires sentence-transformers") from e
+        self._model = SentenceTransformer(model_name, device=self.device)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalEmbedding"
+
+    def _encode(self, texts: list[str]) -> list[list[float]]:
+        # One forward pass at a time; torch already uses every core for it
+        with self._lock:
+            vectors = self._model.encode(
+                texts,
+                batch_size=self.embed_batch_size,
+                normalize_embeddings=self.normalize,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        return vectors.tolist()
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        return self._encode([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        # Off the event loop so audio and VAD keep running during the forward pass
+        return await asyncio.to_thread(self._get_query_embedding, query)
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._encode([text])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return self._encode(texts)
+
+
+class EmbeddingCache:
+    """On-disk float32 embeddings keyed by a hash of (model, kind, text)."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{kind}\0{text}".encode()).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((k, np.frombuffer(v, dtype=np.float32).tolist()) for k, v in rows)
+        return found
+
+    def put_many(self, items: dict[str, list[float]]):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items.items()],
+            )
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Wraps an embedding model with an on-disk cache; only unseen text is embedded."""
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, cache: EmbeddingCache, **kwargs: Any):
+        super().__init__(model_name=inner.model_name, embed_batch_size=inner.embed_batch_size, **kwargs)
+        self._inner = inner
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def inner(self) -> BaseEmbedding:
+        return self._inner
+
+    def _cached(self, kind: str, texts: list[str], embed) -> list[list[float]]:
+        model = embedding_id(self._inner)
+        keys = [EmbeddingCache.key(model, kind, t) for t in texts]
+        found = self._cache.get_many(keys)
+        missing = [i for i, k in enumerate(keys) if k not in found]
+        if missing:
+            vectors = embed([texts[i] for i in missing])
+            new = {keys[i]: v for i, v in zip(missing, vectors)}
+            self._cache.put_many(new)
+            found.update(new)
+        return [found[k] for k in keys]
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        return self._cached("query", [query], lambda q: [self._inner.get_query_embedding(q[0])])[0]
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        model = embedding_id(self._inner)
+        key = EmbeddingCache.key(model, "query", query)
+        found = self._cache.get_many([key])
+        if key in found:
+            return found[key]
+        vector = await self._inner.aget_query_embedding(query)
+        self._cache.put_many({key: vector})
+        return vector
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return self._cached("text", texts, lambda batch: self._inner.get_text_embedding_batch(batch))
+
+
+_configured: Optional[BaseEmbedding] = None
+_lock = threading.Lock()
+
+
+def configure_embeddings(config: Optional[dict] = None) -> BaseEmbedding:
+    """Install the embedding backend selected in config.py as Settings.embed_model."""
+    global _configured
+    with _lock:
+        if _configured is not None:
+            return _configured
+        if config is None:
+            from config import load_config
+            config = load_config()
+
+        backend = config.get("embedding_backend", OPENAI_BACKEND)
+        if backend == LOCAL_BACKEND:
+            model = LocalEmbedding(config.get("local_embedding_model") or "BAAI/bge-small-en-v1.5")
+        elif backend == OPENAI_BACKEND:
+            model = Settings.embed_model
+        else:
+            raise ValueError(f"Unsupported embedding backend: {backend} (expected {LOCAL_BACKEND} or {OPENAI_BACKEND})")
+
+        cache_path = config.get("embedding_cache")
+        if cache_path:
+            model = CachedEmbedding(model, EmbeddingCache(cache_path))
+        Settings.embed_model = model
+        _configured = model
+        return model
@@ -0,0 +1,124 @@
+import logging
+import os
+from typing import Optional
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.core.storage.docstore import BaseDocumentStore
+
+from .lexical import BM25Index
+
+logger = logging.getLogger("knowledge")
+
+# "hybrid" fuses BM25 and vector results (answering lexically when confident),
+# "vector" is embedding-only and "lexical" never calls the embedding API
+RETRIEVAL_MODE = os.getenv("KB_RETRIEVAL_MODE", "hybrid")
+# Share of the query's terms the best BM25 chunk must contain to skip the embedding call
+LEXICAL_CONFIDENCE = float(os.getenv("KB_LEXICAL_CONFIDENCE", "0.75"))
+RRF_K = 60
+RETRIEVAL_MODES = ("hybrid", "vector", "lexical")
+# Node metadata key holding the cosine similarity from the vector retriever
+VECTOR_SIMILARITY_KEY = "vector_similarity"
+
+
+def vector_similarity(node: NodeWithScore) -> Optional[float]:
+    """Cosine similarity of a retrieved node, or None if only BM25 found it."""
+    return node.node.metadata.get(VECTOR_SIMILARITY_KEY)
+
+
+def _with_similarity(node: NodeWithScore) -> NodeWithScore:
+    # A copy, kept out of the text the LLM and the embedder see
+    keys = [VECTOR_SIMILARITY_KEY]
+    tagged = node.node.model_copy(
+        update={
+            "metadata": {**node.node.metadata, VECTOR_SIMILARITY_KEY: node.score},
+            "excluded_llm_metadata_keys": node.node.excluded_llm_metadata_keys + keys,
+            "excluded_embed_metadata_keys": node.node.excluded_embed_metadata_keys + keys,
+        }
+    )
+    return NodeWithScore(node=tagged, score=node.score)
+
+
+class HybridRetriever(BaseRetriever):
+    """BM25 + vector retrieval fused with reciprocal rank fusion.
+
+    Lexical hits are scored relative to the best one (0-1]; fused hits carry
+    their RRF score. Neither is a similarity, so every node the vector
+    retriever returned also keeps its cosine similarity (see
+    ``vector_similarity``) for thresholds. ``counts`` records how each query
+    was answered.
+    """
+
+    def __init__(
+        self,
+        vector_retriever: BaseRetriever,
+        lexical: BM25Index,
+        docstore: BaseDocumentStore,
+        similarity_top_k: int,
+        mode: str = RETRIEVAL_MODE,
+        confidence: float = LEXICAL_CONFIDENCE,
+    ):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode: {mode} (expected one of {', '.join(RETRIEVAL_MODES)})")
+        super().__init__()
+        self.vector_retriever = vector_retriever
+        self.lexical = lexical
+        self.docstore = docstore
+        self.similarity_top_k = similarity_top_k
+        self.mode = mode
+        self.confidence = confidence
+        self.counts = {"lexical": 0, "hybrid": 0, "vector": 0}
+
+    def _lexical_nodes(self, hits: list[tuple[str, float]]) -> list[NodeWithScore]:
+        best = hits[0][1] if hits else 1.0
+        return [
+            NodeWithScore(node=self.docstore.get_node(node_id), score=score / best)
+            for node_id, score in hits
+        ]
+
+    def answers_lexically(self, query: str) -> bool:
+        """Whether ``query`` will be answered from BM25 alone (no embedding call)."""
+        if self.mode != "hybrid":
+            return self.mode == "lexical"
+        hits, confidence = self.lexical.search(query, self.similarity_top_k)
+        return bool(hits) and confidence >= self.confidence
+
+    def _fuse(self, vector_nodes: list[NodeWithScore], hits: list[tuple[str, float]]) -> list[NodeWithScore]:
+        fused: dict[str, float] = {}
+        nodes = {}
+        for rank, node in enumerate(vector_nodes):
+            fused[node.node.node_id] = fused.get(node.node.node_id, 0.0) + 1 / (RRF_K + rank + 1)
+            nodes[node.node.node_id] = node.node
+        for rank, (node_id, _) in enumerate(hits):
+            fused[node_id] = fused.get(node_id, 0.0) + 1 / (RRF_K + rank + 1)
+            if node_id not in nodes:
+                nodes[node_id] = self.docstore.get_node(node_id)
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[: self.similarity_top_k]
+        return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in ranked]
+
+    def _plan(self, query: str):
+        if self.mode == "vector":
+            self.counts["vector"] += 1
+            return None, []
+        # Extra lexical candidates give the fusion something to re-rank
+        hits, confidence = self.lexical.search(query, self.similarity_top_k * 2)
+        if self.mode == "lexical" or (hits and confidence >= self.confidence):
+            self.counts["lexical"] += 1
+            logger.debug("kb lexical answer (confidence %.2f): %s", confidence, query)
+            return self._lexical_nodes(hits[: self.similarity_top_k]), hits
+        self.counts["hybrid"] += 1
+        return None, hits
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        answered, hits = self._plan(query_bundle.query_str)
+        if answered is not None:
+            return answered
+        vector_nodes = [_with_similarity(node) for node in self.vector_retriever.retrieve(query_bundle)]
+        return self._fuse(vector_nodes, hits) if hits else vector_nodes
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        answered, hits = self._plan(query_bundle.query_str)
+        if answered is not None:
+            return answered
+        vector_nodes = [_with_similarity(node) for node in await self.vector_retriever.aretrieve(query_bundle)]
+        return self._fuse(vector_nodes, hits) if hits else vector_nodes
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from typing import Optional
+
+from llama_index.core import (
+    Settings,
+    StorageContext,
+    VectorStoreIndex,
+    load_index_from_storage,
+)
+
+from .embeddings import compatible
+from .vector_store import MmapVectorStore
+
+# Name of the file in a persist dir that points at the live snapshot (e.g. "v3").
+# Stores written before snapshots existed have no pointer and are read in place.
+CURRENT_FILE = "CURRENT"
+
+# One index per persist dir per process; job processes load it once in prewarm
+_indexes: dict[str, VectorStoreIndex] = {}
+_lock = threading.Lock()
+
+
+def current_snapshot(persist_dir: str) -> Optional[str]:
+    """Return the live snapshot name for ``persist_dir``, or None for a flat store."""
+    try:
+        with open(os.path.join(persist_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_path(persist_dir: str, snapshot: Optional[str] = None) -> str:
+    if snapshot is None:
+        snapshot = current_snapshot(persist_dir)
+    return os.path.join(persist_dir, snapshot) if snapshot else persist_dir
+
+
+def build_index(persist_dir: str, data_dir: str) -> VectorStoreIndex:
+    """Embed every document in ``data_dir`` and persist the index to ``persist_dir``.
+
+    If another process publishes a usable snapshot while this one waits for
+    the ingest lock, that snapshot is opened instead of rebuilt.
+    """
+    from .ingest import ingest
+
+    ingest(data_dir, persist_dir, only_if_missing=True)
+    return open_index(persist_dir)
+
+
+def open_index(persist_dir: str, snapshot: Optional[str] = None) -> VectorStoreIndex:
+    """Load a persisted index backed by the memory-mapped vector store."""
+    path = snapshot_path(persist_dir, snapshot)
+    vector_store = MmapVectorStore.from_persist_dir(path)
+    storage_context = StorageContext.from_defaults(persist_dir=path, vector_store=vector_store)
+    return load_index_from_storage(storage_context)
+
+
+def load_index(persist_dir: str, data_dir: str) -> VectorStoreIndex:
+    """Return the process-wide index for ``persist_dir``, building it if missing."""
+    key = os.path.abspath(persist_dir)
+    index = _indexes.get(key)
+    if index is not None:
+        return index
+
+    with _lock:
+        if key not in _indexes:
+            start = time.perf_counter()
+            path = snapshot_path(persist_dir)
+            if not os.path.exists(os.path.join(path, "docstore.json")) or not compatible(path, Settings.embed_model):
+                _indexes[key] = build_index(persist_dir, data_dir)
+            else:
+                _indexes[key] = open_index(persist_dir)
+            print(f"Loaded knowledge index {persist_dir} in {time.perf_counter() - start:.3f}s")
+        return _indexes[key]
@@ -0,0 +1,185 @@
+"""Incrementally (re)build a knowledge index from its source directory.
+
+Chunks are identified by a hash of their embedding text, so only new or edited
+chunks are embedded and chunks whose source text disappeared are deleted. Each
+run writes a complete new snapshot next to the old one and then atomically
+repoints ``CURRENT`` at it; running workers pick it up on their next refresh.
+
+    python -m knowledge.ingest HumanoidAgent/pizza_company_data HumanoidAgent/pizza-knowledge-storage
+"""
+import argparse
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from llama_index.core import Settings, SimpleDirectoryReader, StorageContext, VectorStoreIndex
+from llama_index.core.schema import BaseNode, MetadataMode
+
+from .embeddings import EMBED_MODEL_FILE, compatible, configure_embeddings, embedding_id
+from .index import CURRENT_FILE, current_snapshot, open_index, snapshot_path
+from .vector_store import MmapVectorStore
+
+LOCK_FILE = ".ingest.lock"
+KEEP_SNAPSHOTS = 2
+
+
+@dataclass
+class IngestStats:
+    snapshot: str
+    added: int
+    removed: int
+    unchanged: int
+    seconds: float
+
+
+def chunk_id(node: BaseNode) -> str:
+    """Stable node id derived from the text that gets embedded."""
+    text = node.get_content(metadata_mode=MetadataMode.EMBED)
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def load_chunks(data_dir: str) -> list[BaseNode]:
+    documents = SimpleDirectoryReader(data_dir, filename_as_id=True).load_data()
+    for document in documents:
+        # Keep embed text independent of where the data dir is mounted
+        document.metadata["file_path"] = os.path.relpath(document.metadata.get("file_path", ""), data_dir)
+    nodes = Settings.node_parser.get_nodes_from_documents(documents)
+
+    chunks = {}
+    for node in nodes:
+        node.id_ = chunk_id(node)
+        chunks.setdefault(node.node_id, node)
+    return list(chunks.values())
+
+
+def _next_snapshot(persist_dir: str) -> str:
+    versions = [
+        int(m.group(1)) for name in os.listdir(persist_dir)
+        if (m := re.fullmatch(r"v(\d+)", name))
+    ]
+    return f"v{max(versions, default=0) + 1}"
+
+
+def _write_current(persist_dir: str, snapshot: str):
+    tmp = os.path.join(persist_dir, CURRENT_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(snapshot)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(persist_dir, CURRENT_FILE))
+
+
+def _prune(persist_dir: str, keep: int = KEEP_SNAPSHOTS):
+    # Workers still on an old snapshot have it fully loaded (and mmapped), so
+    # removing the files underneath them is safe
+    versions = sorted(
+        (int(name[1:]), name) for name in os.listdir(persist_dir)
+        if re.fullmatch(r"v\d+", name)
+    )
+    for _, name in versions[:-keep]:
+        shutil.rmtree(os.path.join(persist_dir, name), ignore_errors=True)
+
+
+def ingest(data_dir: str, persist_dir: str, embed_model=None, only_if_missing: bool = False) -> IngestStats:
+    """Bring ``persist_dir`` up to date with ``data_dir``, one ingest per store at a time.
+
+    Concurrent callers (every job process's prewarm on a fresh store) wait
+    for the one ingesting. With ``only_if_missing``, a caller that finds a
+    usable snapshot once it gets the lock returns it without touching the
+    data dir.
+    """
+    start = time.perf_counter()
+    embed_model = embed_model or Settings.embed_model
+    os.makedirs(persist_dir, exist_ok=True)
+
+    # flock rather than an exclusive create: the kernel drops it if the
+    # process dies, so a crashed ingest never blocks the next start
+    lock_fd = os.open(os.path.join(persist_dir, LOCK_FILE), os.O_CREAT | os.O_WRONLY)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        live = snapshot_path(persist_dir)
+        has_store = os.path.exists(os.path.join(live, "docstore.json"))
+        # Vectors from another embedding model can't be mixed in; re-embed everything
+        rebuild = has_store and not compatible(live, embed_model)
+        if only_if_missing and has_store and not rebuild:
+            # Published by whoever held the lock before us
+            return IngestStats(
+                snapshot=current_snapshot(persist_dir),
+                added=0,
+                removed=0,
+                unchanged=0,
+                seconds=time.perf_counter() - start,
+            )
+        if has_store and not rebuild:
+            index = open_index(persist_dir)
+        else:
+            storage_context = StorageContext.from_defaults(vector_store=MmapVectorStore())
+            index = VectorStoreIndex(nodes=[], storage_context=storage_context, embed_model=embed_model)
+
+        existing = set(index.index_struct.nodes_dict.values())
+        chunks = load_chunks(data_dir)
+        wanted = {chunk.node_id for chunk in chunks}
+
+        removed = sorted(existing - wanted)
+        if removed:
+            index.vector_store.delete_nodes(removed)
+            for node_id in removed:
+                index.index_struct.delete(node_id)
+                index.docstore.delete_document(node_id, raise_error=False)
+            index.storage_context.index_store.add_index_struct(index.index_struct)
+
+        added = [chunk for chunk in chunks if chunk.node_id not in existing]
+        if added:
+            embeddings = embed_model.get_text_embedding_batch(
+                [chunk.get_content(metadata_mode=MetadataMode.EMBED) for chunk in added],
+                show_progress=False,
+            )
+            for chunk, embedding in zip(added, embeddings):
+                chunk.embedding = embedding
+            index.insert_nodes(added)
+
+        snapshot = current_snapshot(persist_dir)
+        if added or removed or rebuild or snapshot is None:
+            snapshot = _next_snapshot(persist_dir)
+            staging = os.path.join(persist_dir, f".{snapshot}.tmp")
+            shutil.rmtree(staging, ignore_errors=True)
+            index.storage_context.persist(persist_dir=staging)
+            with open(os.path.join(staging, EMBED_MODEL_FILE), "w") as f:
+                f.write(embedding_id(embed_model))
+            os.rename(staging, os.path.join(persist_dir, snapshot))
+            _write_current(persist_dir, snapshot)
+            _prune(persist_dir)
+
+        return IngestStats(
+            snapshot=snapshot,
+            added=len(added),
+            removed=len(removed),
+            unchanged=len(wanted) - len(added),
+            seconds=time.perf_counter() - start,
+        )
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(lock_fd)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("data_dir", help="directory of source documents, e.g. pizza_company_data")
+    parser.add_argument("persist_dir", help="index storage directory, e.g. pizza-knowledge-storage")
+    args = parser.parse_args(argv)
+
+    configure_embeddings()
+    stats = ingest(args.data_dir, args.persist_dir)
+    print(
+        f"{args.persist_dir} -> {stats.snapshot}: {stats.added} embedded, "
+        f"{stats.removed} removed, {stats.unchanged} unchanged in {stats.seconds:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from llama_index.core.schema import BaseNode, MetadataMode
+
+# Includes the filler of spoken questions ("can you tell me how much ...") so
+# it does not count against lexical confidence
+STOPWORDS = frozenset(
+    "a about an and any are as at be but by can could do does for from get have how i "
+    "if in is it its just know like me much my need of on or our please so some tell "
+    "that the their there them they this to us want was we what when where which who "
+    "why will with would you your".split()
+)
+
+
+def _stem(token: str) -> str:
+    # Just enough folding for menus and price lists: "pizzas" -> "pizza", "fillings" -> "filling"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    text = re.sub(r"['’]s\b", "", text.lower())
+    return [_stem(t) for t in re.findall(r"[a-z0-9£]+", text) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """In-process Okapi BM25 over the chunks of a knowledge index."""
+
+    def __init__(self, nodes: Iterable[BaseNode], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.node_ids: list[str] = []
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        lengths = []
+        for node in nodes:
+            terms = Counter(tokenize(node.get_content(metadata_mode=MetadataMode.EMBED)))
+            doc = len(self.node_ids)
+            self.node_ids.append(node.node_id)
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self._postings[term].append((doc, tf))
+
+        self._lengths = lengths
+        self._avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        count = len(self.node_ids)
+        self.idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def search(self, query: str, top_k: int) -> tuple[list[tuple[str, float]], float]:
+        """Return the top ``top_k`` (node_id, score) pairs and a 0-1 confidence.
+
+        Confidence is the share of the query's (idf-weighted) terms that occur
+        in the best chunk; terms absent from the corpus count against it.
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.node_ids or top_k <= 0:
+            return [], 0.0
+
+        scores: dict[int, float] = defaultdict(float)
+        matched: dict[int, float] = defaultdict(float)
+        # Unknown terms get the idf of a term seen in a single chunk
+        unknown_idf = math.log(1 + (len(self.node_ids) - 0.5) / 1.5)
+        total_weight = 0.0
+        for term in terms:
+            idf = self.idf.get(term)
+            total_weight += idf if idf is not None else unknown_idf
+            if idf is None:
+                continue
+            for doc, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc] / self._avg_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc] += idf
+
+        if not scores:
+            return [], 0.0
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        confidence = matched[ranked[0][0]] / total_weight if total_weight else 0.0
+        return [(self.node_ids[doc], score) for doc, score in ranked], confidence
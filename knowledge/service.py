@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from llama_index.core import Settings, VectorStoreIndex, get_response_synthesizer
+from llama_index.core.base.response.schema import Response
+from llama_index.core.chat_engine import ContextChatEngine
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import BaseNode, MetadataMode, NodeWithScore, QueryBundle
+
+from .answer_cache import SemanticAnswerCache
+from .embeddings import configure_embeddings
+from .hybrid import RETRIEVAL_MODE, HybridRetriever
+from .index import current_snapshot, load_index, open_index
+from .lexical import BM25Index
+
+logger = logging.getLogger("knowledge")
+
+DEFAULT_TOP_K = int(os.getenv("KB_TOP_K", "2"))
+DEFAULT_RESPONSE_MODE = os.getenv("KB_RESPONSE_MODE", "compact")
+# How often (seconds) a worker checks for a snapshot published by knowledge.ingest
+RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "30"))
+
+
+@dataclass
+class QueryTiming:
+    retrieval_ms: float
+    synthesis_ms: float = 0.0
+    cached: bool = False
+
+    @property
+    def total_ms(self) -> float:
+        return self.retrieval_ms + self.synthesis_ms
+
+
+class KnowledgeBase:
+    """Retriever and response synthesizer built once and reused for every call.
+
+    ``query`` answers repeated questions from a semantic answer cache; pass
+    ``answer_cache=None`` to always go through retrieval and synthesis.
+    Retrieval fuses BM25 with the vector index (see ``HybridRetriever``).
+    """
+
+    def __init__(
+        self,
+        index: VectorStoreIndex,
+        similarity_top_k: int = DEFAULT_TOP_K,
+        response_mode: str = DEFAULT_RESPONSE_MODE,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        persist_dir: Optional[str] = None,
+        retrieval_mode: str = RETRIEVAL_MODE,
+    ):
+        self.similarity_top_k = similarity_top_k
+        self.retrieval_mode = retrieval_mode
+        self.embed_model = Settings.embed_model
+        self.synthesizer = get_response_synthesizer(response_mode=response_mode, use_async=True)
+        self.answer_cache = answer_cache
+        # Bumped whenever the underlying index is replaced; cached answers
+        # from an older version are discarded
+        self.version = 0
+        self.persist_dir = persist_dir
+        self.snapshot = current_snapshot(persist_dir) if persist_dir else None
+        self._next_refresh = time.monotonic() + RELOAD_INTERVAL
+        self._set_index(index)
+
+    def _set_index(self, index: VectorStoreIndex):
+        self.index = index
+        # node id -> LLM-mode text; node ids are content hashes, so this only
+        # needs clearing when the index itself is swapped
+        self._renderings: dict[str, str] = {}
+        self.retriever = HybridRetriever(
+            index.as_retriever(similarity_top_k=self.similarity_top_k),
+            BM25Index(index.docstore.docs.values()),
+            index.docstore,
+            similarity_top_k=self.similarity_top_k,
+            mode=self.retrieval_mode,
+        )
+        self.query_engine = RetrieverQueryEngine(
+            retriever=self.retriever,
+            response_synthesizer=self.synthesizer,
+        )
+
+    async def refresh(self) -> bool:
+        """Swap in a newer snapshot, checking at most once per RELOAD_INTERVAL."""
+        if self.persist_dir is None or time.monotonic() < self._next_refresh:
+            return False
+        self._next_refresh = time.monotonic() + RELOAD_INTERVAL
+
+        snapshot = current_snapshot(self.persist_dir)
+        if snapshot is None or snapshot == self.snapshot:
+            return False
+        index = await asyncio.to_thread(open_index, self.persist_dir, snapshot)
+        self._set_index(index)
+        self.snapshot = snapshot
+        self.version += 1
+        logger.info("kb reloaded %s at snapshot %s", self.persist_dir, snapshot)
+        return True
+
+    async def retrieve(self, query: str) -> list[NodeWithScore]:
+        await self.refresh()
+        start = time.perf_counter()
+        nodes = await self.retriever.aretrieve(query)
+        logger.info("kb retrieve: %.1fms (%d nodes)", (time.perf_counter() - start) * 1000, len(nodes))
+        return nodes
+
+    async def query(self, query: str) -> Response:
+        """Answer ``query``; its ``QueryTiming`` is in ``response.metadata["timing"]``.
+
+        The knowledge base is shared by every job in the process, so timing
+        travels with the response rather than living on the instance.
+        """
+        await self.refresh()
+        start = time.perf_counter()
+        # Not truthiness: an empty cache has len() 0
+        cache = self.answer_cache
+
+        cached = cache.lookup_exact(query, self.version) if cache is not None else None
+        # Confident lexical matches skip the embedding call (and so the semantic lookup)
+        if cached is None and cache is not None and not self.retriever.answers_lexically(query):
+            embedding = await self.embed_model.aget_query_embedding(query)
+            bundle = QueryBundle(query_str=query, embedding=embedding)
+            cached = cache.lookup(query, embedding, self.version)
+        else:
+            bundle = QueryBundle(query_str=query)
+
+        if cached is not None:
+            timing = QueryTiming(retrieval_ms=(time.perf_counter() - start) * 1000, cached=True)
+            logger.info("kb query: answered from cache in %.1fms", timing.retrieval_ms)
+            return Response(response=cached, metadata={"timing": timing})
+
+        nodes = await self.retriever.aretrieve(bundle)
+        retrieved = time.perf_counter()
+        response = await self.synthesizer.asynthesize(bundle, nodes)
+        timing = QueryTiming(
+            retrieval_ms=(retrieved - start) * 1000,
+            synthesis_ms=(time.perf_counter() - retrieved) * 1000,
+        )
+        logger.info("kb query: retrieval %.1fms, synthesis %.1fms", timing.retrieval_ms, timing.synthesis_ms)
+        response.metadata = {**(response.metadata or {}), "timing": timing}
+        if cache is not None and response.response:
+            cache.store(query, bundle.embedding, str(response), self.version)
+        return response
+
+    def render(self, node: BaseNode) -> str:
+        """Node text as shown to the LLM, rendered once per node."""
+        text = self._renderings.get(node.node_id)
+        if text is None:
+            text = node.get_content(metadata_mode=MetadataMode.LLM)
+            self._renderings[node.node_id] = text
+        return text
+
+    def chat_engine(self) -> ContextChatEngine:
+        """A context chat engine with its own memory, sharing this retriever."""
+        return ContextChatEngine.from_defaults(retriever=self.retriever)
+
+
+_knowledge_bases: dict[str, KnowledgeBase] = {}
+_lock = threading.Lock()
+
+
+def get_knowledge_base(persist_dir: str, data_dir: str) -> KnowledgeBase:
+    """Return the process-wide knowledge base for ``persist_dir``."""
+    key = os.path.abspath(persist_dir)
+    kb = _knowledge_bases.get(key)
+    if kb is None:
+        with _lock:
+            if key not in _knowledge_bases:
+                configure_embeddings()
+                _knowledge_bases[key] = KnowledgeBase(
+                    load_index(persist_dir, data_dir),
+                    answer_cache=SemanticAnswerCache(),
+                    persist_dir=persist_dir,
+                )
+            kb = _knowledge_bases[key]
+    return kb
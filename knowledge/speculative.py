@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+from llama_index.core.schema import NodeWithScore
+
+from .answer_cache import normalise_question
+from .context import is_knowledge_question
+
+# Quiet period after an interim transcript before retrieval starts; a newer
+# hypothesis inside this window replaces the pending one at no cost
+DEBOUNCE_MS = float(os.getenv("KB_SPECULATIVE_DEBOUNCE_MS", "150"))
+MIN_WORDS = 3
+
+
+def _matches(speculated: str, final: str) -> bool:
+    if speculated == final:
+        return True
+    # A hypothesis missing only a trailing word or two retrieves the same chunks
+    spec_words, final_words = speculated.split(), final.split()
+    return final.startswith(speculated) and len(spec_words) >= 0.8 * len(final_words)
+
+
+class SpeculativeRetriever:
+    """Starts retrieval on interim transcripts so it overlaps the user speaking.
+
+    Each new hypothesis cancels the previous one. When the final transcript
+    arrives, ``take`` returns the speculative result if it was made for
+    (nearly) the same text, otherwise None and the caller retrieves as usual.
+    """
+
+    def __init__(self, kb, debounce_ms: float = DEBOUNCE_MS):
+        self.kb = kb
+        self.debounce = debounce_ms / 1000
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._text: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._retrieving = False
+
+    def on_interim(self, text: str):
+        normalised = normalise_question(text)
+        if normalised == self._text:
+            return
+        if len(normalised.split()) < MIN_WORDS or not is_knowledge_question(text):
+            return
+        self.cancel()
+        self._text = normalised
+        self._retrieving = False
+        self._task = asyncio.create_task(self._retrieve(text))
+
+    async def _retrieve(self, text: str) -> tuple[list[NodeWithScore], float, float]:
+        await asyncio.sleep(self.debounce)
+        self._retrieving = True
+        started = time.perf_counter()
+        nodes = await self.kb.retrieve(text)
+        return nodes, started, time.perf_counter()
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._text = None
+
+    async def take(self, final_text: str) -> Optional[list[NodeWithScore]]:
+        task, speculated = self._task, self._text
+        self._task = self._text = None
+        # Still debouncing means nothing was saved; retrieving now is faster
+        matched = speculated is not None and self._retrieving and _matches(speculated, normalise_question(final_text))
+        if task is None or not matched:
+            if task is not None and not task.done():
+                task.cancel()
+            self.misses += 1
+            return None
+
+        now = time.perf_counter()
+        try:
+            nodes, started, finished = await task
+        except (asyncio.CancelledError, Exception) as e:
+            print(f"Speculative retrieval failed, retrieving again: {e!r}")
+            self.misses += 1
+            return None
+
+        # Only retrieval that ran before the final transcript overlapped speech
+        saved = max(0.0, min(finished, now) - started)
+        self.saved_ms += saved * 1000
+        self.hits += 1
+        print(f"Speculative retrieval hit, saved ~{saved * 1000:.0f}ms")
+        return nodes
+
+    def stats(self) -> dict:
+        turns = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / turns if turns else 0.0,
+            "mean_saved_ms": self.saved_ms / self.hits if self.hits else 0.0,
+        }
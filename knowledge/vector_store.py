@@ -0,0 +1,215 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+
+FORMAT_VERSION = 1
+LEGACY_JSON_NAME = "default__vector_store.json"
+
+
+def _meta_path(persist_path: str) -> Path:
+    """Map llama-index's ``<namespace>__vector_store.json`` path to our side-car."""
+    base = Path(persist_path)
+    if base.suffix == ".json":
+        base = base.with_suffix("")
+    return base.with_suffix(".meta.json")
+
+
+def _atomic_write(path: Path, data: bytes):
+    # Per-process name: concurrent prewarms may convert the same legacy store
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class MmapVectorStore(BasePydanticVectorStore):
+    """Vector store persisted as a raw float32 matrix plus a JSON side-car.
+
+    Rows are L2-normalised so a query is a single matrix-vector product. On load
+    the matrix is memory-mapped read-only, so every job process on the host
+    shares the same page-cache pages instead of parsing its own JSON copy.
+    Text lives in the docstore, like the default SimpleVectorStore.
+    """
+
+    stores_text: bool = False
+
+    _matrix: np.ndarray = PrivateAttr()
+    _node_ids: List[str] = PrivateAttr()
+    _ref_doc_ids: List[Optional[str]] = PrivateAttr()
+
+    def __init__(
+        self,
+        matrix: Optional[np.ndarray] = None,
+        node_ids: Optional[List[str]] = None,
+        ref_doc_ids: Optional[List[Optional[str]]] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self._matrix = matrix if matrix is not None else np.zeros((0, 0), dtype=np.float32)
+        self._node_ids = list(node_ids or [])
+        self._ref_doc_ids = list(ref_doc_ids or [None] * len(self._node_ids))
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MmapVectorStore"
+
+    @property
+    def client(self) -> None:
+        return None
+
+    def __len__(self) -> int:
+        return len(self._node_ids)
+
+    def __bool__(self) -> bool:
+        # StorageContext.from_defaults swaps a falsy store for a SimpleVectorStore
+        return True
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32, copy=False)
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        rows = self._normalise(np.asarray([n.get_embedding() for n in nodes], dtype=np.float32))
+        if len(self._node_ids):
+            # Copy out of the (read-only) mapping before growing it
+            self._matrix = np.vstack([np.asarray(self._matrix), rows])
+        else:
+            self._matrix = rows
+        self._node_ids.extend(n.node_id for n in nodes)
+        self._ref_doc_ids.extend(n.ref_doc_id for n in nodes)
+        return [n.node_id for n in nodes]
+
+    def _keep(self, keep: np.ndarray):
+        self._matrix = np.asarray(self._matrix)[keep]
+        self._node_ids = [i for i, k in zip(self._node_ids, keep) if k]
+        self._ref_doc_ids = [i for i, k in zip(self._ref_doc_ids, keep) if k]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        keep = np.array([r != ref_doc_id for r in self._ref_doc_ids], dtype=bool)
+        if not keep.all():
+            self._keep(keep)
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters=None, **delete_kwargs: Any) -> None:
+        if not node_ids:
+            return
+        drop = set(node_ids)
+        keep = np.array([i not in drop for i in self._node_ids], dtype=bool)
+        if not keep.all():
+            self._keep(keep)
+
+    def get_embedding(self, node_id: str) -> List[float]:
+        return self._matrix[self._node_ids.index(node_id)].tolist()
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"MmapVectorStore only supports the default query mode, got {query.mode}")
+        if query.query_embedding is None or not self._node_ids:
+            return VectorStoreQueryResult(nodes=None, similarities=[], ids=[])
+
+        q = self._normalise(np.asarray(query.query_embedding, dtype=np.float32))
+        scores = self._matrix @ q
+
+        if query.node_ids or query.doc_ids:
+            node_ids = set(query.node_ids or [])
+            doc_ids = set(query.doc_ids or [])
+            mask = np.array(
+                [(not node_ids or n in node_ids) and (not doc_ids or d in doc_ids)
+                 for n, d in zip(self._node_ids, self._ref_doc_ids)],
+                dtype=bool,
+            )
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(query.similarity_top_k, len(scores))
+        if k <= 0:
+            return VectorStoreQueryResult(nodes=None, similarities=[], ids=[])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = [i for i in top if np.isfinite(scores[i])]
+        return VectorStoreQueryResult(
+            nodes=None,
+            similarities=[float(scores[i]) for i in top],
+            ids=[self._node_ids[i] for i in top],
+        )
+
+    def persist(self, persist_path: str, fs: Any = None) -> None:
+        meta_path = _meta_path(persist_path)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        prefix = meta_path.name[: -len(".meta.json")]
+
+        generation = 0
+        if meta_path.exists():
+            with open(meta_path) as f:
+                generation = json.load(f).get("generation", 0) + 1
+        matrix_name = f"{prefix}.{generation}.f32"
+
+        matrix = np.ascontiguousarray(self._matrix, dtype=np.float32)
+        meta = {
+            "version": FORMAT_VERSION,
+            "generation": generation,
+            "matrix_file": matrix_name,
+            "count": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "node_ids": self._node_ids,
+            "ref_doc_ids": self._ref_doc_ids,
+        }
+        # Each generation gets a fresh matrix file and the side-car is swapped
+        # last, so readers never see a matrix that doesn't match its metadata.
+        _atomic_write(meta_path.with_name(matrix_name), matrix.tobytes())
+        _atomic_write(meta_path, json.dumps(meta).encode())
+
+        # Processes still mapping an old generation keep their inode alive
+        for old in meta_path.parent.glob(f"{prefix}.*.f32"):
+            if old.name != matrix_name:
+                old.unlink(missing_ok=True)
+
+    @classmethod
+    def from_persist_path(cls, persist_path: str, fs: Any = None) -> "MmapVectorStore":
+        meta_path = _meta_path(persist_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta["count"]:
+            matrix = np.memmap(
+                meta_path.with_name(meta["matrix_file"]),
+                dtype=np.float32,
+                mode="r",
+                shape=(meta["count"], meta["dim"]),
+            )
+        else:
+            matrix = None
+        return cls(matrix=matrix, node_ids=meta["node_ids"], ref_doc_ids=meta["ref_doc_ids"])
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str, fs: Any = None) -> "MmapVectorStore":
+        """Load the binary store, converting a legacy JSON store on first use."""
+        json_path = os.path.join(persist_dir, LEGACY_JSON_NAME)
+        if not _meta_path(json_path).exists() and os.path.exists(json_path):
+            cls.from_simple_vector_store(SimpleVectorStore.from_persist_path(json_path)).persist(json_path)
+        return cls.from_persist_path(json_path)
+
+    @classmethod
+    def from_simple_vector_store(cls, store: SimpleVectorStore) -> "MmapVectorStore":
+        data = store.data
+        node_ids = list(data.embedding_dict)
+        if not node_ids:
+            return cls()
+        matrix = cls._normalise(np.asarray([data.embedding_dict[i] for i in node_ids], dtype=np.float32))
+        ref_doc_ids = [data.text_id_to_ref_doc_id.get(i) for i in node_ids]
+        return cls(matrix=matrix, node_ids=node_ids, ref_doc_ids=ref_doc_ids)
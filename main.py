@@ -6,12 +6,14 @@ from livekit.agents.llm import ChatContext, ChatMessage, ChatImage
 from config import load_config
 from assistant.voice_assistant import create_voice_assistant
 from assistant.chat_manager import create_chat_manager
-from assistant.utils import get_video_track
+from assistant.frame_sampler import FrameSampler
+from assistant.worker_load import LOAD_THRESHOLD, admit_job, load_fnc, report_job_load
 
 config = load_config()
 
 async def entrypoint(ctx: JobContext):
     await ctx.connect()
+    report_job_load(ctx)
     print(f"Room name: {ctx.room.name}")
 
     chat_context = ChatContext(
@@ -26,35 +28,40 @@ async def entrypoint(ctx: JobContext):
         ]
     )
 
-    assistant = await create_voice_assistant(config, chat_context)
+    assistant, context_window = await create_voice_assistant(config, chat_context)
     chat = create_chat_manager(ctx.room)
 
-    latest_image: rtc.VideoFrame | None = None
-
-async def _answer(text: str, use_image: bool = False):
-    content: list[str | ChatImage] = [text]
-    if use_image and latest_image:
-        content.append(ChatImage(image=latest_image))
-
-    chat_context.messages.append(ChatMessage(role="user", content=content))
-
-    response_stream = assistant.llm.chat(chat_ctx=chat_context)
-    response_text = ""
-    async for chunk in response_stream:
-        if isinstance(chunk, ChatMessage):
-            response_text += chunk.content
-        elif hasattr(chunk, 'delta'):
-            response_text += chunk.delta
-        else:
-            print(f"Unexpected chunk type: {type(chunk)}")
-
-    # Use the TTS engine from the assistant
-    track = await assistant.tts(response_text)
+    # Camera frames are only decoded when a vision tool asks for one
+    frames = FrameSampler(ctx.room)
+    frames.start()
+    ctx.add_shutdown_callback(frames.aclose)
+
+    async def _answer(text: str, use_image: bool = False):
+        content: list[str | ChatImage] = [text]
+        image = await frames.image() if use_image else None
+        if image:
+            content.append(image)
+
+        chat_context.messages.append(ChatMessage(role="user", content=content))
+        context_window.compact()
+
+        response_stream = assistant.llm.chat(chat_ctx=chat_context)
+        response_text = ""
+        async for chunk in response_stream:
+            if isinstance(chunk, ChatMessage):
+                response_text += chunk.content
+            elif hasattr(chunk, 'delta'):
+                response_text += chunk.delta
+            else:
+                print(f"Unexpected chunk type: {type(chunk)}")
+
+        # Use the TTS engine from the assistant
+        track = await assistant.tts(response_text)
     
-    options = rtc.TrackPublishOptions()
-    options.source = rtc.TrackSource.SOURCE_MICROPHONE
-    publication = await ctx.room.local_participant.publish_track(track, options)
-    await publication.wait_for_subscription()
+        options = rtc.TrackPublishOptions()
+        options.source = rtc.TrackSource.SOURCE_MICROPHONE
+        publication = await ctx.room.local_participant.publish_track(track, options)
+        await publication.wait_for_subscription()
 
     @chat.on("message_received")
     def on_message_received(msg: rtc.ChatMessage):
@@ -76,10 +83,14 @@ async def _answer(text: str, use_image: bool = False):
     await _answer("Hi there! How can I help?")
 
     while ctx.room.connection_state == rtc.ConnectionState.CONN_CONNECTED:
-        video_track = await get_video_track(ctx.room)
-
-        async for event in rtc.VideoStream(video_track):
-            latest_image = event.frame
+        await asyncio.sleep(1)  # Keep the connection alive for incoming events
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            request_fnc=admit_job,
+            load_fnc=load_fnc,
+            load_threshold=LOAD_THRESHOLD,
+        )
+    )
\ No newline at end of file
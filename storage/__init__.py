@@ -0,0 +1 @@
+from .record_store import RecordStore
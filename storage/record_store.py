@@ -0,0 +1,141 @@
+import json
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+IndexKey = Callable[[Dict], Optional[str]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS log_kind_seq ON log (kind, seq);
+CREATE TABLE IF NOT EXISTS counters (kind TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+class RecordStore:
+    """Orders/bookings kept in memory with hash indexes, backed by an append-only SQLite log.
+
+    Every create or update appends the full record to the log (WAL mode), so
+    state survives restarts and ids come from a counter that is atomic across
+    threads and worker processes. Each instance replays rows written by other
+    processes before answering, then serves lookups by id or by any secondary
+    index (e.g. phone, date) from dicts. ``path=":memory:"`` keeps nothing on disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        kind: str,
+        id_field: str,
+        id_prefix: str,
+        indexes: Optional[Dict[str, IndexKey]] = None,
+        first_id: int = 1000,
+    ):
+        self.kind = kind
+        self.id_field = id_field
+        self.id_prefix = id_prefix
+        self.first_id = first_id
+        self._index_keys = indexes or {}
+        self._records: Dict[str, Dict] = {}
+        self._indexes: Dict[str, Dict[str, Dict[str, None]]] = {name: {} for name in self._index_keys}
+        self._last_seq = 0
+        self._lock = threading.RLock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(SCHEMA)
+        self._sync()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._records)
+
+    def _apply(self, record_id: str, record: Dict):
+        old = self._records.get(record_id)
+        for name, key in self._index_keys.items():
+            old_value = key(old) if old else None
+            new_value = key(record)
+            if old_value == new_value and old is not None:
+                continue
+            if old_value is not None:
+                self._indexes[name].get(old_value, {}).pop(record_id, None)
+            if new_value is not None:
+                self._indexes[name].setdefault(new_value, {})[record_id] = None
+        self._records[record_id] = record
+
+    def _sync(self):
+        # Rows appended by other processes since we last looked; usually none
+        rows = self._db.execute(
+            "SELECT seq, record_id, data FROM log WHERE kind = ? AND seq > ? ORDER BY seq",
+            (self.kind, self._last_seq),
+        ).fetchall()
+        for seq, record_id, data in rows:
+            self._apply(record_id, json.loads(data))
+            self._last_seq = seq
+
+    def _append(self, record_id: str, record: Dict):
+        cursor = self._db.execute(
+            "INSERT INTO log (kind, record_id, data) VALUES (?, ?, ?)",
+            (self.kind, record_id, json.dumps(record)),
+        )
+        return cursor.lastrowid
+
+    def create(self, data: Dict) -> Dict:
+        """Store a new record under the next id and return it."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO counters (kind, value) VALUES (?, ?)", (self.kind, self.first_id - 1)
+                )
+                self._db.execute("UPDATE counters SET value = value + 1 WHERE kind = ?", (self.kind,))
+                (value,) = self._db.execute("SELECT value FROM counters WHERE kind = ?", (self.kind,)).fetchone()
+                record_id = f"{self.id_prefix}{value}"
+                record = {self.id_field: record_id, **data}
+                self._append(record_id, record)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._sync()
+            return record
+
+    def update(self, record_id: str, **changes) -> Optional[Dict]:
+        with self._lock:
+            self._sync()
+            record = self._records.get(record_id)
+            if record is None:
+                return None
+            record = {**record, **changes}
+            self._append(record_id, record)
+            self._sync()
+            return record
+
+    def get(self, record_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._sync()
+            return self._records.get(record_id)
+
+    def find(self, index: str, value: str) -> List[Dict]:
+        """Records whose ``index`` key equals ``value``, oldest first."""
+        with self._lock:
+            self._sync()
+            return [self._records[i] for i in self._indexes[index].get(value, {})]
+
+    def values(self) -> Iterable[Dict]:
+        with self._lock:
+            self._sync()
+            return list(self._records.values())
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -1,7 +1,18 @@
 from .openai_tts import create_openai_tts
+from .elevenlabs_tts import create_elevenlabs_tts
+from .deepgram_tts import create_deepgram_tts
+from .router import TTSRouter, build_tts_router, create_tts_router, get_tts_router
+
+TTS_ENGINES = {
+    "openai": create_openai_tts,
+    "elevenlabs": create_elevenlabs_tts,
+    "deepgram": create_deepgram_tts,
+    # Routes each utterance across TTS_PROVIDERS by rolling TTFB and health
+    "router": create_tts_router,
+}
 
 async def get_tts_engine(config):
-    if config["tts_provider"] == "openai":
-        return await create_openai_tts(config)
-    else:
-        raise ValueError(f"Unsupported TTS provider: {config['tts_provider']}")
\ No newline at end of file
+    create = TTS_ENGINES.get(config["tts_provider"])
+    if create is None:
+        raise ValueError(f"Unsupported TTS provider: {config['tts_provider']}")
+    return await create(config)
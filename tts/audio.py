@@ -0,0 +1,50 @@
+from typing import Iterator
+
+from livekit import rtc
+
+BYTES_PER_SAMPLE = 2  # 16-bit PCM
+
+
+class PcmFramer:
+    """Re-frames a raw 16-bit PCM byte stream into fixed-duration AudioFrames.
+
+    Network chunks arrive at arbitrary sizes (even splitting a sample).
+    Whole frames are sliced straight out of each chunk through a memoryview;
+    only the remainder that straddles two chunks is buffered.
+    """
+
+    def __init__(self, sample_rate: int, num_channels: int = 1, frame_ms: int = 20):
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.samples_per_channel = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.samples_per_channel * num_channels * BYTES_PER_SAMPLE
+        self._pending = bytearray()
+
+    def _frame(self, data, samples_per_channel: int) -> rtc.AudioFrame:
+        return rtc.AudioFrame(data, self.sample_rate, self.num_channels, samples_per_channel)
+
+    def push(self, chunk: bytes) -> Iterator[rtc.AudioFrame]:
+        view = memoryview(chunk)
+        offset = 0
+        if self._pending:
+            needed = self.frame_bytes - len(self._pending)
+            self._pending += view[:needed]
+            offset = min(needed, len(view))
+            if len(self._pending) < self.frame_bytes:
+                return
+            yield self._frame(self._pending, self.samples_per_channel)
+            self._pending = bytearray()
+
+        while len(view) - offset >= self.frame_bytes:
+            yield self._frame(view[offset:offset + self.frame_bytes], self.samples_per_channel)
+            offset += self.frame_bytes
+        if offset < len(view):
+            self._pending += view[offset:]
+
+    def flush(self) -> Iterator[rtc.AudioFrame]:
+        """The trailing partial frame, if any (a dangling half sample is dropped)."""
+        sample_bytes = self.num_channels * BYTES_PER_SAMPLE
+        usable = len(self._pending) - len(self._pending) % sample_bytes
+        if usable:
+            yield self._frame(self._pending[:usable], usable // sample_bytes)
+        self._pending = bytearray()
@@ -0,0 +1,155 @@
+import os
+import re
+from typing import Optional
+
+from livekit.agents import tokenize, utils
+
+# The first chunk of a reply goes to TTS after this many words at a clause or
+# sentence boundary; later chunks wait for a sentence end and grow by
+# TTS_CHUNK_GROWTH each time (capped at TTS_CHUNK_MAX_WORDS) while earlier
+# audio is playing
+FIRST_WORDS = int(os.getenv("TTS_CHUNK_FIRST_WORDS", "3"))
+MAX_WORDS = int(os.getenv("TTS_CHUNK_MAX_WORDS", "40"))
+GROWTH = float(os.getenv("TTS_CHUNK_GROWTH", "2"))
+
+# A word is only looked at once the whitespace after it has arrived, so
+# "£25" never ends a chunk while ".65" is still on its way
+_WORD = re.compile(r"\S+(?=\s)")
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'”’)\]]*$")
+_CLAUSE_END = re.compile(r"(?:[,;:][\"'”’)\]]*|—|–)$")
+
+# Spans no chunk boundary may fall inside
+PROTECTED_SPANS = re.compile(
+    "|".join(
+        [
+            # £25, £25.50, £25-65, £25 to £65
+            r"[£$€]\s?\d[\d,]*(?:\.\d+)?(?:\s?(?:-|–|to)\s?[£$€]?\d[\d,]*(?:\.\d+)?)?",
+            # UK postcodes: SW1A 1AA, M1 1AE
+            r"\b[A-Z]{1,2}\d[A-Z\d]?\s?\d[A-Z]{2}\b",
+            # Phone numbers: 020 7946 0958, +44 (0)20 7946-0958
+            r"\+?\(?\d[\d\s().-]{6,}\d",
+            # Abbreviations and initials followed by a name
+            r"\b(?:Mr|Mrs|Ms|Dr|St|Prof|Sr|Jr|No|approx|vs|e\.g|i\.e)\.\s",
+            r"\b[A-Z]\.\s",
+            # Numbered list markers
+            r"(?:^|\s)\d{1,2}[.)]\s",
+        ]
+    )
+)
+
+
+class ChunkBuffer:
+    """Splits streamed LLM text into speakable chunks, short at first and longer later.
+
+    Plain text in, list of chunks out: ``push()`` returns whatever became
+    ready, ``flush()`` ends the current reply and returns the rest.
+    """
+
+    def __init__(self, first_words: int = FIRST_WORDS, max_words: int = MAX_WORDS, growth: float = GROWTH):
+        self.first_words = first_words
+        self.max_words = max_words
+        self.growth = growth
+        self.text = ""
+        self.emitted = 0
+
+    def target_words(self) -> int:
+        return min(int(self.first_words * self.growth ** self.emitted), self.max_words)
+
+    def push(self, text: str) -> list[str]:
+        self.text += text
+        chunks = []
+        while (chunk := self._next_chunk()) is not None:
+            chunks.append(chunk)
+        return chunks
+
+    def flush(self) -> list[str]:
+        rest = self.text.strip()
+        self.text = ""
+        self.emitted = 0
+        return [rest] if rest else []
+
+    def _next_chunk(self) -> Optional[str]:
+        text = self.text
+        target = self.target_words()
+        first = self.emitted == 0
+        # Run-on text with no usable punctuation is cut at a word boundary
+        force_at = 3 * self.first_words if first else self.max_words * 3 // 2
+        protected = [m.span() for m in PROTECTED_SPANS.finditer(text)]
+
+        words = list(_WORD.finditer(text))
+        for count, word in enumerate(words, start=1):
+            end = word.end()
+            if any(start < end < stop for start, stop in protected):
+                continue
+            token = word.group()
+            if _SENTENCE_END.search(token):
+                cut = count >= target
+            elif _CLAUSE_END.search(token):
+                cut = count >= (target if first else self.max_words)
+            else:
+                # Never force a cut next to a number: it may be half of a price,
+                # postcode or phone number whose other half is still streaming
+                following = words[count].group() if count < len(words) else None
+                cut = (
+                    count >= force_at
+                    and following is not None
+                    and not any(c.isdigit() for c in token + following)
+                )
+            if cut:
+                self.text = text[end:].lstrip()
+                self.emitted += 1
+                return text[:end].strip()
+        return None
+
+
+class LatencyAwareChunker(tokenize.SentenceTokenizer):
+    """Drop-in for ``tokenize.basic.SentenceTokenizer`` in ``tts.StreamAdapter``.
+
+    The basic tokenizer holds text back until a whole sentence of at least 20
+    characters is in; this one lets the first clause go to TTS as soon as it
+    is a few words long, then sends progressively larger chunks.
+    """
+
+    def __init__(self, *, first_words: int = FIRST_WORDS, max_words: int = MAX_WORDS, growth: float = GROWTH):
+        self.first_words = first_words
+        self.max_words = max_words
+        self.growth = growth
+
+    def _buffer(self) -> ChunkBuffer:
+        return ChunkBuffer(self.first_words, self.max_words, self.growth)
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> list[str]:
+        buffer = self._buffer()
+        return buffer.push(text + " ") + buffer.flush()
+
+    def stream(self, *, language: Optional[str] = None) -> "ChunkStream":
+        return ChunkStream(self._buffer())
+
+
+class ChunkStream(tokenize.SentenceStream):
+    def __init__(self, buffer: ChunkBuffer):
+        super().__init__()
+        self._buffer = buffer
+        self._segment_id = utils.shortuuid()
+
+    def _send(self, chunks: list[str]):
+        for chunk in chunks:
+            self._event_ch.send_nowait(tokenize.TokenData(segment_id=self._segment_id, token=chunk))
+
+    def push_text(self, text: str):
+        self._check_not_closed()
+        self._send(self._buffer.push(text))
+
+    def flush(self):
+        self._check_not_closed()
+        chunks = self._buffer.flush()
+        if chunks:
+            self._send(chunks)
+            self._segment_id = utils.shortuuid()
+
+    def end_input(self):
+        self.flush()
+        self._do_close()
+
+    async def aclose(self):
+        self._do_close()
@@ -0,0 +1,14 @@
+from livekit.agents import tts
+from livekit.plugins import deepgram
+
+from .chunker import LatencyAwareChunker
+from .phrase_cache import CachedTTS
+
+def build_deepgram_tts(config):
+    return deepgram.TTS(model=config["deepgram_tts_model"])
+
+async def create_deepgram_tts(config):
+    return tts.StreamAdapter(
+        tts=CachedTTS(build_deepgram_tts(config), voice=config["deepgram_tts_model"]),
+        sentence_tokenizer=LatencyAwareChunker(),
+    )
\ No newline at end of file
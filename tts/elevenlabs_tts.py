@@ -1,22 +1,124 @@
-from elevenlabs import generate, stream
-from livekit import rtc
 import asyncio
+from typing import Optional
 
-async def create_elevenlabs_tts(api_key, voice_id):
-    async def tts_wrapper(text: str):
-        audio_stream = generate(
-            text=text,
-            voice=voice_id,
-            model="eleven_monolingual_v1",
-            stream=True
+import aiohttp
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    APIStatusError,
+    APITimeoutError,
+    tts,
+    utils,
+)
+
+from .audio import PcmFramer
+from .chunker import LatencyAwareChunker
+from .phrase_cache import CachedTTS
+
+ELEVENLABS_BASE_URL = "https://api.elevenlabs.io"
+# ElevenLabs streams raw PCM at one of 16000/22050/24000/44100 Hz
+SAMPLE_RATES = (16000, 22050, 24000, 44100)
+
+
+class ElevenLabsTTS(tts.TTS):
+    """ElevenLabs HTTP streaming synthesis, emitting fixed 20 ms frames as bytes arrive."""
+
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        voice_id: str,
+        model: str = "eleven_turbo_v2_5",
+        sample_rate: int = 24000,
+        base_url: str = ELEVENLABS_BASE_URL,
+        frame_ms: int = 20,
+        http_session: Optional[aiohttp.ClientSession] = None,
+    ):
+        if sample_rate not in SAMPLE_RATES:
+            raise ValueError(f"Unsupported ElevenLabs sample rate: {sample_rate} (expected one of {SAMPLE_RATES})")
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False), sample_rate=sample_rate, num_channels=1
         )
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.frame_ms = frame_ms
+        self._session = http_session
+        self._owns_session = False
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            try:
+                self._session = utils.http_context.http_session()
+            except RuntimeError:
+                # Outside a job (scripts, benchmarks): keep our own keep-alive session
+                self._session = aiohttp.ClientSession()
+                self._owns_session = True
+        return self._session
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "ElevenLabsStream":
+        return ElevenLabsStream(tts=self, input_text=text, conn_options=conn_options)
+
+    async def aclose(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class ElevenLabsStream(tts.ChunkedStream):
+    def __init__(self, *, tts: ElevenLabsTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._el = tts
+
+    async def _run(self):
+        el = self._el
+        request_id = utils.shortuuid()
+        framer = PcmFramer(el.sample_rate, el.num_channels, el.frame_ms)
+        url = f"{el.base_url}/v1/text-to-speech/{el.voice_id}/stream"
+        try:
+            async with el._ensure_session().post(
+                url,
+                params={"output_format": f"pcm_{el.sample_rate}"},
+                headers={"xi-api-key": el.api_key},
+                json={"text": self.input_text, "model_id": el.model},
+                timeout=aiohttp.ClientTimeout(total=30, sock_connect=self._conn_options.timeout),
+            ) as resp:
+                if resp.status != 200:
+                    raise APIStatusError(
+                        f"ElevenLabs returned {resp.status}",
+                        status_code=resp.status,
+                        request_id=resp.headers.get("request-id"),
+                        body=await resp.text(),
+                    )
+                # Each frame goes out as soon as it is complete, so playback
+                # starts on the first 20 ms instead of the whole utterance
+                async for chunk in resp.content.iter_any():
+                    for frame in framer.push(chunk):
+                        self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+                for frame in framer.flush():
+                    self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+        except asyncio.TimeoutError as e:
+            raise APITimeoutError() from e
+        except aiohttp.ClientError as e:
+            raise APIConnectionError() from e
 
-        source = rtc.AudioSource(sample_rate=44100, num_channels=1)
-        track = rtc.LocalAudioTrack.create_audio_track("agent-mic", source)
 
-        for chunk in audio_stream:
-            await source.capture_frame(rtc.AudioFrame(chunk, 44100, 1))
+def build_elevenlabs_tts(config) -> ElevenLabsTTS:
+    return ElevenLabsTTS(
+        api_key=config["elevenlabs_api_key"],
+        voice_id=config["elevenlabs_voice_id"],
+        model=config["elevenlabs_model"],
+        base_url=config.get("elevenlabs_base_url") or ELEVENLABS_BASE_URL,
+    )
 
-        return track
 
-    return tts_wrapper
\ No newline at end of file
+async def create_elevenlabs_tts(config):
+    engine = build_elevenlabs_tts(config)
+    return tts.StreamAdapter(
+        tts=CachedTTS(engine, voice=f"{engine.voice_id}/{engine.model}"),
+        sentence_tokenizer=LatencyAwareChunker(),
+    )
@@ -1,8 +1,14 @@
-from livekit.agents import tts, tokenize
+from livekit.agents import tts
 from livekit.plugins import openai
 
+from .chunker import LatencyAwareChunker
+from .phrase_cache import CachedTTS
+
+def build_openai_tts(config):
+    return openai.TTS(voice=config["openai_tts_voice"])
+
 async def create_openai_tts(config):
     return tts.StreamAdapter(
-        tts=openai.TTS(voice=config["openai_tts_voice"]),
-        sentence_tokenizer=tokenize.basic.SentenceTokenizer(),
+        tts=CachedTTS(build_openai_tts(config), voice=config["openai_tts_voice"]),
+        sentence_tokenizer=LatencyAwareChunker(),
     )
\ No newline at end of file
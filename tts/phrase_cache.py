@@ -0,0 +1,244 @@
+import asyncio
+import dataclasses
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions, tts
+
+from .audio import PcmFramer
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "./.tts-cache")
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "256"))
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+# Longer text is almost never repeated word for word
+MAX_PHRASE_CHARS = 300
+# Seconds prewarm may spend synthesizing; livekit kills a process whose
+# prewarm takes longer than initialize_process_timeout (10s by default)
+PREWARM_TIMEOUT = float(os.getenv("TTS_CACHE_PREWARM_TIMEOUT", "3"))
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class PhraseCache:
+    """Synthesized PCM keyed by a hash of (provider, voice, sample rate, text).
+
+    Two size-bounded LRUs: one in memory, one on disk (one file per phrase,
+    shared by every worker on the machine). A phrase is admitted once it has
+    been requested twice, or straight away when prewarmed, so one-off LLM
+    sentences don't churn the cache.
+    """
+
+    def __init__(
+        self,
+        directory: str = TTS_CACHE_DIR,
+        disk_bytes: int = int(TTS_CACHE_DISK_MB * 1024 * 1024),
+        memory_bytes: int = int(TTS_CACHE_MEMORY_MB * 1024 * 1024),
+    ):
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self.memory_bytes = memory_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # Oldest first, by last use (mtime is bumped on every disk hit)
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith(".pcm"):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        self._disk: OrderedDict[str, int] = OrderedDict((key, size) for _, key, size in sorted(files))
+        self._disk_size = sum(self._disk.values())
+
+    @staticmethod
+    def key(provider: str, voice: str, sample_rate: int, text: str) -> str:
+        return hashlib.sha256(f"{provider}\0{voice}\0{sample_rate}\0{_normalize(text)}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def _remember(self, key: str, pcm: bytes):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = pcm
+        self._memory_size += len(pcm)
+        while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            pcm = self._memory.get(key)
+            if pcm is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return pcm
+        try:
+            with open(self._path(key), "rb") as f:
+                pcm = f.read()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            # Not cached, or evicted by another worker
+            with self._lock:
+                self._disk.pop(key, None)
+                self.misses += 1
+            return None
+        with self._lock:
+            self._remember(key, pcm)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self.hits += 1
+        return pcm
+
+    def admit(self, key: str) -> bool:
+        """Whether a freshly synthesized phrase should be stored (second request onwards)."""
+        with self._lock:
+            if key in self._seen:
+                return True
+            self._seen[key] = None
+            if len(self._seen) > 10000:
+                self._seen.popitem(last=False)
+            return False
+
+    def put(self, key: str, pcm: bytes):
+        if not pcm:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._remember(key, pcm)
+            self._disk_size += len(pcm) - self._disk.pop(key, 0)
+            self._disk[key] = len(pcm)
+            while self._disk_size > self.disk_bytes and len(self._disk) > 1:
+                evicted, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                try:
+                    os.remove(self._path(evicted))
+                except FileNotFoundError:
+                    pass
+
+
+_cache: Optional[PhraseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_phrase_cache() -> PhraseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PhraseCache()
+        return _cache
+
+
+class CachedTTS(tts.TTS):
+    """Wraps a non-streaming TTS so repeated phrases are replayed from the phrase cache."""
+
+    def __init__(self, inner: tts.TTS, voice: str, cache: Optional[PhraseCache] = None, frame_ms: int = 20):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=inner.sample_rate,
+            num_channels=inner.num_channels,
+        )
+        self.inner = inner
+        self.voice = voice
+        self.cache = cache or get_phrase_cache()
+        self.frame_ms = frame_ms
+
+    def key(self, text: str) -> str:
+        return PhraseCache.key(self.inner.label, self.voice, self.sample_rate, text)
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "CachedStream":
+        return CachedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    async def warm(self, phrases: Iterable[str]) -> int:
+        """Synthesize and store any of ``phrases`` not cached yet; returns how many were missing."""
+        missing = 0
+        for phrase in phrases:
+            key = self.key(phrase)
+            if self.cache.get(key) is not None:
+                continue
+            missing += 1
+            pcm = bytearray()
+            async for audio in self.inner.synthesize(phrase):
+                pcm += audio.frame.data.cast("B")
+            self.cache.put(key, bytes(pcm))
+        return missing
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class CachedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options: APIConnectOptions):
+        # The inner stream does the retrying; retrying here would replay frames already sent
+        super().__init__(tts=tts, input_text=input_text, conn_options=dataclasses.replace(conn_options, max_retry=0))
+        self._cached_tts = tts
+        self._inner_options = conn_options
+
+    async def _run(self):
+        cached_tts = self._cached_tts
+        key = cached_tts.key(self.input_text)
+        cacheable = len(self.input_text) <= MAX_PHRASE_CHARS
+        pcm = cached_tts.cache.get(key) if cacheable else None
+        if pcm is not None:
+            framer = PcmFramer(cached_tts.sample_rate, cached_tts.num_channels, cached_tts.frame_ms)
+            for frame in [*framer.push(pcm), *framer.flush()]:
+                self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=key[:12], frame=frame))
+            return
+
+        store = cacheable and cached_tts.cache.admit(key)
+        recorded = bytearray()
+        stream = cached_tts.inner.synthesize(self.input_text, conn_options=self._inner_options)
+        try:
+            async for audio in stream:
+                if store:
+                    recorded += audio.frame.data.cast("B")
+                self._event_ch.send_nowait(audio)
+        finally:
+            await stream.aclose()
+        if store:
+            # File write off the event loop; the audio has already gone out
+            await asyncio.to_thread(cached_tts.cache.put, key, bytes(recorded))
+
+
+def prewarm_phrases(create_tts: Callable[[], tts.TTS], voice: str, phrases: Iterable[str]):
+    """Fill the phrase cache from a job process ``prewarm`` (which runs before the event loop).
+
+    Phrases already on disk are only loaded into memory; the rest are
+    synthesized once with a throwaway ``create_tts()`` instance, within
+    ``PREWARM_TIMEOUT`` seconds.
+    """
+    phrases = list(phrases)
+
+    async def _warm() -> int:
+        engine = CachedTTS(create_tts(), voice)
+        try:
+            return await engine.warm(phrases)
+        finally:
+            await engine.aclose()
+
+    try:
+        missing = asyncio.run(asyncio.wait_for(_warm(), PREWARM_TIMEOUT))
+        print(f"TTS phrase cache warm: {len(phrases) - missing} cached, {missing} synthesized")
+    except asyncio.TimeoutError:
+        # A slow provider must not get the process killed; whatever finished is cached
+        print(f"TTS phrase cache prewarm gave up after {PREWARM_TIMEOUT:g}s")
+    except Exception as e:
+        # The first session just pays for synthesis instead
+        print(f"TTS phrase cache prewarm failed: {e}")
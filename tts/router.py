@@ -0,0 +1,262 @@
+import asyncio
+import dataclasses
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    tts,
+)
+
+from .chunker import LatencyAwareChunker
+from .deepgram_tts import build_deepgram_tts
+from .elevenlabs_tts import build_elevenlabs_tts
+from .openai_tts import build_openai_tts
+
+# Rolling time-to-first-byte window per provider
+ROUTER_WINDOW = int(os.getenv("TTS_ROUTER_WINDOW", "20"))
+# A provider with no audio after this long is abandoned for the next one
+FIRST_BYTE_TIMEOUT = float(os.getenv("TTS_ROUTER_FIRST_BYTE_TIMEOUT", "2.0"))
+# Failed providers sit out this long, doubling per consecutive failure up to COOLDOWN_MAX
+COOLDOWN = float(os.getenv("TTS_ROUTER_COOLDOWN", "15"))
+COOLDOWN_MAX = 300.0
+# Idle providers are sent a short probe this often to keep their connections
+# open and their TTFB current; 0 only warms them up once at start
+PROBE_INTERVAL = float(os.getenv("TTS_ROUTER_PROBE_INTERVAL", "30"))
+PROBE_TEXT = "Okay."
+
+TTS_PROVIDERS = {
+    "openai": build_openai_tts,
+    "elevenlabs": build_elevenlabs_tts,
+    "deepgram": build_deepgram_tts,
+}
+
+
+class ProviderState:
+    """Rolling TTFB and health of one provider behind the router."""
+
+    def __init__(self, name: str, engine: tts.TTS, window: int):
+        self.name = name
+        self.engine = engine
+        self.ttfb: deque[float] = deque(maxlen=window)
+        self.failures = 0
+        self.unhealthy_until = 0.0
+        self.last_used = 0.0
+        self.utterances = 0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+    def score(self) -> float:
+        # Untried providers sort first so they get measured
+        return statistics.median(self.ttfb) if self.ttfb else 0.0
+
+    def record_success(self, ttfb: float):
+        self.ttfb.append(ttfb)
+        self.failures = 0
+        self.unhealthy_until = 0.0
+        self.last_used = time.monotonic()
+
+    def record_failure(self, cooldown: float):
+        self.failures += 1
+        self.last_used = time.monotonic()
+        self.unhealthy_until = self.last_used + min(cooldown * 2 ** (self.failures - 1), COOLDOWN_MAX)
+
+
+class TTSRouter(tts.TTS):
+    """Sends each utterance to the healthy provider with the lowest rolling TTFB.
+
+    Unlike ``tts.FallbackAdapter``, which always starts with the first TTS in
+    its list, the order is re-ranked for every utterance. A provider that
+    errors or stays silent past ``first_byte_timeout`` is benched for a
+    cooldown, and the utterance moves to the next provider, provided no
+    audio has been played yet. A background probe keeps every provider's
+    connection warm, keeps its TTFB current, and brings benched providers
+    back.
+    """
+
+    def __init__(
+        self,
+        providers: dict[str, tts.TTS],
+        *,
+        first_byte_timeout: float = FIRST_BYTE_TIMEOUT,
+        cooldown: float = COOLDOWN,
+        probe_interval: float = PROBE_INTERVAL,
+        window: int = ROUTER_WINDOW,
+    ):
+        if not providers:
+            raise ValueError("TTSRouter needs at least one provider")
+        if len({engine.num_channels for engine in providers.values()}) != 1:
+            raise ValueError("All TTS providers must have the same number of channels")
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=max(engine.sample_rate for engine in providers.values()),
+            num_channels=next(iter(providers.values())).num_channels,
+        )
+        self.providers = [ProviderState(name, engine, window) for name, engine in providers.items()]
+        self.first_byte_timeout = first_byte_timeout
+        self.cooldown = cooldown
+        self.probe_interval = probe_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def ranked(self) -> list[ProviderState]:
+        """Healthy providers fastest first, then benched ones as a last resort."""
+        now = time.monotonic()
+        healthy = sorted((p for p in self.providers if p.healthy(now)), key=ProviderState.score)
+        benched = sorted((p for p in self.providers if not p.healthy(now)), key=lambda p: p.unhealthy_until)
+        return healthy + benched
+
+    def stats(self) -> dict[str, dict]:
+        now = time.monotonic()
+        return {
+            p.name: {
+                "ttfb_ms": round(p.score() * 1000) if p.ttfb else None,
+                "healthy": p.healthy(now),
+                "utterances": p.utterances,
+            }
+            for p in self.providers
+        }
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "RouterStream":
+        return RouterStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def start(self):
+        """Start probing on the running loop; each job calls it on its own loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        """Stop probing but keep the providers, for the next job in the process."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _probe(self, provider: ProviderState):
+        start = time.perf_counter()
+        stream = provider.engine.synthesize(PROBE_TEXT, conn_options=APIConnectOptions(max_retry=0))
+        try:
+            await asyncio.wait_for(stream.__anext__(), self.first_byte_timeout)
+            provider.record_success(time.perf_counter() - start)
+        except Exception as e:
+            if provider.healthy(time.monotonic()):
+                print(f"TTS probe to {provider.name} failed: {e!r}")
+            provider.record_failure(self.cooldown)
+        finally:
+            await stream.aclose()
+
+    async def _probe_loop(self):
+        # The first round opens every provider's connection before the first utterance
+        await asyncio.gather(*(self._probe(p) for p in self.providers))
+        print(f"TTS router warm: {self.stats()}")
+        if self.probe_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            now = time.monotonic()
+            # Benched providers are probed too, so they can come back before their cooldown ends
+            idle = [p for p in self.providers if now - p.last_used >= self.probe_interval]
+            await asyncio.gather(*(self._probe(p) for p in idle))
+
+    async def aclose(self):
+        await self.stop()
+        for p in self.providers:
+            await p.engine.aclose()
+
+
+class RouterStream(tts.ChunkedStream):
+    def __init__(self, *, tts: TTSRouter, input_text: str, conn_options: APIConnectOptions):
+        # Failing over to the next provider replaces retrying the same one
+        conn_options = dataclasses.replace(conn_options, max_retry=0)
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._router = tts
+
+    def _send(self, audio: tts.SynthesizedAudio, resampler: Optional[rtc.AudioResampler]):
+        if resampler is None:
+            self._event_ch.send_nowait(audio)
+            return
+        for frame in resampler.push(audio.frame):
+            self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=audio.request_id, frame=frame))
+
+    async def _run(self):
+        router = self._router
+        errors = []
+        for provider in router.ranked():
+            engine = provider.engine
+            resampler = None
+            if engine.sample_rate != router.sample_rate:
+                resampler = rtc.AudioResampler(
+                    input_rate=engine.sample_rate, output_rate=router.sample_rate, num_channels=router.num_channels
+                )
+            start = time.perf_counter()
+            played = False
+            request_id = ""
+            stream = engine.synthesize(self.input_text, conn_options=self._conn_options)
+            try:
+                try:
+                    first = await asyncio.wait_for(stream.__anext__(), router.first_byte_timeout)
+                except StopAsyncIteration:
+                    raise APIConnectionError("no audio received")
+                provider.record_success(time.perf_counter() - start)
+                provider.utterances += 1
+                request_id = first.request_id
+                played = True
+                self._send(first, resampler)
+                async for audio in stream:
+                    self._send(audio, resampler)
+                if resampler is not None:
+                    for frame in resampler.flush():
+                        self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+                return
+            except Exception as e:
+                provider.record_failure(router.cooldown)
+                if played:
+                    # Replaying the sentence on another voice would repeat what was already heard
+                    raise APIConnectionError(f"TTS {provider.name} failed mid-utterance") from e
+                print(f"TTS {provider.name} failed ({e!r}), failing over")
+                errors.append(f"{provider.name}: {e!r}")
+            finally:
+                await stream.aclose()
+        raise APIConnectionError(f"All TTS providers failed: {'; '.join(errors)}")
+
+
+def build_tts_router(config) -> TTSRouter:
+    names = [name.strip() for name in config["tts_providers"].split(",") if name.strip()]
+    unknown = [name for name in names if name not in TTS_PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unsupported TTS provider(s) for routing: {', '.join(unknown)}")
+    return TTSRouter({name: TTS_PROVIDERS[name](config) for name in names})
+
+
+_router: Optional[TTSRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_tts_router(config) -> TTSRouter:
+    """The process-wide router, built on first use.
+
+    Call it from ``prewarm`` so the providers exist before the first job, and
+    every job in the process shares them along with their TTFB history.
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = build_tts_router(config)
+        return _router
+
+
+async def create_tts_router(config):
+    router = get_tts_router(config)
+    router.start()
+    # No CachedTTS here: the router picks a provider per utterance, so a
+    # cached phrase would replay in whichever voice happened to serve it first
+    return tts.StreamAdapter(tts=router, sentence_tokenizer=LatencyAwareChunker())